@@ -0,0 +1,76 @@
+"""Benchmark of loading a program from __toycache__ against parsing it.
+
+Writes a synthetic Toy script to a temporary directory, then times a full
+parse (Lexer + Parser), a cold run that parses and stores the entry, and a
+warm run that loads it back, after checking the loaded AST is identical.
+
+Usage: python benchmarks/bench_cache.py [--functions N] [--repeat N]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.cache import ASTCache
+from toy.main import parse
+
+
+CHUNK = """fn f_{n}(a) {{
+    var t = a * {n};
+    for (var i = 0; i < 3; i = i + 1) {{ if (t > 100) t = t - i; else t = t + i; }}
+    return match t {{ case 0 => 1, case 1 => 2 }};
+}}
+print f_{n}({n}) != 4 == !(1 <= 2);
+"""
+
+
+def best_time(action, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = action()
+        best = min(best, time.perf_counter() - start)
+        # Freed outside the timed region
+        del result
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--functions", type=int, default=5000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = "".join(CHUNK.format(n=n) for n in range(args.functions)).encode()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "program.toy"
+        path.write_bytes(source)
+        cache = ASTCache()
+
+        def cold() -> None:
+            cache.store(path, source, parse(source.decode()))
+
+        parsed = best_time(lambda: parse(source.decode()), args.repeat)
+        stored = best_time(cold, args.repeat)
+        loaded = best_time(lambda: cache.load(path, source), args.repeat)
+
+        assert cache.load(path, source) == parse(source.decode()), "cached AST differs"
+        entry = cache.entry_path(path, optimized=False).stat().st_size
+
+    print(f"source: {len(source) / 1e6:.2f} MB, cache entry: {entry / 1e6:.2f} MB")
+    print(f"{'step':<16}{'time':>10}")
+    print(f"{'parse':<16}{parsed:>9.3f}s")
+    print(f"{'parse + store':<16}{stored:>9.3f}s")
+    print(f"{'load':<16}{loaded:>9.3f}s")
+    print(f"speedup: {parsed / loaded:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
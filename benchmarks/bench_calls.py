@@ -0,0 +1,85 @@
+"""Microbenchmark of the per-call overhead of Toy functions.
+
+Times a loop calling a small function and subtracts the same loop without the
+call. Compares fresh frames per call (pool disabled) with recycled frames.
+
+Usage: python benchmarks/bench_calls.py [--calls N] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.closures import CompiledFunction
+from toy.interpreter import Interpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+CALL_LOOP = """
+fn add(a, b) {{
+    var c = a + b;
+    return c;
+}}
+var i = 0;
+var total = 0;
+while (i < {calls}) {{
+    total = add(total, i);
+    i = i + 1;
+}}
+"""
+
+EMPTY_LOOP = """
+var i = 0;
+var total = 0;
+while (i < {calls}) {{
+    total = total + i;
+    i = i + 1;
+}}
+"""
+
+
+def best_time(source: str, repeat: int) -> float:
+    ast = Parser(Lexer(source).tokenize()).parse()
+    best = float("inf")
+    for _ in range(repeat):
+        interpreter = Interpreter()
+        start = time.perf_counter()
+        interpreter.interpret(ast)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_call_overhead(calls: int, repeat: int) -> float:
+    loop = best_time(EMPTY_LOOP.format(calls=calls), repeat)
+    with_calls = best_time(CALL_LOOP.format(calls=calls), repeat)
+    return (with_calls - loop) / calls
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--calls", type=int, default=200_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    pool_size = CompiledFunction.pool_size
+    try:
+        CompiledFunction.pool_size = 0
+        fresh = per_call_overhead(args.calls, args.repeat)
+    finally:
+        CompiledFunction.pool_size = pool_size
+    recycled = per_call_overhead(args.calls, args.repeat)
+
+    print(f"{'frames':<12}{'per call':>12}")
+    print(f"{'fresh':<12}{fresh * 1e9:>10.0f}ns")
+    print(f"{'recycled':<12}{recycled * 1e9:>10.0f}ns")
+    print(f"speedup: {fresh / recycled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
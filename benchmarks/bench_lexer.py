@@ -0,0 +1,112 @@
+"""Benchmark of the pattern-based tokenizer against the character scanner.
+
+Generates a synthetic Toy program of roughly the requested size and times
+Lexer.tokenize (one compiled regex per line) and Lexer.iter_tokens (the same,
+streamed to the parser) against Lexer.scan_tokens (one character at a time),
+after checking they produce the same tokens.
+
+All lexers build the same Token objects, and building them is a floor none
+can go below: it is timed on its own, with the garbage collector paused as
+in tokenize. On a 1 MB source, tokenize is about 3x faster than the scanner
+and iter_tokens about 3.7x. Building the Token objects alone takes a third
+of tokenize, so the per-token objects, not the regex, now bound the speedup.
+
+Usage: python benchmarks/bench_lexer.py [--size-mb N] [--repeat N]
+"""
+
+import argparse
+import gc
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.lexer import Lexer
+from toy.tokens import Token
+
+
+CHUNK = """
+fn step_{n}(a, b) {{
+    var total = a * {n} + b / 2.5;
+    for (var i = 0; i < 10; i = i + 1) {{
+        if (total >= 100) {{ total = total - 1; }} else {{ total = total + i; }}
+    }}
+    return match total {{ case 0 => 1, case 1 => 2 }};
+}}
+print step_{n}({n}, 3) != 4 == !(1 <= 2);
+"""
+
+
+def generate(size: int) -> str:
+    chunks = []
+    length = 0
+    n = 0
+    while length < size:
+        chunk = CHUNK.format(n=n)
+        chunks.append(chunk)
+        length += len(chunk)
+        n += 1
+    return "".join(chunks)
+
+
+def best_time(tokenize, source: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Garbage left by a previous sample must not be collected during this one
+        gc.collect()
+        start = time.perf_counter()
+        tokenize(Lexer(source))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def construction_time(tokens: list[Token], repeat: int) -> float:
+    """Best time to build the same Token objects from their fields alone."""
+    types, lexemes, lines = zip(*((token.type, token.lexeme, token.line) for token in tokens))
+    best = float("inf")
+    for _ in range(repeat):
+        # Garbage left by a previous sample must not be collected during this one
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        list(map(Token, types, lexemes, lines))
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+    return best
+
+
+def stream(lexer: Lexer) -> None:
+    """Consume iter_tokens like the parser does, one token at a time."""
+    deque(lexer.iter_tokens(), maxlen=0)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--size-mb", type=float, default=2.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = generate(int(args.size_mb * 1024 * 1024))
+    tokens = Lexer(source).tokenize()
+    assert tokens == Lexer(source).scan_tokens(), "token streams differ"
+
+    scanner = best_time(Lexer.scan_tokens, source, args.repeat)
+    pattern = best_time(Lexer.tokenize, source, args.repeat)
+    streamed = best_time(stream, source, args.repeat)
+    floor = construction_time(tokens, args.repeat)
+
+    print(f"source: {len(source) / 1e6:.1f} MB, {len(tokens)} tokens")
+    print(f"{'lexer':<14}{'time':>10}{'tokens/s':>14}{'speedup':>10}")
+    for name, elapsed in [
+        ("scan_tokens", scanner), ("tokenize", pattern), ("iter_tokens", streamed), ("Token()", floor)
+    ]:
+        print(f"{name:<14}{elapsed:>9.3f}s{len(tokens) / elapsed:>14,.0f}{scanner / elapsed:>9.2f}x")
+    print(f"Token construction share of tokenize: {floor / pattern:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Parse-throughput benchmark on expression-heavy Toy input.
+
+Generates a program made mostly of arithmetic, comparison and call
+expressions, tokenizes it once, then times Parser.parse over the token list
+and reports tokens and AST nodes parsed per second.
+
+Usage: python benchmarks/bench_parser.py [--statements N] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.ast_nodes import iter_nodes
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+LINES = [
+    "var v{n} = ({n} + 1) * 2 - {n} / 4 + -3 * (1 - 2);",
+    "print v{n} * v{n} + 2 * v{n} - 1 >= {n} == !(v{n} < 3);",
+    "v{n} = f(v{n} - 1, {n} * 2, -(v{n} + 1)) + g(1) * 3 / (2 - 1);",
+    "print 1 + 2 + 3 + 4 + 5 * 6 * 7 - 8 - 9 / 10 < {n} != 1 <= 2;",
+]
+
+
+def generate(statements: int) -> str:
+    return "\n".join(LINES[n % len(LINES)].format(n=n // len(LINES)) for n in range(statements))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--statements", type=int, default=40000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    tokens = Lexer(generate(args.statements)).tokenize()
+    ast = Parser(tokens).parse()
+    nodes = sum(1 for statement in ast for _ in iter_nodes(statement))
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        Parser(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{len(tokens)} tokens, {nodes} nodes")
+    print(f"parse: {best:.3f}s, {len(tokens) / best:,.0f} tokens/s, {nodes / best:,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark of call-heavy Toy programs: completion-based vs exception-based return.
+
+The tree-walking interpreter propagates `return` as a completion value. This
+script compares it with the previous design, where `return` raised an
+exception caught in ToyFunction.call. The baseline does the same per-call
+work as ToyFunction.invoke (interrupt check, argument binding, metrics), and
+the two variants alternate so that machine noise hits them alike.
+
+Usage: python benchmarks/bench_returns.py [--repeat N]
+"""
+
+import argparse
+import gc
+import sys
+import time
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.ast_nodes import FunctionDeclarationStatement, ReturnStatement
+from toy.environment import Environment
+from toy.interpreter import Interpreter, ToyFunction, bind_arguments
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+PROGRAMS = {
+    "fib": """
+        fn fib(n) {
+            if (n < 2) return n;
+            return fib(n - 1) + fib(n - 2);
+        }
+        fib(20);
+    """,
+    "small_calls": """
+        fn square(x) { return x * x; }
+        var i = 0;
+        var total = 0;
+        while (i < 50000) {
+            total = total + square(i);
+            i = i + 1;
+        }
+    """,
+    "nested_early_return": """
+        fn find(limit) {
+            var i = 0;
+            while (i < 100) {
+                {
+                    if (i == limit) {
+                        return i;
+                    }
+                }
+                i = i + 1;
+            }
+            return -1;
+        }
+        var j = 0;
+        while (j < 1500) {
+            find(20);
+            j = j + 1;
+        }
+    """,
+}
+
+
+class ReturnSignal(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class ExceptionReturnFunction(ToyFunction):
+    """ToyFunction.invoke with the same per-call work, but `return` caught as an exception."""
+
+    def call(self, arguments):
+        if self.interpreter.interrupt_reason is not None:
+            self.interpreter.check_interrupt()
+        env = Environment(self.closure)
+        bind_arguments(env, self.declaration.parameters, arguments)
+
+        metrics = self.interpreter.metrics
+        metrics.calls += 1
+        metrics.environments += 1
+        depth = metrics.call_depth = metrics.call_depth + 1
+        if depth > metrics.peak_call_depth:
+            metrics.peak_call_depth = depth
+
+        try:
+            self.interpreter.execute_block(self.declaration.body, env)
+        except ReturnSignal as signal:
+            return signal.value
+        finally:
+            metrics.call_depth -= 1
+        return None
+
+
+class ExceptionReturnInterpreter(Interpreter):
+    """Tree walker where `return` raises, as before completion signals.
+
+    Return and function declarations are dispatched before the shared match,
+    like the real interpreter, which tests return among its first cases.
+    """
+
+    def __init__(self):
+        super().__init__(compiled=False)
+
+    def execute(self, stmt):
+        if isinstance(stmt, ReturnStatement):
+            self.metrics.statements += 1
+            raise ReturnSignal(self.evaluate(stmt.value) if stmt.value is not None else None)
+        if isinstance(stmt, FunctionDeclarationStatement):
+            self.metrics.statements += 1
+            self.metrics.environments += 1
+            function = ExceptionReturnFunction(self, stmt, Environment(self.environment))
+            self.environment.define(stmt.name.lexeme, function)
+            return None
+        return super().execute(stmt)
+
+
+def best_times(factories, ast, repeat: int) -> list[float]:
+    """Best time of each variant; runs alternate so that machine noise hits them alike."""
+    best = [float("inf")] * len(factories)
+    for _ in range(repeat):
+        for index, factory in enumerate(factories):
+            interpreter = factory()
+            gc.collect()
+            start = time.perf_counter()
+            interpreter.interpret(ast)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print(f"{'program':<22}{'exception':>12}{'completion':>12}{'speedup':>10}")
+    for name, source in PROGRAMS.items():
+        ast = Parser(Lexer(source).tokenize()).parse()
+        exception, completion = best_times(
+            [ExceptionReturnInterpreter, lambda: Interpreter(compiled=False)], ast, args.repeat
+        )
+        print(f"{name:<22}{exception:>11.3f}s{completion:>11.3f}s{exception / completion:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Front-end scaling benchmark: Lexer.tokenize and Parser.parse across input sizes.
+
+Generates deterministic Toy programs of increasing size (nested functions,
+long expressions, big match tables and deep blocks), then times tokenizing
+and parsing each one and reports tokens/s and nodes/s per phase. Peak memory
+of each phase is measured in a separate run under tracemalloc, which would
+otherwise slow down the timed run.
+
+Between two consecutive sizes, the growth exponent of each phase is
+log(time ratio) / log(token ratio): 1.0 is linear. A phase whose exponent
+exceeds --max-exponent is flagged as super-linear and the script exits with
+status 1. Sizes under --min-flag-size are timed but never flagged, their
+times being dominated by fixed costs. Above about 1M, exponents of 1.1 to
+1.2 are expected even from linear code: millions of live tokens and nodes
+defeat the CPU caches and make each garbage collection pass longer. A hidden
+quadratic shows up as an exponent close to 2.
+
+Sizes accept K and M suffixes (bytes of source). 100M needs several GB of
+memory: at 10M, tokenizing peaks at about 360 MB and parsing at 180 MB.
+
+Usage: python benchmarks/bench_scaling.py [--sizes 1K,10K,100K,1M,10M] [--repeat N]
+                                          [--seed N] [--max-exponent X] [--no-memory]
+                                          [--write-source DIR]
+"""
+
+import argparse
+import gc
+import math
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.ast_nodes import iter_nodes
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+DEFAULT_SIZES = "1K,10K,100K,1M,10M"
+UNITS = {"K": 1024, "M": 1024 * 1024}
+
+# Small inputs are timed repeatedly until one sample lasts this long
+MIN_SAMPLE_TIME = 0.05
+
+OPERATORS = ["+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!="]
+
+
+class Generator:
+    """Deterministic generator of syntactically valid Toy declarations."""
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.count = 0
+
+    def name(self, prefix: str) -> str:
+        self.count += 1
+        return f"{prefix}{self.count}"
+
+    def expression(self, terms: int, variables: list[str]) -> str:
+        parts = []
+        for i in range(terms):
+            match self.random.randrange(5):
+                case 0 if terms > 2:
+                    parts.append(f"({self.expression(3, variables)})")
+                case 1:
+                    parts.append(f"-{self.random.choice(variables)}")
+                case 2:
+                    parts.append(str(self.random.randrange(1000)))
+                case _:
+                    parts.append(self.random.choice(variables))
+            if i < terms - 1:
+                parts.append(self.random.choice(OPERATORS))
+        return " ".join(parts)
+
+    def nested_function(self) -> str:
+        outer, inner = self.name("f"), self.name("g")
+        return (
+            f"fn {outer}(a, b) {{\n"
+            f"    var x = {self.expression(6, ['a', 'b'])};\n"
+            f"    fn {inner}(c) {{\n"
+            f"        if (c > x) return c * x - a;\n"
+            f"        return {self.expression(4, ['a', 'b', 'c', 'x'])};\n"
+            f"    }}\n"
+            f"    return {inner}(x) + {inner}(b);\n"
+            f"}}\n"
+        )
+
+    def long_expression(self) -> str:
+        return f"var {self.name('e')} = {self.expression(self.random.randrange(20, 60), ['1', '2', '3'])};\n"
+
+    def match_table(self) -> str:
+        cases = ", ".join(
+            f"case {value} => {self.expression(3, ['k', str(value)])}"
+            for value in range(self.random.randrange(10, 50))
+        )
+        return f"var k = {self.random.randrange(50)};\nprint match k {{ {cases} }};\n"
+
+    def deep_block(self) -> str:
+        depth = self.random.randrange(5, 30)
+        variable = self.name("d")
+        lines = [f"var {variable} = 0;"]
+        for level in range(depth):
+            indent = "    " * level
+            match level % 4:
+                case 0:
+                    lines.append(f"{indent}{{")
+                case 1:
+                    lines.append(f"{indent}if ({variable} < {level}) {{")
+                case 2:
+                    lines.append(f"{indent}while ({variable} < {level}) {{")
+                case 3:
+                    lines.append(f"{indent}for (var i = 0; i < {level}; i = i + 1) {{")
+            lines.append(f"{indent}    {variable} = {variable} + {level};")
+        for level in reversed(range(depth)):
+            lines.append(f"{'    ' * level}}}")
+        return "\n".join(lines) + "\n"
+
+    def source(self, size: int) -> str:
+        """A program of about `size` characters."""
+        kinds = [self.nested_function, self.long_expression, self.match_table, self.deep_block]
+        pieces = []
+        length = 0
+        while length < size:
+            piece = self.random.choice(kinds)()
+            pieces.append(piece)
+            length += len(piece)
+        return "".join(pieces)
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    if text[-1:] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    for unit in ("M", "K"):
+        if size >= UNITS[unit]:
+            return f"{size / UNITS[unit]:g}{unit}"
+    return str(size)
+
+
+def best_time(function, repeat: int) -> float:
+    """Minimum seconds per call over `repeat` samples."""
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    first = time.perf_counter() - start
+    number = max(1, math.ceil(MIN_SAMPLE_TIME / first)) if first else 1000
+
+    best = first
+    for _ in range(repeat - 1 if number == 1 else repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def peak_memory(function) -> int:
+    """Peak bytes allocated by one call of function."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated source sizes")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--max-exponent", type=float, default=1.3, help="growth exponent above which a phase is flagged")
+    arg_parser.add_argument("--min-flag-size", type=parse_size, default=UNITS["K"] * 100, help="smallest size that can be flagged")
+    arg_parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc runs")
+    arg_parser.add_argument("--write-source", type=Path, metavar="DIR", help="also save each generated program to DIR")
+    args = arg_parser.parse_args()
+
+    sizes = sorted(parse_size(size) for size in args.sizes.split(","))
+
+    print(f"{'size':>6} {'tokens':>10} {'nodes':>10} {'phase':>6} {'seconds':>9} {'tokens/s':>12} {'nodes/s':>12} {'peak MB':>9} {'exponent':>9}")
+    previous = {}
+    flagged = []
+    for size in sizes:
+        source = Generator(args.seed).source(size)
+        if args.write_source:
+            args.write_source.mkdir(parents=True, exist_ok=True)
+            (args.write_source / f"scaling_{format_size(size)}.toy").write_text(source)
+
+        tokens = Lexer(source).tokenize()
+        ast = Parser(tokens).parse()
+        nodes = sum(1 for statement in ast for _ in iter_nodes(statement))
+        del ast
+
+        phases = {
+            "lex": lambda: Lexer(source).tokenize(),
+            "parse": lambda: Parser(tokens).parse(),
+        }
+        for phase, function in phases.items():
+            seconds = best_time(function, args.repeat)
+            peak = f"{peak_memory(function) / 1e6:9.1f}" if args.memory else f"{'-':>9}"
+
+            exponent = ""
+            if phase in previous:
+                previous_tokens, previous_seconds = previous[phase]
+                growth = math.log(seconds / previous_seconds) / math.log(len(tokens) / previous_tokens)
+                exponent = f"{growth:9.2f}"
+                if growth > args.max_exponent and size >= args.min_flag_size:
+                    exponent += "  SUPER-LINEAR"
+                    flagged.append(f"{phase} from {previous_tokens} to {len(tokens)} tokens: exponent {growth:.2f}")
+            previous[phase] = (len(tokens), seconds)
+
+            print(
+                f"{format_size(size):>6} {len(tokens):>10} {nodes:>10} {phase:>6} {seconds:9.4f} "
+                f"{len(tokens) / seconds:12,.0f} {nodes / seconds:12,.0f} {peak} {exponent}"
+            )
+        del tokens
+
+    if flagged:
+        print(f"\nsuper-linear growth (exponent > {args.max_exponent}):")
+        print("\n".join(flagged))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Memory benchmark of the compact TokenBuffer against a list of Token.
+
+Tokenizes the synthetic program from bench_lexer both ways and reports the
+memory retained by each result (tracemalloc), the time to build it and the
+time to parse from it, after checking both hold the same tokens.
+
+Usage: python benchmarks/bench_token_memory.py [--size-mb N]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from bench_lexer import generate
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+def measure(tokenize, source: str):
+    # Timed without tracemalloc, which slows every allocation down
+    start = time.perf_counter()
+    tokenize(Lexer(source))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tokens = tokenize(Lexer(source))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tokens, elapsed, retained, peak
+
+
+def parse_time(tokens) -> float:
+    start = time.perf_counter()
+    Parser(tokens).parse()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--size-mb", type=float, default=2.0)
+    args = arg_parser.parse_args()
+
+    source = generate(int(args.size_mb * 1024 * 1024))
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    print(f"{'storage':<10}{'retained':>12}{'peak':>12}{'bytes/token':>13}{'lex':>9}{'parse':>9}")
+
+    results = {}
+    for name, tokenize in (("list", Lexer.tokenize), ("buffer", Lexer.tokenize_buffer)):
+        tokens, elapsed, retained, peak = measure(tokenize, source)
+        results[name] = tokens, retained
+        print(
+            f"{name:<10}{retained / 1e6:>10.1f}MB{peak / 1e6:>10.1f}MB"
+            f"{retained / len(tokens):>13.1f}{elapsed:>8.2f}s{parse_time(tokens):>8.2f}s"
+        )
+
+    (tokens, list_size), (buffer, buffer_size) = results["list"], results["buffer"]
+    assert list(buffer) == tokens, "token streams differ"
+    print(f"{len(tokens)} tokens, buffer is {list_size / buffer_size:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Runtime benchmark suite with regression tracking.
+
+Runs each Toy program in benchmarks/programs and times the lexer, parser and
+interpreter phases separately. A phase faster than MIN_SAMPLE_TIME is called
+repeatedly within a sample and timed per call. Each phase is sampled
+--repeat times and its minimum and median are reported; the minimum is
+compared against the baseline because it is the least disturbed by the rest
+of the machine.
+
+Results are written as JSON with --output. With --baseline, the results are
+compared against an earlier results file and the run fails (exit status 1)
+when a phase got slower than its threshold allows. --save-baseline stores
+the results as the new baseline.
+
+Programs:
+    fib             recursive calls and returns
+    nested_loops    nested for/while loops, comparisons and assignments
+    match_dispatch  match expressions with many cases inside a loop
+    closures        creating nested functions and updating captured variables
+    arithmetic      long arithmetic expressions with mixed precedence
+
+Usage: python benchmarks/run.py [--engine NAME] [--repeat N] [--program NAME ...]
+                                [--output FILE] [--baseline FILE] [--save-baseline]
+                                [--threshold FRACTION] [--phase-threshold PHASE=FRACTION ...]
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Keep at the top to resolve toy imports after
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from toy.lexer import Lexer
+from toy.main import ENGINES
+from toy.parser import Parser
+
+
+PROGRAMS_DIRECTORY = Path(__file__).parent / "programs"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+PHASES = ("lex", "parse", "interpret")
+
+# Fast phases are called repeatedly until one sample lasts this long
+MIN_SAMPLE_TIME = 0.05
+
+# Allowed slowdown before a phase counts as a regression (0.10 = 10% slower)
+DEFAULT_THRESHOLD = 0.10
+
+
+def load_programs(names: list[str] | None) -> dict[str, str]:
+    programs = {path.stem: path.read_text() for path in sorted(PROGRAMS_DIRECTORY.glob("*.toy"))}
+    if names:
+        unknown = set(names) - set(programs)
+        if unknown:
+            raise SystemExit(f"Unknown program: {', '.join(sorted(unknown))}")
+        programs = {name: programs[name] for name in names}
+    return programs
+
+
+def timed(function, number: int) -> float:
+    """Seconds taken by one call of function, averaged over `number` calls."""
+    # Garbage left by a previous run must not be collected during this one
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return (time.perf_counter() - start) / number
+
+
+def calls_per_sample(function) -> int:
+    """Number of calls that makes a sample last at least MIN_SAMPLE_TIME."""
+    elapsed = timed(function, 1)
+    return max(1, math.ceil(MIN_SAMPLE_TIME / elapsed)) if elapsed else 1000
+
+
+def measure(source: str, engine: str, repeat: int) -> dict[str, dict[str, float]]:
+    """Time the three phases of one program, each sampled `repeat` times."""
+    tokens = Lexer(source).tokenize()
+    ast = Parser(tokens).parse()
+
+    def interpret() -> None:
+        with open(os.devnull, "w") as sink, redirect_stdout(sink):
+            ENGINES[engine]().interpret(ast)
+
+    phases = {
+        "lex": lambda: Lexer(source).tokenize(),
+        "parse": lambda: Parser(tokens).parse(),
+        "interpret": interpret,
+    }
+    results = {}
+    for phase, function in phases.items():
+        number = calls_per_sample(function)
+        samples = [timed(function, number) for _ in range(repeat)]
+        results[phase] = {"min": min(samples), "median": statistics.median(samples)}
+    return results
+
+
+def compare(results: dict, baseline: dict, thresholds: dict[str, float]) -> list[str]:
+    """Print each phase against the baseline and return the regressions."""
+    regressions = []
+    if baseline.get("engine") != results["engine"]:
+        print(f"warning: baseline engine is {baseline.get('engine')}, not {results['engine']}")
+
+    for name, phases in results["programs"].items():
+        previous = baseline["programs"].get(name)
+        if previous is None:
+            print(f"{name:16} (not in baseline)")
+            continue
+        for phase, timing in phases.items():
+            if phase not in previous:
+                continue
+            ratio = timing["min"] / previous[phase]["min"]
+            limit = 1 + thresholds[phase]
+            status = "REGRESSION" if ratio > limit else "ok"
+            print(f"{name:16} {phase:10} {ratio:6.2f}x  (limit {limit:.2f}x)  {status}")
+            if ratio > limit:
+                regressions.append(f"{name} {phase}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def parse_phase_threshold(text: str) -> tuple[str, float]:
+    phase, _, value = text.partition("=")
+    if phase not in PHASES:
+        raise argparse.ArgumentTypeError(f"phase must be one of {', '.join(PHASES)}")
+    try:
+        return phase, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold: {value!r}")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--engine", choices=ENGINES, default="closure")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--program", action="append", help="run only this program (repeatable)")
+    arg_parser.add_argument("--output", type=Path, help="write the results as JSON to this file")
+    arg_parser.add_argument("--baseline", type=Path, help=f"compare against this results file (default: {DEFAULT_BASELINE.name} if it exists)")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown for every phase")
+    arg_parser.add_argument(
+        "--phase-threshold",
+        type=parse_phase_threshold,
+        action="append",
+        default=[],
+        metavar="PHASE=FRACTION",
+        help="allowed slowdown for one phase, overriding --threshold",
+    )
+    args = arg_parser.parse_args()
+
+    thresholds = {phase: args.threshold for phase in PHASES}
+    thresholds.update(args.phase_threshold)
+
+    results = {
+        "engine": args.engine,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "programs": {},
+    }
+    print(f"{'program':16} {'lex':>9} {'parse':>9} {'interpret':>10}  (min of {args.repeat}, ms)")
+    for name, source in load_programs(args.program).items():
+        phases = measure(source, args.engine, args.repeat)
+        results["programs"][name] = phases
+        lex, parse, run = (phases[phase]["min"] for phase in PHASES)
+        print(f"{name:16} {lex * 1000:9.3f} {parse * 1000:9.3f} {run * 1000:10.3f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    regressions = []
+    if baseline_path.exists() and (args.baseline or not args.save_baseline):
+        print(f"\nagainst {baseline_path}:")
+        regressions = compare(results, json.loads(baseline_path.read_text()), thresholds)
+    elif args.baseline:
+        raise SystemExit(f"Baseline not found: {args.baseline}")
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nbaseline saved to {baseline_path}")
+
+    if regressions:
+        print("\n" + "\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
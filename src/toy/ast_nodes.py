@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from collections.abc import Iterator
+from dataclasses import dataclass, field, fields
 from typing import Any
 
 from toy.tokens import Token
@@ -81,7 +82,8 @@ class MatchExpression(Expression):
 @dataclass
 class Statement(ASTNode):
     """Classe de base pour toutes les instructions."""
-    pass
+    # Ligne du source où commence l'instruction (0 si elle n'en a pas, ex. créée par l'optimiseur)
+    line: int = field(default=0, compare=False, kw_only=True)
 
 
 @dataclass
@@ -117,15 +119,18 @@ class WhileStatement(Statement):
 
 @dataclass
 class ForStatement(Statement):
-    """Instruction conditionnelle."""
-    initializer: Statement
-    condition: Expression
+    """Instruction de boucle for ; chaque clause est optionnelle."""
+    initializer: Statement | None
+    condition: Expression | None
+    increment: Expression | None
     body: Statement
 
 @dataclass
 class BlockStatement(Statement):
     """Instruction qui contient plusieurs instructions."""
     statements: list[Statement]
+    # Faux si le bloc ne déclare rien et peut s'exécuter dans la portée englobante
+    needs_scope: bool = field(default=True, compare=False, kw_only=True)
 
 
 @dataclass
@@ -140,4 +145,16 @@ class FunctionDeclarationStatement(Statement):
 class ReturnStatement(Statement):
     """Instruction de retour."""
     keyword: Token
-    value: Expression | None
\ No newline at end of file
+    value: Expression | None
+
+
+def iter_nodes(node: ASTNode) -> Iterator[ASTNode]:
+    """Parcourt un nœud et tous ses descendants, sans récursion."""
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        yield node
+        for node_field in fields(node):
+            value = getattr(node, node_field.name)
+            children = value if isinstance(value, list) else [value]
+            pending.extend(child for child in reversed(children) if isinstance(child, ASTNode))
@@ -0,0 +1,123 @@
+from array import array
+from enum import IntEnum, auto
+from typing import Any
+
+
+class OpCode(IntEnum):
+    """Énumération des instructions de la machine virtuelle."""
+    CONSTANT = auto()
+    POP = auto()
+    DUP = auto()
+
+    GET_LOCAL = auto()
+    GET_PARAM = auto()
+    SET_LOCAL = auto()
+    DEFINE_LOCAL = auto()
+    DECLARE_LOCAL = auto()
+    GET_CELL = auto()
+    SET_CELL = auto()
+    DEFINE_CELL = auto()
+    DECLARE_CELL = auto()
+    INIT_CELL = auto()
+    GET_UPVALUE = auto()
+    SET_UPVALUE = auto()
+    GET_GLOBAL = auto()
+    SET_GLOBAL = auto()
+    DEFINE_GLOBAL = auto()
+    STORE_LOCAL = auto()
+    STORE_CELL = auto()
+    STORE_UPVALUE = auto()
+    STORE_GLOBAL = auto()
+
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    ADD_CONST = auto()
+    SUBTRACT_CONST = auto()
+    MULTIPLY_CONST = auto()
+    DIVIDE_CONST = auto()
+    EQUAL_CONST = auto()
+    NOT_EQUAL_CONST = auto()
+    GREATER_CONST = auto()
+    GREATER_EQUAL_CONST = auto()
+    LESS_CONST = auto()
+    LESS_EQUAL_CONST = auto()
+    NEGATE = auto()
+    NOT = auto()
+
+    JUMP = auto()
+    JUMP_IF_FALSE = auto()
+
+    CHECK_CALLABLE = auto()
+    CALL = auto()
+    CLOSURE = auto()
+    RETURN = auto()
+
+    PRINT = auto()
+    NO_MATCH = auto()
+    ERROR = auto()
+
+    # Superinstructions : suites fréquentes exécutées en une seule instruction
+    JUMP_IF_NOT_LESS_CONST = auto()
+    MATCH_CONST = auto()
+    ADD_LOCAL_CONST = auto()
+    ADD_CELL_CONST = auto()
+    GET_GLOBAL_FUNCTION = auto()
+
+
+class Chunk:
+    """Suite d'instructions compilées accompagnée de sa table de constantes."""
+
+    def __init__(self) -> None:
+        self.code = array("l")
+        self.constants: list[Any] = []
+        self.names: dict[int, str] = {}
+        # Position d'un accès à une variable capturée encore non déclarée ->
+        # variables capturées englobantes à essayer (index, paramètre), puis la globale
+        self.fallbacks: dict[int, tuple[tuple[int, bool], ...]] = {}
+        self._constant_index: dict[tuple[type, str], int] = {}
+
+    def emit(self, op: OpCode, *operands: int) -> int:
+        """Ajoute une instruction et retourne sa position."""
+        position = len(self.code)
+        self.code.append(op)
+        self.code.extend(operands)
+        return position
+
+    def add_constant(self, value: Any) -> int:
+        """Ajoute une constante (dédupliquée si possible) et retourne son index."""
+        key = None
+        if value is None or isinstance(value, (bool, float, str)):
+            # repr distingue 0.0 de -0.0, que l'égalité confondrait
+            key = (type(value), repr(value))
+            index = self._constant_index.get(key)
+            if index is not None:
+                return index
+
+        index = len(self.constants)
+        self.constants.append(value)
+        if key is not None:
+            self._constant_index[key] = index
+        return index
+
+
+class FunctionProto:
+    """Fonction compilée : code, nombre de slots et variables capturées."""
+
+    def __init__(self, name: str, arity: int) -> None:
+        self.name = name
+        self.arity = arity
+        self.chunk = Chunk()
+        self.slot_count = arity
+        self.cell_params: list[int] = []
+        self.captures: list[tuple[bool, int]] = []
+
+    def __repr__(self) -> str:
+        return f"<fn {self.name}>"
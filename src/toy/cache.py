@@ -0,0 +1,176 @@
+import dataclasses
+import gc
+import hashlib
+import os
+import pickle
+import zlib
+from pathlib import Path
+from typing import BinaryIO
+
+from toy import ast_nodes
+from toy.ast_nodes import Statement
+from toy.tokens import Token, TokenType
+
+
+# À incrémenter quand la forme sérialisée change sans que les nœuds changent
+FORMAT_VERSION = 2
+CACHE_DIRECTORY = "__toycache__"
+SUFFIX = ".toyc"
+MAGIC = b"TOYC"
+
+# Taille maximale du répertoire de cache, entrées les plus anciennes évincées en premier
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Taille des blocs lus pour calculer l'empreinte d'un fichier source
+CHUNK_SIZE = 1024 * 1024
+
+
+def format_signature() -> bytes:
+    """Signature du format : change avec FORMAT_VERSION, les champs des nœuds ou les types de tokens.
+
+    Un AST enregistré par une version de Toy dont les nœuds diffèrent n'est
+    donc jamais relu, même si FORMAT_VERSION n'a pas été incrémenté.
+    """
+    nodes = sorted(
+        (cls.__name__, tuple(field.name for field in dataclasses.fields(cls)))
+        for cls in vars(ast_nodes).values()
+        if isinstance(cls, type) and issubclass(cls, ast_nodes.ASTNode)
+    )
+    layout = (
+        FORMAT_VERSION,
+        pickle.HIGHEST_PROTOCOL,
+        nodes,
+        tuple(field.name for field in dataclasses.fields(Token)),
+        tuple(TokenType),
+    )
+    return repr(layout).encode()
+
+
+class ASTCache:
+    """Cache sur disque des programmes analysés, dans un répertoire __toycache__.
+
+    Comme __pycache__, le répertoire est créé à côté du script. Une entrée
+    est nommée d'après le script et sa variante (AST brut ou optimisé) ; son
+    en-tête contient l'empreinte du source et de la signature du format, ce
+    qui suffit à la valider sans relire le script. Le corps est l'AST
+    sérialisé avec pickle puis compressé.
+
+    Une entrée périmée est remplacée au prochain enregistrement du script.
+    Enregistrer évince aussi les entrées des scripts supprimés, puis les
+    moins récemment utilisées tant que le répertoire dépasse max_bytes.
+    Les erreurs d'écriture sont ignorées : le cache n'est qu'une accélération.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.signature = format_signature()
+
+    def load(self, path: Path, source: bytes | BinaryIO, optimized: bool = False) -> list[Statement] | None:
+        """Retourne l'AST enregistré pour ce source, ou None s'il est absent ou périmé.
+
+        Le source est le contenu du script ou le script ouvert en binaire (voir key).
+        """
+        entry = self.entry_path(path, optimized)
+        header = MAGIC + self.key(source)
+        try:
+            with open(entry, "rb") as f:
+                if f.read(len(header)) != header:
+                    return None
+                payload = f.read()
+        except OSError:
+            return None
+
+        try:
+            data = zlib.decompress(payload)
+            # Le ramasse-miettes parcourrait le tas à chaque lot de nœuds recréés
+            enabled = gc.isenabled()
+            gc.disable()
+            try:
+                statements = pickle.loads(data)
+            finally:
+                if enabled:
+                    gc.enable()
+        except Exception:
+            # Entrée tronquée ou corrompue : elle sera réécrite
+            self.remove(entry)
+            return None
+
+        try:
+            # Marque l'entrée comme récemment utilisée pour l'éviction
+            os.utime(entry)
+        except OSError:
+            pass
+        return statements
+
+    def store(self, path: Path, source: bytes | BinaryIO, statements: list[Statement], optimized: bool = False) -> None:
+        """Enregistre l'AST de ce source et évince les entrées périmées ou en trop."""
+        try:
+            payload = zlib.compress(pickle.dumps(statements, protocol=pickle.HIGHEST_PROTOCOL))
+        except RecursionError:
+            # AST trop profond pour pickle : le programme sera simplement réanalysé
+            return
+
+        data = MAGIC + self.key(source) + payload
+        if len(data) > self.max_bytes:
+            return
+
+        entry = self.entry_path(path, optimized)
+        temporary = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            entry.parent.mkdir(exist_ok=True)
+            temporary.write_bytes(data)
+            os.replace(temporary, entry)
+        except OSError:
+            self.remove(temporary)
+            return
+
+        self.evict(entry.parent, keep=entry)
+
+    def evict(self, directory: Path, keep: Path) -> None:
+        """Retire les entrées sans script, puis les moins récemment utilisées au-delà de max_bytes."""
+        entries = []
+        for entry in directory.glob(f"*{SUFFIX}"):
+            script = directory.parent / entry.name.rsplit(".", 2)[0]
+            if not script.exists():
+                self.remove(entry)
+                continue
+            try:
+                status = entry.stat()
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry != keep:
+                self.remove(entry)
+                total -= size
+
+    def entry_path(self, path: Path, optimized: bool) -> Path:
+        """Emplacement de l'entrée d'un script : une seule par script et par variante."""
+        variant = "opt" if optimized else "ast"
+        return path.parent / CACHE_DIRECTORY / f"{path.name}.{variant}{SUFFIX}"
+
+    def key(self, source: bytes | BinaryIO) -> bytes:
+        """Empreinte du source et du format, écrite en tête de l'entrée.
+
+        Un fichier ouvert est lu par blocs depuis sa position courante, sans
+        garder tout le source en mémoire.
+        """
+        digest = hashlib.sha256(self.signature + b"\0")
+        if isinstance(source, bytes):
+            digest.update(source)
+        else:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.digest()
+
+    @staticmethod
+    def remove(entry: Path) -> None:
+        """Supprime un fichier du cache s'il existe encore."""
+        try:
+            entry.unlink()
+        except OSError:
+            pass
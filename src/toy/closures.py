@@ -0,0 +1,698 @@
+from typing import Any, Callable
+
+from toy.ast_nodes import *
+from toy.environment import UNSET, Environment, SlotEnvironment
+from toy.hooks import InstrumentedFunction
+from toy.interpreter import (
+    BINARY_OPERATORS,
+    UNARY_OPERATORS,
+    Completion,
+    CountedLoop,
+    Return,
+    TailCall,
+    ToyFunction,
+    complete,
+)
+from toy.metrics import Site
+from toy.resolver import Resolution, Resolver
+
+
+Env = Environment | SlotEnvironment
+StatementFn = Callable[[Env], Completion | None]
+ExpressionFn = Callable[[Env], Any]
+
+
+class CompiledFunction(ToyFunction):
+    """Fonction Toy dont le corps a été compilé en closures.
+
+    Chaque appel s'exécute dans une frame SlotEnvironment dimensionnée d'après
+    la déclaration. Si aucune closure ne peut capturer la frame, elle est
+    rendue à une liste de frames libres et réutilisée par l'appel suivant.
+    """
+
+    # Nombre maximal de frames libres conservées par fonction
+    pool_size = 16
+
+    def __init__(
+        self,
+        interpreter,
+        declaration: FunctionDeclarationStatement,
+        closure: Env,
+        body: StatementFn,
+        size: int,
+        recyclable: bool = False,
+    ) -> None:
+        super().__init__(interpreter, declaration, closure)
+        self.body = body
+        self.size = size
+        self.arity = len(declaration.parameters)
+        self.free_frames: list[SlotEnvironment] | None = [] if recyclable and self.pool_size else None
+
+    def call(self, arguments: list[Any]) -> Any:
+        completion = self.invoke(arguments)
+
+        if completion is None:
+            return None
+        if type(completion) is Return:
+            return completion.value
+        return complete(completion)
+
+    def invoke(self, arguments: list[Any]) -> Completion | None:
+        """Exécute le corps une fois ; la frame est rendue avant un éventuel appel terminal."""
+        interpreter = self.interpreter
+        if interpreter.interrupt_reason is not None:
+            interpreter.check_interrupt()
+
+        counting = interpreter.counting
+        if counting:
+            metrics = interpreter.metrics
+            metrics.calls += 1
+            depth = metrics.call_depth = metrics.call_depth + 1
+            if depth > metrics.peak_call_depth:
+                metrics.peak_call_depth = depth
+
+        free_frames = self.free_frames
+        if free_frames:
+            env = free_frames.pop()
+        else:
+            env = SlotEnvironment(self.closure, self.size)
+            if counting:
+                metrics.environments += 1
+
+        arity = self.arity
+        if len(arguments) == arity:
+            env.slots[:arity] = arguments
+        elif len(arguments) > arity:
+            env.slots[:arity] = arguments[:arity]
+        else:
+            env.slots[:arity] = arguments + [UNSET] * (arity - len(arguments))
+
+        if not counting:
+            completion = self.body(env)
+        else:
+            try:
+                completion = self.body(env)
+            finally:
+                metrics.call_depth -= 1
+
+        if free_frames is not None and len(free_frames) < self.pool_size:
+            free_frames.append(env)
+
+        return completion
+
+
+class InstrumentedCompiledFunction(InstrumentedFunction, CompiledFunction):
+    """Fonction compilée dont les appels passent par l'instrumentation de l'interpréteur."""
+
+
+class ClosureCompiler:
+    """Transforme chaque nœud de l'AST en closure Python, une seule fois.
+
+    Une instruction compilée prend l'environnement courant et retourne None,
+    ou une Completion (Return, TailCall) lorsqu'elle doit interrompre la
+    fonction en cours. Une
+    expression compilée prend l'environnement et retourne sa valeur. Les
+    variables locales sont lues directement à l'adresse calculée par le
+    Resolver, les globales par nom dans l'environnement de l'interpréteur.
+
+    Avec interpreter.counting, chaque instruction compte ses passages dans
+    un Site suivi par interpreter.metrics (voir toy.metrics) ; les lectures
+    de variables de ses expressions, toutes évaluées à chaque passage, sont
+    comptées avec elle. Seules les parties évaluées un nombre variable de
+    fois (condition d'une boucle, cas d'un match) ont leur propre site. Le
+    comptage enveloppe le code compilé (voir count_passes) : sans counting,
+    rien n'est enveloppé. Comme l'instrumentation, counting est relu à
+    chaque compilation.
+    """
+
+    def __init__(self, interpreter) -> None:
+        self.interpreter = interpreter
+        self.metrics = interpreter.metrics
+        self.resolution = Resolution()
+        # Site auquel sont attribuées les lectures compilées
+        self.site = Site()
+
+    def compile(self, statements: list[Statement]) -> list[StatementFn]:
+        """Résout puis compile un programme."""
+        self.resolution = Resolver().resolve(statements)
+        return [self.compile_statement(statement) for statement in statements]
+
+    ##########################################################################
+    # Statements
+    ##########################################################################
+
+    def compile_statement(self, stmt: Statement) -> StatementFn:
+        """Compile une instruction, enveloppée par le comptage et l'instrumentation de l'interpréteur s'il en a."""
+        if isinstance(stmt, BlockStatement) or not self.interpreter.counting:
+            run = self.compile_plain_statement(stmt)
+        else:
+            site = Site(statements=1)
+            run = self.count_passes(site, self.compile_in_site(site, self.compile_plain_statement, stmt))
+        instrumentation = self.interpreter.instrumentation
+        if instrumentation is not None:
+            run = instrumentation.instrument_statement(stmt, run)
+        return run
+
+    def compile_in_site(self, site: Site, compile: Callable, node: ASTNode) -> Callable:
+        """Compile node en attribuant ses lectures de variables à site."""
+        previous, self.site = self.site, site
+        try:
+            return compile(node)
+        finally:
+            self.site = previous
+
+    def compile_reads(self, expr: Expression) -> tuple[ExpressionFn, Site]:
+        """Compile une expression ; le site retourné, non compté, décrit ses lectures."""
+        reads = Site()
+        return self.compile_in_site(reads, self.compile_expression, expr), reads
+
+    def compile_counted(self, expr: Expression) -> ExpressionFn:
+        """Compile une expression évaluée un nombre variable de fois, avec son propre site."""
+        evaluate, reads = self.compile_reads(expr)
+        if not self.interpreter.counting:
+            return evaluate
+        return self.count_passes(reads, evaluate)
+
+    def count_passes(self, site: Site, run: Callable) -> Callable:
+        """Enveloppe run pour compter ses passages dans site, suivi tant que le code vit."""
+
+        def counted(env):
+            site.count += 1
+            return run(env)
+
+        self.metrics.track(counted, site)
+        return counted
+
+    def compile_plain_statement(self, stmt: Statement) -> StatementFn:
+        """Compile une instruction, sans instrumentation ni comptage."""
+        match stmt:
+            case ExpressionStatement(expression):
+                evaluate = self.compile_expression(expression)
+
+                def expression_statement(env):
+                    evaluate(env)
+
+                return expression_statement
+
+            case VarStatement(name, initializer):
+                evaluate = self.compile_assigned_value(name.lexeme, initializer or Literal(None))
+                return self.compile_define(stmt, name.lexeme, evaluate)
+
+            case FunctionDeclarationStatement() as st:
+                body = self.compile_body(st.body)
+                for param in st.parameters:
+                    message = self.resolution.error(param)
+                    if message is not None:
+                        # Paramètre en double : chaque appel échoue, comme dans le moteur par arbre
+                        def body(env, message=message):
+                            raise RuntimeError(message)
+                        break
+                size = self.resolution.scope_size(st)
+                recyclable = not self.resolution.frame_escapes(st)
+                interpreter = self.interpreter
+                function_type = CompiledFunction if interpreter.instrumentation is None else InstrumentedCompiledFunction
+
+                def create_function(env):
+                    return function_type(interpreter, st, env, body, size, recyclable)
+
+                return self.compile_define(st, st.name.lexeme, create_function)
+
+            case PrintStatement(expression):
+                evaluate = self.compile_expression(expression)
+
+                def print_statement(env):
+                    print(evaluate(env))
+
+                return print_statement
+
+            case IfStatement(condition, then_branch, else_branch):
+                test = self.compile_expression(condition)
+                then_run = self.compile_statement(then_branch)
+
+                if else_branch is None:
+                    def if_statement(env):
+                        if test(env):
+                            return then_run(env)
+                else:
+                    else_run = self.compile_statement(else_branch)
+
+                    def if_statement(env):
+                        if test(env):
+                            return then_run(env)
+                        return else_run(env)
+
+                return if_statement
+
+            case WhileStatement(condition, body):
+                # Chaque test compte ses lectures
+                test = self.compile_counted(condition)
+                run = self.compile_statement(body)
+                interpreter = self.interpreter
+
+                def while_statement(env):
+                    while test(env):
+                        if interpreter.interrupt_reason is not None:
+                            interpreter.check_interrupt()
+                        completion = run(env)
+                        if completion is not None:
+                            return completion
+
+                return while_statement
+
+            case ForStatement() as st:
+                return self.compile_for(st)
+
+            case BlockStatement(statements) if not stmt.needs_scope:
+                return self.compile_body(statements)
+
+            case BlockStatement(statements):
+                run = self.compile_body(statements)
+                size = self.resolution.scope_size(stmt)
+
+                def block_statement(env):
+                    return run(SlotEnvironment(env, size))
+
+                if self.interpreter.counting:
+                    return self.count_passes(Site(environments=1), block_statement)
+                return block_statement
+
+            case ReturnStatement(_, FunctionCall(callee, arguments)):
+                # Appel terminal : la frame courante est libérée avant l'appel
+                evaluate_callee = self.compile_expression(callee)
+                evaluate_arguments = [self.compile_expression(arg) for arg in arguments]
+
+                def tail_call(env):
+                    function = evaluate_callee(env)
+
+                    if not isinstance(function, ToyFunction):
+                        raise ValueError(f"Unknown function call: {callee}")
+
+                    return TailCall(function, [arg(env) for arg in evaluate_arguments])
+
+                return tail_call
+
+            case ReturnStatement(_, value):
+                if value is None:
+                    def return_statement(env):
+                        return Return(None)
+                else:
+                    evaluate = self.compile_expression(value)
+
+                    def return_statement(env):
+                        return Return(evaluate(env))
+
+                return return_statement
+
+            case _:
+                raise ValueError(f"Unknown statement: {stmt}")
+
+    def compile_for(self, stmt: ForStatement) -> StatementFn:
+        """Compile une boucle for ; sa portée est allouée une fois par exécution de la boucle.
+
+        Comme pour while, chaque test et chaque incrément compte ses lectures ;
+        la portée est comptée avec l'instruction.
+        """
+        self.site.environments += 1
+        size = self.resolution.scope_size(stmt)
+        initialize = self.compile_statement(stmt.initializer) if stmt.initializer is not None else None
+        run = self.compile_statement(stmt.body)
+        loop = CountedLoop.recognize(stmt)
+        interpreter = self.interpreter
+
+        if loop is not None:
+            # Le compteur est le slot déclaré par l'initialisation, dans la portée de la boucle
+            slot = self.resolution.slot(stmt.initializer)
+            compare, advance, step = loop.compare, loop.advance, loop.step
+
+            if isinstance(loop.limit, Literal):
+                limit = loop.limit.value
+
+                def counted_for(env):
+                    env = SlotEnvironment(env, size)
+                    slots = env.slots
+                    initialize(env)
+                    while compare(slots[slot], limit):
+                        if interpreter.interrupt_reason is not None:
+                            interpreter.check_interrupt()
+                        completion = run(env)
+                        if completion is not None:
+                            return completion
+                        slots[slot] = advance(slots[slot], step)
+            else:
+                evaluate_limit = self.compile_counted(loop.limit)
+
+                def counted_for(env):
+                    env = SlotEnvironment(env, size)
+                    slots = env.slots
+                    initialize(env)
+                    while compare(slots[slot], evaluate_limit(env)):
+                        if interpreter.interrupt_reason is not None:
+                            interpreter.check_interrupt()
+                        completion = run(env)
+                        if completion is not None:
+                            return completion
+                        slots[slot] = advance(slots[slot], step)
+
+            return counted_for
+
+        test = self.compile_counted(stmt.condition or Literal(True))
+        increment = None
+        if stmt.increment is not None:
+            increment = self.compile_counted(stmt.increment)
+
+        def for_statement(env):
+            env = SlotEnvironment(env, size)
+            if initialize is not None:
+                initialize(env)
+            while test(env):
+                if interpreter.interrupt_reason is not None:
+                    interpreter.check_interrupt()
+                completion = run(env)
+                if completion is not None:
+                    return completion
+                if increment is not None:
+                    increment(env)
+
+        return for_statement
+
+    def compile_body(self, statements: list[Statement]) -> StatementFn:
+        """Compile une suite d'instructions exécutées dans l'environnement reçu."""
+        runs = [self.compile_statement(statement) for statement in statements]
+
+        if len(runs) == 1:
+            return runs[0]
+
+        def body(env):
+            for run in runs:
+                completion = run(env)
+                if completion is not None:
+                    return completion
+
+        return body
+
+    ##########################################################################
+    # Expressions
+    ##########################################################################
+
+    def compile_expression(self, expr: Expression) -> ExpressionFn:
+        """Compile une expression."""
+        match expr:
+            case Literal(value):
+                def literal(env):
+                    return value
+
+                return literal
+
+            case Binary(left, operator, right):
+                function = BINARY_OPERATORS.get(operator.type)
+                if function is None:
+                    raise ValueError(f"Unknown operator: {operator}")
+                evaluate_left = self.compile_expression(left)
+
+                if isinstance(right, Literal):
+                    constant = right.value
+
+                    def binary(env):
+                        return function(evaluate_left(env), constant)
+                else:
+                    evaluate_right = self.compile_expression(right)
+
+                    def binary(env):
+                        return function(evaluate_left(env), evaluate_right(env))
+
+                return binary
+
+            case Unary(operator, right):
+                function = UNARY_OPERATORS.get(operator.type)
+                if function is None:
+                    raise ValueError(f"Unknown operator: {operator}")
+                evaluate = self.compile_expression(right)
+
+                def unary(env):
+                    return function(evaluate(env))
+
+                return unary
+
+            case Variable(name):
+                return self.compile_get(expr, name.lexeme)
+
+            case VariableAssignment(name, value):
+                return self.compile_set(expr, name.lexeme, self.compile_assigned_value(name.lexeme, value))
+
+            case FunctionCall(callee, arguments):
+                evaluate_callee = self.compile_expression(callee)
+                evaluate_arguments = [self.compile_expression(arg) for arg in arguments]
+
+                def function_call(env):
+                    function = evaluate_callee(env)
+
+                    if not isinstance(function, ToyFunction):
+                        raise ValueError(f"Unknown function call: {callee}")
+
+                    return function.call([arg(env) for arg in evaluate_arguments])
+
+                return function_call
+
+            case MatchExpression(subject, cases):
+                evaluate_subject = self.compile_expression(subject)
+
+                # Les motifs sont évalués jusqu'au cas choisi : chaque cas a son
+                # site, qui compte aussi les lectures des motifs qui le précèdent
+                compiled_cases = []
+                tested = Site()
+                for case in cases:
+                    pattern, reads = self.compile_reads(case.pattern)
+                    tested.add(reads)
+                    body, reads = self.compile_reads(case.body)
+                    chosen = Site()
+                    chosen.add(tested)
+                    chosen.add(reads)
+                    compiled_cases.append((pattern, body, chosen))
+
+                if not self.interpreter.counting or not any(chosen.lookups for _, _, chosen in compiled_cases):
+                    compiled_cases = [(pattern, body) for pattern, body, _ in compiled_cases]
+
+                    def match_expression(env):
+                        subject_value = evaluate_subject(env)
+
+                        for pattern, body in compiled_cases:
+                            if subject_value == pattern(env):
+                                return body(env)
+
+                        raise RuntimeError(f"No match for value: {subject_value}")
+                else:
+                    def match_expression(env):
+                        subject_value = evaluate_subject(env)
+
+                        for pattern, body, chosen in compiled_cases:
+                            if subject_value == pattern(env):
+                                chosen.count += 1
+                                return body(env)
+
+                        raise RuntimeError(f"No match for value: {subject_value}")
+
+                    for _, _, chosen in compiled_cases:
+                        self.metrics.track(match_expression, chosen)
+
+                return match_expression
+
+            case _:
+                raise ValueError(f"Unknown expression: {expr}")
+
+    ##########################################################################
+    # Variables
+    ##########################################################################
+
+    def compile_assigned_value(self, name: str, value: Expression) -> ExpressionFn:
+        """Compile la valeur d'une définition ou affectation, vue par l'instrumentation s'il y en a une."""
+        evaluate = self.compile_expression(value)
+        instrumentation = self.interpreter.instrumentation
+        if instrumentation is not None:
+            evaluate = instrumentation.instrument_assignment(name, evaluate)
+        return evaluate
+
+    def compile_define(self, stmt: Statement, name: str, evaluate: ExpressionFn) -> StatementFn:
+        """Compile la définition d'une variable locale (par slot) ou globale."""
+        slot = self.resolution.slot(stmt)
+        message = self.resolution.error(stmt)
+
+        if message is not None:
+            def define_duplicate(env):
+                evaluate(env)
+                raise RuntimeError(message)
+
+            return define_duplicate
+
+        if slot is None:
+            global_env = self.interpreter.environment
+
+            def define_global(env):
+                global_env.define(name, evaluate(env))
+
+            return define_global
+
+        def define_local(env):
+            env.slots[slot] = evaluate(env)
+
+        return define_local
+
+    def compile_get(self, expr: Variable, name: str) -> ExpressionFn:
+        """Compile la lecture d'une variable à partir de son adresse.
+
+        La lecture est comptée dans le site courant, avec sa profondeur ; les
+        globales sont lues directement et comptent pour une profondeur de 0.
+        """
+        address = self.resolution.address(expr)
+        self.site.lookups += 1
+
+        if address is None:
+            values = self.interpreter.environment.values
+
+            def get_global(env):
+                try:
+                    return values[name]
+                except KeyError:
+                    raise RuntimeError(f"Variable '{name}' is not defined.") from None
+
+            return get_global
+
+        depth, slot, checked = address
+        self.site.lookup_depth += depth
+
+        if checked:
+            fallback = self.compile_fallback_get(expr, name)
+
+            def get_checked(env):
+                value = env.ancestor(depth).slots[slot]
+                if value is UNSET:
+                    return fallback(env)
+                return value
+
+            if depth == 0:
+                def get_checked(env):
+                    value = env.slots[slot]
+                    if value is UNSET:
+                        return fallback(env)
+                    return value
+
+            return get_checked
+
+        if depth == 0:
+            def get_local(env):
+                return env.slots[slot]
+        elif depth == 1:
+            def get_local(env):
+                return env.enclosing.slots[slot]
+        elif depth == 2:
+            def get_local(env):
+                return env.enclosing.enclosing.slots[slot]
+        elif depth == 3:
+            def get_local(env):
+                return env.enclosing.enclosing.enclosing.slots[slot]
+        else:
+            hops = range(depth)
+
+            def get_local(env):
+                for _ in hops:
+                    env = env.enclosing
+                return env.slots[slot]
+
+        return get_local
+
+    def compile_set(self, expr: VariableAssignment, name: str, evaluate: ExpressionFn) -> ExpressionFn:
+        """Compile l'assignation d'une variable à partir de son adresse."""
+        address = self.resolution.address(expr)
+
+        if address is None:
+            values = self.interpreter.environment.values
+
+            def set_global(env):
+                value = evaluate(env)
+                if name not in values:
+                    raise RuntimeError(f"Undefined variable '{name}'.")
+                values[name] = value
+                return value
+
+            return set_global
+
+        depth, slot, checked = address
+
+        if checked and self.resolution.fallback(expr) is not None:
+            fallback = self.compile_fallback_set(expr, name)
+
+            def set_checked(env):
+                value = evaluate(env)
+                target = env.ancestor(depth)
+                if target.slots[slot] is UNSET:
+                    return fallback(env, value)
+                target.slots[slot] = value
+                return value
+
+            return set_checked
+
+        if depth == 0:
+            def set_local(env):
+                value = env.slots[slot] = evaluate(env)
+                return value
+        elif depth == 1:
+            def set_local(env):
+                value = env.enclosing.slots[slot] = evaluate(env)
+                return value
+        elif depth == 2:
+            def set_local(env):
+                value = env.enclosing.enclosing.slots[slot] = evaluate(env)
+                return value
+        else:
+            hops = range(depth)
+
+            def set_local(env):
+                value = evaluate(env)
+                for _ in hops:
+                    env = env.enclosing
+                env.slots[slot] = value
+                return value
+
+        return set_local
+
+    def compile_fallback_get(self, expr: Variable, name: str) -> ExpressionFn:
+        """Compile la lecture d'une variable capturée dont l'adresse est encore vide.
+
+        Comme dans le moteur arborescent, une variable non encore déclarée laisse
+        voir la liaison englobante, puis la globale ; un paramètre sans argument
+        n'est pas défini.
+        """
+        chain = self.resolution.fallback(expr)
+        values = self.interpreter.environment.values
+
+        def fallback(env):
+            if chain is not None:
+                for depth, slot, param in chain:
+                    value = env.ancestor(depth).slots[slot]
+                    if value is not UNSET:
+                        return value
+                    if param:
+                        break
+                else:
+                    if name in values:
+                        return values[name]
+            raise RuntimeError(f"Variable '{name}' is not defined.")
+
+        return fallback
+
+    def compile_fallback_set(self, expr: VariableAssignment, name: str) -> Callable[[SlotEnvironment, Any], Any]:
+        """Compile l'assignation d'une variable capturée dont l'adresse est encore vide."""
+        chain = self.resolution.fallback(expr)
+        values = self.interpreter.environment.values
+
+        def fallback(env, value):
+            for depth, slot, param in chain:
+                target = env.ancestor(depth)
+                if param or target.slots[slot] is not UNSET:
+                    target.slots[slot] = value
+                    return value
+            if name not in values:
+                raise RuntimeError(f"Undefined variable '{name}'.")
+            values[name] = value
+            return value
+
+        return fallback
@@ -0,0 +1,571 @@
+from typing import Any
+
+from toy.ast_nodes import *
+from toy.bytecode import Chunk, FunctionProto, OpCode
+from toy.tokens import Token, TokenType
+
+
+BINARY_OPCODES = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+}
+
+# Variante qui lit l'opérande droit directement dans la table des constantes
+CONSTANT_OPERAND_OPCODES = {
+    OpCode.ADD: OpCode.ADD_CONST,
+    OpCode.SUBTRACT: OpCode.SUBTRACT_CONST,
+    OpCode.MULTIPLY: OpCode.MULTIPLY_CONST,
+    OpCode.DIVIDE: OpCode.DIVIDE_CONST,
+    OpCode.EQUAL: OpCode.EQUAL_CONST,
+    OpCode.NOT_EQUAL: OpCode.NOT_EQUAL_CONST,
+    OpCode.GREATER: OpCode.GREATER_CONST,
+    OpCode.GREATER_EQUAL: OpCode.GREATER_EQUAL_CONST,
+    OpCode.LESS: OpCode.LESS_CONST,
+    OpCode.LESS_EQUAL: OpCode.LESS_EQUAL_CONST,
+}
+
+UNARY_OPCODES = {
+    TokenType.MINUS: OpCode.NEGATE,
+    TokenType.BANG: OpCode.NOT,
+}
+
+
+class Local:
+    """Variable locale allouée dans un slot de la frame courante."""
+
+    def __init__(self, name: str, slot: int, is_param: bool = False) -> None:
+        self.name = name
+        self.slot = slot
+        self.is_param = is_param
+        self.captured = False
+        # Réservée avant sa déclaration : une closure peut la lire encore vide
+        self.forward = False
+        self.sites: list[tuple[int, OpCode]] = []
+
+
+class Scope:
+    """Portée locale en cours de compilation."""
+
+    def __init__(self) -> None:
+        self.locals: dict[str, Local] = {}
+        # Variables déclarées plus loin mais lues par une fonction locale déclarée avant elles
+        self.reserved: dict[str, Local] = {}
+        # Fonctions déclarées dans la portée, dont le corps est compilé à sa fermeture
+        self.pending: list[tuple[FunctionDeclarationStatement, FunctionProto]] = []
+
+
+class FunctionState:
+    """État de compilation d'une fonction (ou du script principal)."""
+
+    def __init__(self, proto: FunctionProto, enclosing: "FunctionState | None") -> None:
+        self.proto = proto
+        self.chunk: Chunk = proto.chunk
+        self.enclosing = enclosing
+        self.scopes: list[Scope] = []
+        self.next_slot = 0
+        self.upvalues: dict[tuple[bool, int], int] = {}
+
+    def find_local(self, name: str) -> Local | None:
+        """Cherche une variable locale visible, de la portée la plus interne vers l'extérieur."""
+        for scope in reversed(self.scopes):
+            local = scope.locals.get(name)
+            if local is not None:
+                return local
+        return None
+
+    def add_upvalue(self, is_local: bool, index: int) -> int:
+        """Enregistre une variable capturée et retourne son index dans la closure."""
+        key = (is_local, index)
+        if key not in self.upvalues:
+            self.upvalues[key] = len(self.proto.captures)
+            self.proto.captures.append(key)
+        return self.upvalues[key]
+
+
+class Compiler:
+    """Compile l'AST en bytecode pour la machine virtuelle.
+
+    Les variables globales sont résolues par nom à l'exécution, les variables
+    locales par slot, et les variables capturées par une fonction imbriquée sont
+    stockées dans des cellules partagées.
+    """
+
+    def __init__(self) -> None:
+        self.state: FunctionState | None = None
+
+    def compile(self, statements: list[Statement]) -> FunctionProto:
+        """Compile un programme complet et retourne la fonction principale."""
+        proto = FunctionProto("<script>", 0)
+        self.state = FunctionState(proto, None)
+
+        for statement in statements:
+            self.compile_statement(statement)
+
+        self.emit(OpCode.CONSTANT, self.constant(None))
+        self.emit(OpCode.RETURN)
+        self.state = None
+        return proto
+
+    ##########################################################################
+    # Statements
+    ##########################################################################
+
+    def compile_statement(self, stmt: Statement) -> None:
+        """Compile une instruction."""
+        match stmt:
+            case ExpressionStatement(
+                VariableAssignment(name, Binary(Variable(read), Token(type=TokenType.PLUS), Literal(step)))
+            ) if read.lexeme == name.lexeme and self.increment_local(name.lexeme, step):
+                pass
+
+            case ExpressionStatement(VariableAssignment(name, value)):
+                # Assignation en tant qu'instruction : la valeur n'a pas à rester sur la pile
+                self.compile_expression(value)
+                self.compile_set(name.lexeme, keep=False)
+
+            case ExpressionStatement(expression):
+                self.compile_expression(expression)
+                self.emit(OpCode.POP)
+
+            case VarStatement(name, initializer):
+                if initializer is not None:
+                    self.compile_expression(initializer)
+                else:
+                    self.emit(OpCode.CONSTANT, self.constant(None))
+                self.define_variable(name.lexeme)
+
+            case FunctionDeclarationStatement(name) as st:
+                self.compile_function_declaration(st)
+
+            case PrintStatement(expression):
+                self.compile_expression(expression)
+                self.emit(OpCode.PRINT)
+
+            case IfStatement(condition, then_branch, else_branch):
+                else_jump = self.compile_condition(condition)
+                self.compile_statement(then_branch)
+
+                if else_branch is not None:
+                    end_jump = self.emit_jump(OpCode.JUMP)
+                    self.patch_jump(else_jump)
+                    self.compile_statement(else_branch)
+                    self.patch_jump(end_jump)
+                else:
+                    self.patch_jump(else_jump)
+
+            case WhileStatement(condition, body):
+                loop_start = len(self.state.chunk.code)
+                exit_jump = self.compile_condition(condition)
+                self.compile_statement(body)
+                self.emit(OpCode.JUMP, loop_start)
+                self.patch_jump(exit_jump)
+
+            case ForStatement(initializer, condition, increment, body):
+                # Une seule portée pour toute la boucle, sans bloc par itération
+                self.begin_scope()
+                if initializer is not None:
+                    self.compile_statement(initializer)
+
+                loop_start = len(self.state.chunk.code)
+                exit_jump = None
+                if condition is not None:
+                    exit_jump = self.compile_condition(condition)
+
+                self.compile_statement(body)
+                if increment is not None:
+                    self.compile_statement(ExpressionStatement(increment))
+                self.emit(OpCode.JUMP, loop_start)
+
+                if exit_jump is not None:
+                    self.patch_jump(exit_jump)
+                self.end_scope()
+
+            case BlockStatement(statements):
+                self.begin_scope()
+                self.reserve_forward_locals(statements)
+                for statement in statements:
+                    self.compile_statement(statement)
+                self.end_scope()
+
+            case ReturnStatement(_, value):
+                if value is not None:
+                    self.compile_expression(value)
+                else:
+                    self.emit(OpCode.CONSTANT, self.constant(None))
+                self.emit(OpCode.RETURN)
+
+            case _:
+                raise ValueError(f"Unknown statement: {stmt}")
+
+    def compile_function_declaration(self, stmt: FunctionDeclarationStatement) -> None:
+        """Compile une déclaration de fonction et la lie à son nom.
+
+        Le corps d'une fonction locale n'est compilé qu'à la fermeture de la
+        portée qui la déclare, comme dans le Resolver : il voit les variables
+        locales déclarées après elle.
+        """
+        name = stmt.name.lexeme
+        proto = FunctionProto(name, len(stmt.parameters))
+
+        if not self.state.scopes:
+            self.compile_function_body(stmt, proto)
+            self.emit(OpCode.CLOSURE, self.constant(proto))
+            self.emit(OpCode.DEFINE_GLOBAL, self.constant(name))
+            return
+
+        scope = self.state.scopes[-1]
+        if name in scope.locals:
+            self.error(f"Variable '{name}' already defined.")
+            return
+
+        local = scope.reserved.pop(name, None)
+        if local is not None:
+            scope.locals[name] = local
+        else:
+            # Déclarée avant le corps pour que la fonction puisse s'appeler elle-même
+            local = self.declare_local(name)
+            self.emit_local(OpCode.DECLARE_LOCAL, local, OpCode.DECLARE_CELL)
+
+        scope.pending.append((stmt, proto))
+        self.emit(OpCode.CLOSURE, self.constant(proto))
+        self.emit_local(OpCode.DEFINE_LOCAL, local, OpCode.INIT_CELL)
+
+    def compile_function_body(self, stmt: FunctionDeclarationStatement, proto: FunctionProto) -> None:
+        """Compile le corps d'une fonction dans le chunk de son prototype."""
+        enclosing = self.state
+        self.state = FunctionState(proto, enclosing)
+        self.begin_scope()
+
+        for param in stmt.parameters:
+            if param.lexeme in self.state.scopes[-1].locals:
+                self.error(f"Variable '{param.lexeme}' already defined.")
+                continue
+            self.declare_local(param.lexeme, is_param=True)
+
+        self.reserve_forward_locals(stmt.body)
+        for statement in stmt.body:
+            self.compile_statement(statement)
+        self.emit(OpCode.CONSTANT, self.constant(None))
+        self.emit(OpCode.RETURN)
+
+        self.end_scope()
+        self.state = enclosing
+
+    ##########################################################################
+    # Expressions
+    ##########################################################################
+
+    def compile_expression(self, expr: Expression) -> None:
+        """Compile une expression qui laisse sa valeur sur la pile."""
+        match expr:
+            case Literal(value):
+                self.emit(OpCode.CONSTANT, self.constant(value))
+
+            case Binary(left, operator, right):
+                opcode = BINARY_OPCODES.get(operator.type)
+                if opcode is None:
+                    raise ValueError(f"Unknown operator: {operator}")
+
+                self.compile_expression(left)
+                if isinstance(right, Literal):
+                    self.emit(CONSTANT_OPERAND_OPCODES[opcode], self.constant(right.value))
+                else:
+                    self.compile_expression(right)
+                    self.emit(opcode)
+
+            case Unary(operator, right):
+                self.compile_expression(right)
+                opcode = UNARY_OPCODES.get(operator.type)
+                if opcode is None:
+                    raise ValueError(f"Unknown operator: {operator}")
+                self.emit(opcode)
+
+            case Variable(name):
+                self.compile_get(name.lexeme)
+
+            case VariableAssignment(name, value):
+                self.compile_expression(value)
+                self.compile_set(name.lexeme)
+
+            case FunctionCall(callee, arguments):
+                message = self.constant(f"Unknown function call: {callee}")
+                if isinstance(callee, Variable) and self.is_global(callee.name.lexeme):
+                    self.emit(OpCode.GET_GLOBAL_FUNCTION, self.constant(callee.name.lexeme), message)
+                else:
+                    self.compile_expression(callee)
+                    self.emit(OpCode.CHECK_CALLABLE, message)
+                for argument in arguments:
+                    self.compile_expression(argument)
+                self.emit(OpCode.CALL, len(arguments))
+
+            case MatchExpression(subject, cases):
+                self.compile_expression(subject)
+                end_jumps = []
+
+                for match_case in cases:
+                    if isinstance(match_case.pattern, Literal):
+                        next_case = self.emit(OpCode.MATCH_CONST, -1, self.constant(match_case.pattern.value))
+                    else:
+                        self.emit(OpCode.DUP)
+                        self.compile_expression(match_case.pattern)
+                        self.emit(OpCode.EQUAL)
+                        next_case = self.emit_jump(OpCode.JUMP_IF_FALSE)
+                        self.emit(OpCode.POP)
+                    self.compile_expression(match_case.body)
+                    end_jumps.append(self.emit_jump(OpCode.JUMP))
+                    self.patch_jump(next_case)
+
+                self.emit(OpCode.NO_MATCH)
+                for jump in end_jumps:
+                    self.patch_jump(jump)
+
+            case _:
+                raise ValueError(f"Unknown expression: {expr}")
+
+    def compile_condition(self, condition: Expression) -> int:
+        """Émet un test suivi d'un saut pris s'il est faux ; retourne la position du saut.
+
+        Une comparaison `< constante` est faite par le saut lui-même.
+        """
+        match condition:
+            case Binary(left, Token(type=TokenType.LESS), Literal(value)):
+                self.compile_expression(left)
+                return self.emit(OpCode.JUMP_IF_NOT_LESS_CONST, -1, self.constant(value))
+            case _:
+                self.compile_expression(condition)
+                return self.emit_jump(OpCode.JUMP_IF_FALSE)
+
+    ##########################################################################
+    # Variables
+    ##########################################################################
+
+    def compile_get(self, name: str) -> None:
+        """Émet la lecture d'une variable."""
+        local = self.state.find_local(name)
+        if local is not None:
+            op = OpCode.GET_PARAM if local.is_param else OpCode.GET_LOCAL
+            self.emit_local(op, local, OpCode.GET_CELL)
+            return
+
+        upvalue = self.resolve_upvalue(self.state, name)
+        if upvalue is not None:
+            position = self.emit(OpCode.GET_UPVALUE, upvalue)
+            self.add_fallbacks(position, name)
+        else:
+            position = self.emit(OpCode.GET_GLOBAL, self.constant(name))
+        self.state.chunk.names[position] = name
+
+    def is_global(self, name: str) -> bool:
+        """Indique si name désigne une variable globale, ni locale ni capturée."""
+        state = self.state
+        while state is not None:
+            if state.find_local(name) is not None:
+                return False
+            state = state.enclosing
+        return True
+
+    def compile_set(self, name: str, keep: bool = True) -> None:
+        """Émet l'assignation d'une variable (la valeur reste sur la pile si keep)."""
+        local = self.state.find_local(name)
+        if local is not None:
+            if keep:
+                self.emit_local(OpCode.SET_LOCAL, local, OpCode.SET_CELL)
+            else:
+                self.emit_local(OpCode.STORE_LOCAL, local, OpCode.STORE_CELL)
+            return
+
+        upvalue = self.resolve_upvalue(self.state, name)
+        if upvalue is not None:
+            position = self.emit(OpCode.SET_UPVALUE if keep else OpCode.STORE_UPVALUE, upvalue)
+            self.add_fallbacks(position, name)
+            self.state.chunk.names[position] = name
+        else:
+            self.emit(OpCode.SET_GLOBAL if keep else OpCode.STORE_GLOBAL, self.constant(name))
+
+    def increment_local(self, name: str, step: Any) -> bool:
+        """Émet `name = name + step` en une instruction si name est une variable locale.
+
+        Retourne False, sans rien émettre, pour un paramètre (dont la lecture
+        est vérifiée) ou une variable non locale.
+        """
+        local = self.state.find_local(name)
+        if local is None or local.is_param:
+            return False
+        self.emit_local(OpCode.ADD_LOCAL_CONST, local, OpCode.ADD_CELL_CONST, self.constant(step))
+        return True
+
+    def define_variable(self, name: str) -> None:
+        """Lie la valeur au sommet de la pile à une nouvelle variable."""
+        if not self.state.scopes:
+            self.emit(OpCode.DEFINE_GLOBAL, self.constant(name))
+            return
+
+        scope = self.state.scopes[-1]
+        if name in scope.locals:
+            self.error(f"Variable '{name}' already defined.")
+            return
+
+        local = scope.reserved.pop(name, None)
+        if local is not None:
+            # Sa cellule éventuelle existe depuis l'entrée dans la portée
+            scope.locals[name] = local
+            self.emit_local(OpCode.DEFINE_LOCAL, local, OpCode.INIT_CELL)
+            return
+
+        local = self.declare_local(name)
+        self.emit_local(OpCode.DEFINE_LOCAL, local, OpCode.DEFINE_CELL)
+
+    def declare_local(self, name: str, is_param: bool = False) -> Local:
+        """Alloue un slot pour une variable locale dans la portée courante."""
+        local = self.allocate_local(name, is_param)
+        self.state.scopes[-1].locals[name] = local
+        return local
+
+    def allocate_local(self, name: str, is_param: bool = False) -> Local:
+        """Alloue un slot dans la frame courante, sans rendre la variable visible."""
+        state = self.state
+        local = Local(name, state.next_slot, is_param)
+        state.next_slot += 1
+        state.proto.slot_count = max(state.proto.slot_count, state.next_slot)
+        return local
+
+    def reserve_forward_locals(self, statements: list[Statement]) -> None:
+        """Réserve à l'entrée de la portée les variables lues par une fonction locale déclarée avant elles.
+
+        Le corps de la fonction, compilé à la fermeture de la portée, peut les
+        capturer : leur slot ne doit pas être repris par une portée imbriquée
+        et leur cellule doit exister quand la closure est construite. Elles ne
+        sont visibles du code de la portée qu'à partir de leur déclaration.
+        """
+        scope = self.state.scopes[-1]
+        declared = set(scope.locals)
+        referenced: set[str] = set()
+
+        for statement in statements:
+            if not isinstance(statement, (VarStatement, FunctionDeclarationStatement)):
+                continue
+            name = statement.name.lexeme
+            if name in referenced and name not in declared:
+                local = self.allocate_local(name)
+                local.forward = True
+                scope.reserved[name] = local
+                self.emit_local(OpCode.DECLARE_LOCAL, local, OpCode.DECLARE_CELL)
+            declared.add(name)
+
+            if isinstance(statement, FunctionDeclarationStatement):
+                referenced.update(
+                    node.name.lexeme
+                    for node in iter_nodes(statement)
+                    if isinstance(node, (Variable, VariableAssignment))
+                )
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> int | None:
+        """Résout une variable d'une fonction englobante comme variable capturée."""
+        if state.enclosing is None:
+            return None
+
+        local = state.enclosing.find_local(name)
+        if local is not None:
+            local.captured = True
+            return state.add_upvalue(True, local.slot)
+
+        index = self.resolve_upvalue(state.enclosing, name)
+        if index is not None:
+            return state.add_upvalue(False, index)
+        return None
+
+    def add_fallbacks(self, position: int, name: str) -> None:
+        """Associe à un accès capturé les liaisons englobantes visibles tant que la variable n'est pas déclarée.
+
+        Comme dans le moteur arborescent, une variable réservée mais pas encore
+        déclarée laisse voir la liaison englobante, puis la globale. La suite
+        s'arrête à la première liaison qui ne peut pas être dans cet état.
+        """
+        fallbacks: list[tuple[int, bool]] | None = None
+        state = self.state.enclosing
+        while state is not None:
+            for scope in reversed(state.scopes):
+                local = scope.locals.get(name)
+                if local is None:
+                    continue
+                if fallbacks is None:
+                    if not local.forward:
+                        return
+                    fallbacks = []
+                    continue
+                fallbacks.append((self.capture(self.state, state, local), local.is_param))
+                if not local.forward:
+                    break
+            else:
+                state = state.enclosing
+                continue
+            break
+
+        self.state.chunk.fallbacks[position] = tuple(fallbacks)
+
+    def capture(self, state: FunctionState, owner: FunctionState, local: Local) -> int:
+        """Capture une variable locale de la fonction englobante owner et retourne son index."""
+        if state.enclosing is owner:
+            local.captured = True
+            return state.add_upvalue(True, local.slot)
+        return state.add_upvalue(False, self.capture(state.enclosing, owner, local))
+
+    def begin_scope(self) -> None:
+        """Ouvre une nouvelle portée locale."""
+        self.state.scopes.append(Scope())
+
+    def end_scope(self) -> None:
+        """Ferme la portée courante et convertit en cellules les variables capturées."""
+        state = self.state
+        scope = state.scopes[-1]
+        for stmt, proto in scope.pending:
+            self.compile_function_body(stmt, proto)
+
+        state.scopes.pop()
+        state.next_slot -= len(scope.locals)
+
+        for local in scope.locals.values():
+            if not local.captured:
+                continue
+            if local.is_param:
+                state.proto.cell_params.append(local.slot)
+            for position, cell_op in local.sites:
+                state.chunk.code[position] = cell_op
+
+    ##########################################################################
+    # Utils
+    ##########################################################################
+
+    def emit(self, op: OpCode, *operands: int) -> int:
+        """Ajoute une instruction au chunk courant."""
+        return self.state.chunk.emit(op, *operands)
+
+    def emit_local(self, op: OpCode, local: Local, cell_op: OpCode, *operands: int) -> None:
+        """Émet un accès à une variable locale, corrigé plus tard si elle est capturée."""
+        position = self.emit(op, local.slot, *operands)
+        local.sites.append((position, cell_op))
+        self.state.chunk.names[position] = local.name
+
+    def emit_jump(self, op: OpCode) -> int:
+        """Émet un saut dont la cible sera fixée par patch_jump."""
+        return self.emit(op, -1)
+
+    def patch_jump(self, position: int) -> None:
+        """Fait pointer le saut vers la position courante."""
+        self.state.chunk.code[position + 1] = len(self.state.chunk.code)
+
+    def constant(self, value) -> int:
+        """Ajoute une constante au chunk courant."""
+        return self.state.chunk.add_constant(value)
+
+    def error(self, message: str) -> None:
+        """Émet une erreur levée à l'exécution, au même moment que l'interpréteur."""
+        self.emit(OpCode.ERROR, self.constant(message))
@@ -1,6 +1,16 @@
 from typing import Any
 
 
+class Unset:
+    """Valeur d'un slot dont la variable n'a pas encore été définie."""
+
+    def __repr__(self) -> str:
+        return "<unset>"
+
+
+UNSET = Unset()
+
+
 class Environment:
     """Gère la portée des variables et stocke leurs valeurs."""
 
@@ -17,13 +27,32 @@ class Environment:
         self.values[name] = value
 
     def get(self, name: str) -> Any:
-        """Récupère la valeur d'une variable."""
-        if name in self.values:
-            return self.values[name]
-        elif self.enclosing:
-            return self.enclosing.get(name)
+        """Récupère la valeur d'une variable ; comme pour lookup, UNSET n'est pas définie."""
+        env = self
+        while name not in env.values:
+            env = env.enclosing
+            if env is None:
+                raise RuntimeError(f"Variable '{name}' is not defined.")
+        value = env.values[name]
+        if value is UNSET:
+            raise RuntimeError(f"Variable '{name}' is not defined.")
+        return value
+
+    def lookup(self, name: str) -> tuple[Any, int]:
+        """Récupère la valeur d'une variable et le nombre d'environnements remontés pour la trouver.
 
-        raise RuntimeError(f"Variable '{name}' is not defined.")
+        Une variable qui vaut UNSET (paramètre sans argument) n'est pas définie.
+        """
+        env, depth = self, 0
+        while name not in env.values:
+            env = env.enclosing
+            if env is None:
+                raise RuntimeError(f"Variable '{name}' is not defined.")
+            depth += 1
+        value = env.values[name]
+        if value is UNSET:
+            raise RuntimeError(f"Variable '{name}' is not defined.")
+        return value, depth
 
     def assign(self, name: str, value: Any) -> Any:
         """Met à jour la valeur d'une variable existante."""
@@ -34,3 +63,32 @@ class Environment:
             return self.enclosing.assign(name, value)
 
         raise RuntimeError(f"Undefined variable '{name}'.")
+
+
+class SlotEnvironment:
+    """Portée locale dont les variables sont rangées dans une liste de slots.
+
+    Les adresses (profondeur, slot) sont calculées à l'avance par le Resolver :
+    aucune recherche par nom n'a lieu à l'exécution.
+    """
+    __slots__ = ("enclosing", "slots")
+
+    def __init__(self, enclosing: "SlotEnvironment | Environment", size: int):
+        self.enclosing = enclosing
+        self.slots: list[Any] = [UNSET] * size
+
+    def ancestor(self, depth: int) -> "SlotEnvironment | Environment":
+        """Retourne l'environnement situé depth niveaux plus haut."""
+        env = self
+        for _ in range(depth):
+            env = env.enclosing
+        return env
+
+    def get_at(self, depth: int, slot: int) -> Any:
+        """Récupère la valeur stockée à l'adresse (depth, slot)."""
+        return self.ancestor(depth).slots[slot]
+
+    def assign_at(self, depth: int, slot: int, value: Any) -> Any:
+        """Met à jour la valeur stockée à l'adresse (depth, slot)."""
+        self.ancestor(depth).slots[slot] = value
+        return value
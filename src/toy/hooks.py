@@ -0,0 +1,152 @@
+from typing import Any, Callable
+
+from toy.ast_nodes import BlockStatement, FunctionDeclarationStatement, Statement, VariableAssignment, VarStatement
+from toy.interpreter import Completion, Return, ToyFunction, complete
+
+
+# Événements de Hooks et arguments reçus par leurs fonctions :
+#   statement  (instruction, environnement)  avant chaque instruction, hors blocs
+#   call       (déclaration, arguments)       à l'entrée d'une fonction
+#   return     (déclaration, valeur)          à la sortie d'une fonction
+#   assign     (nom, valeur)                  quand une variable est définie ou réaffectée
+EVENTS = ("statement", "call", "return", "assign")
+
+
+class Instrumentation:
+    """Points où un outil (profileur, traceur, débogueur) s'insère dans l'exécution.
+
+    L'interpréteur n'appelle ces méthodes qu'à sa construction (parcours
+    d'AST) ou à la compilation (closures), et exécute ce qu'elles retournent
+    à la place du code d'origine. Sans instrumentation, rien n'est enveloppé
+    et l'exécution ne fait aucun test supplémentaire. Par défaut, chaque
+    méthode retourne le code d'origine inchangé.
+    """
+
+    def instrument_statement(self, stmt: Statement, run: Callable[[Any], Completion | None]) -> Callable[[Any], Completion | None]:
+        """Closures : enveloppe une instruction compilée, appelée avec l'environnement."""
+        return run
+
+    def instrument_assignment(self, name: str, evaluate: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Closures : enveloppe le calcul de la valeur définie ou affectée à name."""
+        return evaluate
+
+    def instrument_execute(self, interpreter, execute: Callable[[Statement], Completion | None]) -> Callable[[Statement], Completion | None]:
+        """Parcours d'AST : enveloppe Interpreter.execute."""
+        return execute
+
+    def instrument_evaluate(self, interpreter, evaluate: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Parcours d'AST : enveloppe Interpreter.evaluate."""
+        return evaluate
+
+    def instrument_function(self, declaration: FunctionDeclarationStatement, body: Callable[[Any], Completion | None]) -> Callable[[Any], Completion | None]:
+        """Les deux moteurs : enveloppe l'exécution d'un appel, qui reçoit la liste des arguments."""
+        return body
+
+
+class InstrumentedFunction(ToyFunction):
+    """Fonction dont les appels passent par l'instrumentation de l'interpréteur."""
+
+    def __init__(self, interpreter, declaration: FunctionDeclarationStatement, closure, *args) -> None:
+        # *args : paramètres supplémentaires d'une sous-classe (voir closures.InstrumentedCompiledFunction)
+        super().__init__(interpreter, declaration, closure, *args)
+        self.instrumented_invoke = interpreter.instrumentation.instrument_function(declaration, super().invoke)
+
+    def invoke(self, arguments: list[Any]) -> Completion | None:
+        return self.instrumented_invoke(arguments)
+
+
+class Hooks(Instrumentation):
+    """Registre de fonctions appelées sur les événements d'exécution (voir EVENTS).
+
+    Le registre est branché à la construction de l'interpréteur ; les
+    fonctions peuvent être ajoutées ou retirées à tout moment ensuite. Un
+    interpréteur construit sans registre n'a aucun point d'appel.
+    """
+
+    def __init__(self) -> None:
+        self.callbacks: dict[str, list[Callable]] = {event: [] for event in EVENTS}
+
+    def add(self, event: str, callback: Callable) -> Callable:
+        """Appelle callback à chaque événement ; retourne callback (utilisable en décorateur)."""
+        if event not in self.callbacks:
+            raise ValueError(f"Unknown hook event: {event}")
+        self.callbacks[event].append(callback)
+        return callback
+
+    def remove(self, event: str, callback: Callable) -> None:
+        """Retire une fonction ajoutée par add."""
+        self.callbacks[event].remove(callback)
+
+    def instrument_statement(self, stmt, run):
+        if isinstance(stmt, BlockStatement):
+            return run
+
+        callbacks = self.callbacks["statement"]
+
+        def hooked_statement(env):
+            for callback in callbacks:
+                callback(stmt, env)
+            return run(env)
+
+        return hooked_statement
+
+    def instrument_assignment(self, name, evaluate):
+        callbacks = self.callbacks["assign"]
+
+        def hooked_assignment(env):
+            value = evaluate(env)
+            for callback in callbacks:
+                callback(name, value)
+            return value
+
+        return hooked_assignment
+
+    def instrument_execute(self, interpreter, execute):
+        statement_callbacks, assign_callbacks = self.callbacks["statement"], self.callbacks["assign"]
+
+        def hooked_execute(stmt):
+            if isinstance(stmt, BlockStatement):
+                return execute(stmt)
+
+            for callback in statement_callbacks:
+                callback(stmt, interpreter.environment)
+            if isinstance(stmt, VarStatement) and assign_callbacks:
+                # La valeur n'est connue qu'une fois l'initialisation évaluée
+                completion = execute(stmt)
+                value = interpreter.environment.values[stmt.name.lexeme]
+                for callback in assign_callbacks:
+                    callback(stmt.name.lexeme, value)
+                return completion
+            return execute(stmt)
+
+        return hooked_execute
+
+    def instrument_evaluate(self, interpreter, evaluate):
+        callbacks = self.callbacks["assign"]
+
+        def hooked_evaluate(expr):
+            value = evaluate(expr)
+            if isinstance(expr, VariableAssignment):
+                for callback in callbacks:
+                    callback(expr.name.lexeme, value)
+            return value
+
+        return hooked_evaluate
+
+    def instrument_function(self, declaration, body):
+        call_callbacks, return_callbacks = self.callbacks["call"], self.callbacks["return"]
+
+        def hooked_function(arguments):
+            for callback in call_callbacks:
+                callback(declaration, arguments)
+            completion = body(arguments)
+            if return_callbacks:
+                # Un appel terminal est exécuté ici pour connaître la vraie valeur
+                # retournée : les appels terminaux suivis consomment la pile Python.
+                value = complete(completion)
+                for callback in return_callbacks:
+                    callback(declaration, value)
+                return Return(value)
+            return completion
+
+        return hooked_function
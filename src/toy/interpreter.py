@@ -1,29 +1,243 @@
-
-
+import operator
+import time
 from pygments.token import String
+from collections.abc import Iterable
 from typing import Any
 
 from toy.ast_nodes import *
-from toy.environment import Environment
-from toy.tokens import TokenType
-
+from toy.environment import UNSET, Environment
+from toy.metrics import Metrics
+from toy.scopes import elide_scopes
+from toy.tokens import Token, TokenType
+
+
+BINARY_OPERATORS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.STAR: operator.mul,
+    TokenType.SLASH: operator.truediv,
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.BANG_EQUAL: operator.ne,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+}
+
+UNARY_OPERATORS = {
+    TokenType.MINUS: operator.neg,
+    TokenType.BANG: operator.not_,
+}
+
+COMPARISON_OPERATORS = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.BANG_EQUAL: operator.ne,
+}
+
+STEP_OPERATORS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+}
+
+
+class CountedLoop:
+    """Boucle `for (var i = ...; i < limite; i = i + pas)` reconnue dans l'AST.
+
+    Le compteur est comparé à la limite, réévaluée à chaque tour comme dans
+    le cas général, puis avancé du pas constant, sans passer par la
+    condition et l'incrément de l'AST.
+    """
+    __slots__ = ("name", "compare", "limit", "advance", "step")
+
+    def __init__(self, name: str, compare, limit: Expression, advance, step: Any) -> None:
+        self.name = name
+        self.compare = compare
+        self.limit = limit
+        self.advance = advance
+        self.step = step
+
+    @staticmethod
+    def recognize(stmt: "ForStatement") -> "CountedLoop | None":
+        """Retourne la boucle comptée décrite par le for, ou None."""
+        match stmt:
+            case ForStatement(
+                VarStatement(Token(lexeme=name)),
+                Binary(Variable(Token(lexeme=tested)), Token(type=comparison), limit),
+                VariableAssignment(
+                    Token(lexeme=assigned),
+                    Binary(Variable(Token(lexeme=read)), Token(type=step_type), Literal(step)),
+                ),
+            ) if (
+                name == tested == assigned == read
+                and comparison in COMPARISON_OPERATORS
+                and step_type in STEP_OPERATORS
+            ):
+                return CountedLoop(
+                    name, COMPARISON_OPERATORS[comparison], limit, STEP_OPERATORS[step_type], step
+                )
+        return None
+
+
+class Interrupted(RuntimeError):
+    """Arrêt du programme demandé par Interpreter.interrupt (annulation, limite de temps)."""
+
+
+class Interruptible:
+    """Arrêt coopératif d'un moteur d'exécution.
+
+    interrupt peut être appelé depuis un autre thread : le programme s'arrête
+    au prochain tour de boucle ou appel de fonction, qui ne teste qu'un
+    attribut tant qu'aucun arrêt n'est demandé, en levant Interrupted.
+    """
+    interrupt_reason: str | None = None
+
+    def interrupt(self, reason: str = "Execution interrupted.") -> None:
+        """Demande l'arrêt du programme en cours."""
+        self.interrupt_reason = reason
+
+    def check_interrupt(self) -> None:
+        """Lève Interrupted si un arrêt a été demandé, et l'acquitte."""
+        reason = self.interrupt_reason
+        if reason is not None:
+            self.interrupt_reason = None
+            raise Interrupted(reason)
+
+
+class Interpreter(Interruptible):
+    """Exécute le programme en parcourant l'AST.
+
+    Par défaut, interpret compile chaque instruction en closures Python avant
+    de l'exécuter ; avec compiled=False, il parcourt directement l'AST.
+    Avec une instrumentation (voir toy.hooks : profileurs, Hooks), chaque
+    instruction et chaque appel passe par elle ; sans, rien n'est enveloppé.
+    Le moteur par closures la relit à chaque compilation : la remplacer ne
+    concerne que les instructions compilées ensuite.
+    Les compteurs de metrics (voir toy.metrics) ne sont tenus qu'avec
+    counting=True ; sinon aucune instruction de comptage n'est exécutée.
+    """
+    def __init__(
+        self,
+        compiled: bool = True,
+        instrumentation: "Instrumentation | None" = None,
+        counting: bool = False,
+    ) -> None:
+        # Import local : toy.closures dépend de ce module
+        from toy.closures import ClosureCompiler
 
-class Interpreter:
-    """Exécute le programme en parcourant l'AST."""
-    def __init__(self) -> None:
         self.environment = Environment()
+        self.compiled = compiled
+        self.counting = counting
+        self.metrics = Metrics()
+        self.compiler = ClosureCompiler(self)
+        # Nombre de blocs exécutés sans portée propre (voir toy.scopes)
+        self.elided_scopes = 0
+        self.interrupt_reason = None
+        self.instrumentation = instrumentation
+        self.function_type = ToyFunction
+        self.returned = Return(None)
+
+        if instrumentation is not None and not compiled:
+            # Import local : toy.hooks dépend de ce module
+            from toy.hooks import InstrumentedFunction
+
+            # Méthodes remplacées sur l'instance : la classe reste sans instrumentation
+            self.function_type = InstrumentedFunction
+            self.execute = instrumentation.instrument_execute(self, self.execute)
+            self.evaluate = instrumentation.instrument_evaluate(self, self.evaluate)
+
+    def stats(self) -> dict[str, Any]:
+        """Compteurs d'exécution (nuls sans counting) et durées des phases depuis la création de l'interpréteur."""
+        return self.metrics.stats()
 
     def interpret(self, statements: list[Statement], start_index: int = 0) -> None:
         """Point d'entrée pour exécuter une liste d'instructions."""
-        for statement in statements[start_index:]:
-            self.execute(statement)
+        statements = statements[start_index:]
+        self.elided_scopes += elide_scopes(statements)
+        start = time.perf_counter()
+
+        try:
+            if not self.compiled:
+                for statement in statements:
+                    completion = self.execute(statement)
+                    if completion is not None:
+                        complete(completion)
+                        break
+                return
+
+            for run in self.compiler.compile(statements):
+                completion = run(self.environment)
+                if completion is not None:
+                    complete(completion)
+                    break
+        finally:
+            self.metrics.execute_time += time.perf_counter() - start
+
+    def interpret_stream(self, statements: Iterable[Statement]) -> None:
+        """Exécute chaque instruction dès qu'elle est produite, puis l'oublie.
+
+        Avec Parser.iter_declarations(), l'analyse et l'exécution alternent :
+        seule l'instruction en cours est gardée en mémoire. Un return de
+        premier niveau arrête l'analyse aussi.
+        Seul le temps passé hors de l'analyse compte comme exécution.
+        """
+        metrics = self.metrics
+
+        for statement in statements:
+            start = time.perf_counter()
+            try:
+                self.elided_scopes += elide_scopes([statement])
+
+                if self.compiled:
+                    (run,) = self.compiler.compile([statement])
+                    completion = run(self.environment)
+                else:
+                    completion = self.execute(statement)
+
+                if completion is not None:
+                    complete(completion)
+                    break
+            finally:
+                metrics.execute_time += time.perf_counter() - start
 
-    def execute(self, stmt: Statement) -> None:
-        """Exécute une instruction spécifique."""
+    def execute(self, stmt: Statement) -> "Completion | None":
+        """Exécute une instruction spécifique.
+
+        Retourne None, ou une Completion lorsque l'instruction interrompt le
+        flot normal (return) et que les instructions englobantes doivent s'arrêter.
+        """
+        if self.counting and not isinstance(stmt, BlockStatement):
+            self.metrics.statements += 1
+
+        # Les instructions les plus fréquentes dans un appel sont testées en premier
         match stmt:
             case ExpressionStatement(expression):
                 self.evaluate(expression)
 
+            case IfStatement(condition, then_branch, else_branch):
+                condition_value = self.evaluate(condition)
+                if condition_value:
+                    return self.execute(then_branch)
+                elif else_branch is not None:
+                    return self.execute(else_branch)
+
+            case ReturnStatement(_, value):
+                if isinstance(value, FunctionCall):
+                    # Appel terminal : exécuté par l'appelant, sans récursion Python
+                    function = self.evaluate(value.callee)
+
+                    if not isinstance(function, ToyFunction):
+                        raise ValueError(f"Unknown function call: {value.callee}")
+
+                    return TailCall(function, [self.evaluate(arg) for arg in value.arguments])
+
+                # Return partagé : sa valeur est lue par l'appelant avant tout autre return
+                returned = self.returned
+                returned.value = self.evaluate(value) if value is not None else None
+                return returned
+
             case VarStatement(name, initializer):
                 value = None
                 if initializer is not None:
@@ -31,29 +245,36 @@ class Interpreter:
                 self.environment.define(name.lexeme, value)
 
             case FunctionDeclarationStatement(name) as st:
-                function = ToyFunction(self, st, Environment(self.environment))
+                if self.counting:
+                    self.metrics.environments += 1
+                function = self.function_type(self, st, Environment(self.environment))
                 self.environment.define(name.lexeme, function)
 
             case PrintStatement(expression):
                 value = self.evaluate(expression)
                 print(value)
 
-            case IfStatement(condition, then_branch, else_branch):
-                condition_value = self.evaluate(condition)
-                if condition_value:
-                    self.execute(then_branch)
-                else:
-                    self.execute(else_branch)
-
             case WhileStatement(condition, body):
                 while self.evaluate(condition):
-                    self.execute(body)
+                    if self.interrupt_reason is not None:
+                        self.check_interrupt()
+                    completion = self.execute(body)
+                    if completion is not None:
+                        return completion
 
-            case BlockStatement(statements):
-                self.execute_block(statements, Environment(self.environment))
+            case ForStatement() as st:
+                return self.execute_for(st)
+
+            case BlockStatement(statements) if not stmt.needs_scope:
+                for statement in statements:
+                    completion = self.execute(statement)
+                    if completion is not None:
+                        return completion
 
-            case ReturnStatement(value):
-                raise Return(self.evaluate(value))
+            case BlockStatement(statements):
+                if self.counting:
+                    self.metrics.environments += 1
+                return self.execute_block(statements, Environment(self.environment))
 
             case _:
                 raise ValueError(f"Unknown statement: {stmt}")
@@ -105,6 +326,8 @@ class Interpreter:
                         raise ValueError(f"Unknown operator: {operator}")
 
             case Variable(value):
+                if self.counting:
+                    return self.lookup(value.lexeme)
                 return self.environment.get(value.lexeme)
 
             case VariableAssignment(name, value):
@@ -136,23 +359,125 @@ class Interpreter:
             case _:
                 raise ValueError(f"Unknown expression: {expr}")
 
-    def execute_block(self, statements: list[Statement], env: Environment) -> None:
+    def lookup(self, name: str) -> Any:
+        """Lit une variable en comptant la lecture et les environnements remontés."""
+        value, depth = self.environment.lookup(name)
+        metrics = self.metrics
+        metrics.lookups += 1
+        metrics.lookup_depth += depth
+        return value
+
+    def execute_block(self, statements: list[Statement], env: Environment) -> "Completion | None":
         """Exécute une liste d'instructions dans un bloc."""
         previous = self.environment
-        
+
         try:
             self.environment = env
             for statement in statements:
-                self.execute(statement)
-        except RuntimeError as e:
-            raise e
+                completion = self.execute(statement)
+                if completion is not None:
+                    return completion
+        finally:
+            self.environment = previous
+
+    def execute_for(self, stmt: ForStatement) -> "Completion | None":
+        """Exécute une boucle for dans un environnement créé une seule fois."""
+        previous = self.environment
+
+        try:
+            self.environment = Environment(previous)
+            if self.counting:
+                self.metrics.environments += 1
+            if stmt.initializer is not None:
+                self.execute(stmt.initializer)
+
+            loop = CountedLoop.recognize(stmt)
+            if loop is not None:
+                return self.execute_counted_loop(loop, stmt.body)
+
+            condition, increment, body = stmt.condition, stmt.increment, stmt.body
+            while condition is None or self.evaluate(condition):
+                if self.interrupt_reason is not None:
+                    self.check_interrupt()
+                completion = self.execute(body)
+                if completion is not None:
+                    return completion
+                if increment is not None:
+                    self.evaluate(increment)
         finally:
             self.environment = previous
 
-class Return:
+    def execute_counted_loop(self, loop: "CountedLoop", body: Statement) -> "Completion | None":
+        """Exécute une boucle comptée : le compteur est lu et avancé dans l'environnement de la boucle."""
+        values = self.environment.values
+        name, compare, advance, step = loop.name, loop.compare, loop.advance, loop.step
+        limit = loop.limit
+
+        if isinstance(limit, Literal):
+            constant = limit.value
+            while compare(values[name], constant):
+                if self.interrupt_reason is not None:
+                    self.check_interrupt()
+                completion = self.execute(body)
+                if completion is not None:
+                    return completion
+                values[name] = advance(values[name], step)
+        else:
+            while compare(values[name], self.evaluate(limit)):
+                if self.interrupt_reason is not None:
+                    self.check_interrupt()
+                completion = self.execute(body)
+                if completion is not None:
+                    return completion
+                values[name] = advance(values[name], step)
+
+class Completion:
+    """Signal de fin anormale d'une instruction, propagé comme valeur de retour.
+
+    Les instructions retournent None dans le cas normal ; aucune exception
+    n'est levée pour sortir d'une fonction (ou, plus tard, d'une boucle).
+    """
+    __slots__ = ()
+
+class Return(Completion):
+    """Sortie de la fonction courante avec une valeur."""
+    __slots__ = ("value",)
+
     def __init__(self, value: Any) -> None:
         self.value = value
 
+class TailCall(Completion):
+    """Sortie de la fonction courante par un appel en position terminale.
+
+    L'appel n'est pas encore effectué : la fonction appelante le rend à son
+    propre appelant, qui l'exécute dans une boucle (trampoline).
+    """
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function: "ToyFunction", arguments: list[Any]) -> None:
+        self.function = function
+        self.arguments = arguments
+
+def complete(completion: Completion | None) -> Any:
+    """Exécute les appels terminaux en attente puis retourne la valeur finale."""
+    while type(completion) is TailCall:
+        completion = completion.function.invoke(completion.arguments)
+    if completion is not None:
+        return completion.value
+    return None
+
+def bind_arguments(env: Environment, parameters: list[Token], arguments: list[Any]) -> None:
+    """Définit les paramètres dans l'environnement d'un appel.
+
+    Les arguments en trop sont ignorés ; un paramètre sans argument est défini
+    mais vaut UNSET, et sa lecture échoue comme dans les autres moteurs au lieu
+    de remonter à une variable englobante du même nom.
+    """
+    if len(arguments) < len(parameters):
+        arguments = arguments + [UNSET] * (len(parameters) - len(arguments))
+    for param, arg in zip(parameters, arguments):
+        env.define(param.lexeme, arg)
+
 class ToyFunction:
     def __init__(self, interpreter: Interpreter, declaration: FunctionDeclarationStatement, closure: Environment) -> None:
         self.interpreter = interpreter
@@ -160,13 +485,379 @@ class ToyFunction:
         self.closure = closure
     
     def call(self, arguments: list[Any]) -> Any:
+        completion = self.invoke(arguments)
+
+        # Cas le plus courant, traité sans passer par complete
+        if type(completion) is Return:
+            return completion.value
+        return complete(completion)
+
+    def invoke(self, arguments: list[Any]) -> Completion | None:
+        """Exécute le corps une fois, sans effectuer un éventuel appel terminal."""
+        if self.interpreter.interrupt_reason is not None:
+            self.interpreter.check_interrupt()
         env = Environment(self.closure)
-        
-        for param, arg in zip(self.declaration.parameters, arguments):
-            env.define(param.lexeme, arg)
+        bind_arguments(env, self.declaration.parameters, arguments)
+        if not self.interpreter.counting:
+            return self.interpreter.execute_block(self.declaration.body, env)
+
+        metrics = self.interpreter.metrics
+        metrics.calls += 1
+        metrics.environments += 1
+        depth = metrics.call_depth = metrics.call_depth + 1
+        if depth > metrics.peak_call_depth:
+            metrics.peak_call_depth = depth
+
+        try:
+            return self.interpreter.execute_block(self.declaration.body, env)
+        finally:
+            metrics.call_depth -= 1
+
+class StackInterpreter(Interpreter):
+    """Parcourt l'AST avec sa propre pile de travail, sans récursion Python.
+
+    Chaque tâche est un couple (étape, argument) ; les expressions laissent
+    leur valeur sur une pile de valeurs. Un appel de fonction empile un
+    marqueur de fin d'appel jusqu'auquel un return dépile les tâches. La
+    profondeur des appels et de l'imbrication n'est limitée que par la mémoire.
+    """
+    def __init__(self, counting: bool = False) -> None:
+        super().__init__(compiled=False, counting=counting)
+        self.tasks: list[tuple] = []
+        self.values: list[Any] = []
+        self.completion: Completion | None = None
+
+    def execute(self, stmt: Statement) -> Completion | None:
+        """Exécute une instruction jusqu'au bout de la pile de travail."""
+        return self.run([(self.execute_step, stmt)])
+
+    def evaluate(self, expr: Expression) -> Any:
+        """Évalue une expression jusqu'au bout de la pile de travail."""
+        values = []
+        self.run([(self.evaluate_step, expr)], values)
+        return values.pop()
+
+    def execute_block(self, statements: list[Statement], env: Environment) -> Completion | None:
+        """Exécute une liste d'instructions dans un bloc."""
+        tasks = [(self.restore_environment, self.environment)]
+        tasks.extend((self.execute_step, statement) for statement in reversed(statements))
+        self.environment = env
+        return self.run(tasks)
+
+    def run(self, tasks: list[tuple], values: list[Any] | None = None) -> Completion | None:
+        """Dépile et exécute les tâches ; retourne la Completion qui a vidé la pile."""
+        outer = self.tasks, self.values, self.completion
+        environment = self.environment
+        self.tasks, self.values, self.completion = tasks, [] if values is None else values, None
 
         try:
-            self.interpreter.execute_block(self.declaration.body, env)
-        except Return as ret:
-            return ret.value
-        return None
\ No newline at end of file
+            while tasks:
+                step, argument = tasks.pop()
+                step(argument)
+            return self.completion
+        except BaseException:
+            self.environment = environment
+            # Les appels dont le marqueur de fin reste sur la pile ne se termineront pas
+            if self.counting:
+                finish_call = self.finish_call
+                self.metrics.call_depth -= sum(1 for step, _ in tasks if step == finish_call)
+            raise
+        finally:
+            self.tasks, self.values, self.completion = outer
+
+    ##########################################################################
+    # Statements
+    ##########################################################################
+
+    def execute_step(self, stmt: Statement) -> None:
+        """Empile les tâches qui exécutent une instruction."""
+        push = self.tasks.append
+        if self.counting and not isinstance(stmt, BlockStatement):
+            self.metrics.statements += 1
+
+        match stmt:
+            case ExpressionStatement(expression):
+                push((self.discard, None))
+                push((self.evaluate_step, expression))
+
+            case VarStatement(name, initializer):
+                push((self.define, name.lexeme))
+                if initializer is not None:
+                    push((self.evaluate_step, initializer))
+                else:
+                    self.values.append(None)
+
+            case FunctionDeclarationStatement(name) as st:
+                if self.counting:
+                    self.metrics.environments += 1
+                function = ToyFunction(self, st, Environment(self.environment))
+                self.environment.define(name.lexeme, function)
+
+            case PrintStatement(expression):
+                push((self.print_value, None))
+                push((self.evaluate_step, expression))
+
+            case IfStatement(condition, _, _):
+                push((self.branch, stmt))
+                push((self.evaluate_step, condition))
+
+            case WhileStatement(condition, _):
+                push((self.loop, stmt))
+                push((self.evaluate_step, condition))
+
+            case ForStatement(initializer, _, _, _):
+                push((self.restore_environment, self.environment))
+                push((self.for_test, stmt))
+                if initializer is not None:
+                    push((self.execute_step, initializer))
+                self.environment = Environment(self.environment)
+                if self.counting:
+                    self.metrics.environments += 1
+
+            case BlockStatement(statements) if not stmt.needs_scope:
+                for statement in reversed(statements):
+                    push((self.execute_step, statement))
+
+            case BlockStatement(statements):
+                push((self.restore_environment, self.environment))
+                for statement in reversed(statements):
+                    push((self.execute_step, statement))
+                self.environment = Environment(self.environment)
+                if self.counting:
+                    self.metrics.environments += 1
+
+            case ReturnStatement(_, FunctionCall(callee, arguments)):
+                self.push_call(self.tail_call, callee, arguments)
+
+            case ReturnStatement(_, value):
+                push((self.return_value, None))
+                if value is not None:
+                    push((self.evaluate_step, value))
+                else:
+                    self.values.append(None)
+
+            case _:
+                raise ValueError(f"Unknown statement: {stmt}")
+
+    def discard(self, _) -> None:
+        self.values.pop()
+
+    def define(self, name: str) -> None:
+        self.environment.define(name, self.values.pop())
+
+    def print_value(self, _) -> None:
+        print(self.values.pop())
+
+    def branch(self, stmt: IfStatement) -> None:
+        if self.values.pop():
+            self.tasks.append((self.execute_step, stmt.then_branch))
+        elif stmt.else_branch is not None:
+            self.tasks.append((self.execute_step, stmt.else_branch))
+
+    def loop(self, stmt: WhileStatement) -> None:
+        if self.values.pop():
+            if self.interrupt_reason is not None:
+                self.check_interrupt()
+            # Le test suivant est empilé sous le corps de la boucle
+            self.tasks.append((self.loop, stmt))
+            self.tasks.append((self.evaluate_step, stmt.condition))
+            self.tasks.append((self.execute_step, stmt.body))
+
+    def for_test(self, stmt: ForStatement) -> None:
+        self.tasks.append((self.for_body, stmt))
+        if stmt.condition is not None:
+            self.tasks.append((self.evaluate_step, stmt.condition))
+        else:
+            self.values.append(True)
+
+    def for_body(self, stmt: ForStatement) -> None:
+        if self.values.pop():
+            if self.interrupt_reason is not None:
+                self.check_interrupt()
+            # L'incrément puis le test suivant sont empilés sous le corps de la boucle
+            self.tasks.append((self.for_test, stmt))
+            if stmt.increment is not None:
+                self.tasks.append((self.discard, None))
+                self.tasks.append((self.evaluate_step, stmt.increment))
+            self.tasks.append((self.execute_step, stmt.body))
+
+    def restore_environment(self, environment: Environment) -> None:
+        self.environment = environment
+
+    def return_value(self, _) -> None:
+        if not self.unwind():
+            self.completion = Return(self.values.pop())
+
+    ##########################################################################
+    # Expressions
+    ##########################################################################
+
+    def evaluate_step(self, expr: Expression) -> None:
+        """Empile les tâches qui évaluent une expression."""
+        push = self.tasks.append
+
+        match expr:
+            case Literal(value):
+                self.values.append(value)
+
+            case Binary(left, operator, right):
+                function = BINARY_OPERATORS.get(operator.type)
+                if function is None:
+                    raise ValueError(f"Unknown operator: {operator}")
+                push((self.apply_binary, function))
+                push((self.evaluate_step, right))
+                push((self.evaluate_step, left))
+
+            case Unary(operator, right):
+                function = UNARY_OPERATORS.get(operator.type)
+                if function is None:
+                    raise ValueError(f"Unknown operator: {operator}")
+                push((self.apply_unary, function))
+                push((self.evaluate_step, right))
+
+            case Variable(name):
+                if self.counting:
+                    self.values.append(self.lookup(name.lexeme))
+                else:
+                    self.values.append(self.environment.get(name.lexeme))
+
+            case VariableAssignment(name, value):
+                push((self.assign, name.lexeme))
+                push((self.evaluate_step, value))
+
+            case FunctionCall(callee, arguments):
+                self.push_call(self.call, callee, arguments)
+
+            case MatchExpression(subject, cases):
+                if cases:
+                    push((self.match_case, (cases, 0)))
+                    push((self.evaluate_step, cases[0].pattern))
+                else:
+                    push((self.no_match, None))
+                push((self.evaluate_step, subject))
+
+            case _:
+                raise ValueError(f"Unknown expression: {expr}")
+
+    def apply_binary(self, function) -> None:
+        values = self.values
+        right = values.pop()
+        values[-1] = function(values[-1], right)
+
+    def apply_unary(self, function) -> None:
+        self.values[-1] = function(self.values[-1])
+
+    def assign(self, name: str) -> None:
+        self.environment.assign(name, self.values[-1])
+
+    def match_case(self, state: tuple[list[MatchCase], int]) -> None:
+        cases, index = state
+        pattern_value = self.values.pop()
+
+        if self.values[-1] == pattern_value:
+            self.values.pop()
+            self.tasks.append((self.evaluate_step, cases[index].body))
+        elif index + 1 < len(cases):
+            self.tasks.append((self.match_case, (cases, index + 1)))
+            self.tasks.append((self.evaluate_step, cases[index + 1].pattern))
+        else:
+            self.no_match(None)
+
+    def no_match(self, _) -> None:
+        raise RuntimeError(f"No match for value: {self.values.pop()}")
+
+    ##########################################################################
+    # Calls
+    ##########################################################################
+
+    def push_call(self, step, callee: Expression, arguments: list[Expression]) -> None:
+        """Empile l'évaluation de la fonction, de ses arguments, puis l'appel."""
+        push = self.tasks.append
+        push((step, len(arguments)))
+        for argument in reversed(arguments):
+            push((self.evaluate_step, argument))
+        push((self.check_callable, callee))
+        push((self.evaluate_step, callee))
+
+    def check_callable(self, callee: Expression) -> None:
+        if not isinstance(self.values[-1], ToyFunction):
+            raise ValueError(f"Unknown function call: {callee}")
+
+    def pop_call(self, argc: int) -> tuple[ToyFunction, list[Any]]:
+        """Retire la fonction et ses arguments de la pile de valeurs."""
+        values = self.values
+        base = len(values) - argc
+        function = values[base - 1]
+        arguments = values[base:]
+        del values[base - 1:]
+        return function, arguments
+
+    def call(self, argc: int) -> None:
+        function, arguments = self.pop_call(argc)
+
+        if type(function) is not ToyFunction or function.interpreter is not self:
+            self.values.append(function.call(arguments))
+            return
+
+        if self.counting:
+            metrics = self.metrics
+            depth = metrics.call_depth = metrics.call_depth + 1
+            if depth > metrics.peak_call_depth:
+                metrics.peak_call_depth = depth
+
+        self.tasks.append((self.finish_call, self.environment))
+        self.enter(function, arguments)
+
+    def tail_call(self, argc: int) -> None:
+        function, arguments = self.pop_call(argc)
+
+        if not self.unwind():
+            self.completion = TailCall(function, arguments)
+        elif type(function) is not ToyFunction or function.interpreter is not self:
+            self.values.append(function.call(arguments))
+        else:
+            # Le marqueur de l'appel courant sert aussi à l'appel terminal
+            self.enter(function, arguments)
+
+    def enter(self, function: ToyFunction, arguments: list[Any]) -> None:
+        """Empile le corps de la fonction dans un nouvel environnement."""
+        if self.interrupt_reason is not None:
+            self.check_interrupt()
+        env = Environment(function.closure)
+        bind_arguments(env, function.declaration.parameters, arguments)
+        if self.counting:
+            self.metrics.calls += 1
+            self.metrics.environments += 1
+
+        push = self.tasks.append
+        push((self.push_none, None))
+        for statement in reversed(function.declaration.body):
+            push((self.execute_step, statement))
+        self.environment = env
+
+    def push_none(self, _) -> None:
+        self.values.append(None)
+
+    def finish_call(self, environment: Environment) -> None:
+        self.environment = environment
+        if self.counting:
+            self.metrics.call_depth -= 1
+
+    def unwind(self) -> bool:
+        """Dépile les tâches jusqu'au marqueur de l'appel en cours, sans le retirer.
+
+        Retourne False si la pile se vide : le return sort alors du bloc
+        exécuté par run, et non d'un appel lancé sur la pile de travail.
+        """
+        tasks = self.tasks
+        finish_call = self.finish_call
+        restore_environment = self.restore_environment
+
+        while tasks:
+            step, argument = tasks[-1]
+            if step == finish_call:
+                return True
+            tasks.pop()
+            if step == restore_environment:
+                self.environment = argument
+        return False
@@ -1,18 +1,218 @@
 
 
-from toy.tokens import Token, TokenType, KEYWORDS
+import gc
+import io
+import mmap
+import re
+import string
+import time
+from collections.abc import Iterator
+from itertools import chain, repeat
+from typing import BinaryIO, TextIO
+
+from toy.tokens import Token, TokenBuffer, TokenType, KEYWORDS
+
+
+# Opérateurs et ponctuation
+OPERATORS = {
+    "==": TokenType.EQUAL_EQUAL,
+    "=>": TokenType.ARROW,
+    "!=": TokenType.BANG_EQUAL,
+    "<=": TokenType.LESS_EQUAL,
+    ">=": TokenType.GREATER_EQUAL,
+    "=": TokenType.EQUAL,
+    "!": TokenType.BANG,
+    "<": TokenType.LESS,
+    ">": TokenType.GREATER,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    "{": TokenType.LBRACE,
+    "}": TokenType.RBRACE,
+    ";": TokenType.SEMICOLON,
+    ",": TokenType.COMMA,
+}
+
+# Un token par correspondance. Les opérateurs de deux caractères passent avant
+# le caractère isolé pour distinguer "==", "=>" et "<=" de "=" et "<" ; tout
+# autre caractère non blanc est isolé pour être classé ou signalé invalide.
+TOKEN_PATTERN = re.compile(
+    r"[A-Za-z][A-Za-z0-9_]*"
+    r"|[0-9]+(?:\.[0-9]+)?"
+    r"|==|=>|!=|<=|>="
+    r"|[^ \t\r]"
+)
+
+# Type d'un token d'après son texte, puis d'après son premier caractère
+TOKEN_TYPES = {**OPERATORS, **KEYWORDS}
+FIRST_CHARACTER_TYPES = {
+    **{c: TokenType.NUMBER for c in string.digits},
+    **{c: TokenType.IDENTIFIER for c in string.ascii_letters},
+}
+
+Source = str | TextIO | BinaryIO | mmap.mmap
+
+
+def iter_lines(source: Source) -> Iterator[str]:
+    """Lignes du source, '\n' final compris : chaîne, fichier texte ou binaire, ou mmap."""
+    if isinstance(source, str):
+        lines = io.StringIO(source, newline="\n")
+    elif isinstance(source, mmap.mmap):
+        lines = iter(source.readline, b"")
+    else:
+        lines = source
+
+    for line in lines:
+        yield line.decode() if isinstance(line, bytes) else line
 
 class Lexer:
-    """Analyseur lexical qui transforme le code source en tokens."""
-    def __init__(self, source: str) -> None:
+    """Analyseur lexical qui transforme le code source en tokens.
+
+    Chaque ligne ASCII est découpée par une seule expression régulière ;
+    sinon (identifiants Unicode), ou en cas d'erreur, elle est analysée
+    caractère par caractère. Les deux méthodes produisent les mêmes tokens.
+    Le source peut être une chaîne, un fichier ouvert ou un mmap.
+
+    Sur un source de 1 Mo, tokenize est environ 3 fois plus rapide que
+    scan_tokens et iter_tokens 3,7 fois (benchmarks/bench_lexer.py) : la
+    création d'un Token par token en représente le tiers et borne le gain.
+    """
+    def __init__(self, source: Source) -> None:
         self.source = source
         self.start = 0
         self.current = 0
         self.line = 1
+        # Secondes passées à découper des lignes dans iter_tokens (voir toy.metrics)
+        self.elapsed = 0.0
         self.tokens: list[Token] = []
 
     def tokenize(self) -> list[Token]:
-        """Transforme le code source en une liste de tokens."""
+        """Transforme le code source en une liste de tokens.
+
+        Même découpage que iter_tokens, mais les tokens de chaque ligne sont
+        ajoutés d'un bloc à la liste, sans passer un par un par un générateur.
+        """
+        start = time.perf_counter()
+        tokens = self.tokens
+        tokenize_line = self.tokenize_line
+        line = self.line
+        # Les tokens ne forment pas de cycles : le ramasse-miettes parcourrait
+        # la liste grandissante à chaque lot de tokens créés
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for text in iter_lines(self.source):
+                newline = text.endswith("\n")
+                tokens.extend(tokenize_line(text[:-1] if newline else text, line))
+                line += newline
+        finally:
+            if enabled:
+                gc.enable()
+
+        self.line = line
+        tokens.append(Token(TokenType.EOF, "", line))
+        self.elapsed += time.perf_counter() - start
+        return tokens
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Génère les tokens ligne par ligne, sans matérialiser le source ni la liste.
+
+        Aucun token ne s'étend sur plusieurs lignes : la mémoire utilisée est
+        bornée par la plus longue ligne du source. Les tokens d'une ligne sont
+        enchaînés par chain, sans reprendre un générateur à chaque token.
+        """
+        return chain.from_iterable(self.iter_lines_tokens())
+
+    def iter_lines_tokens(self) -> Iterator[list[Token]]:
+        """Génère la liste des tokens de chaque ligne, puis celle du token EOF.
+
+        Le temps de découpage est ajouté à elapsed ligne par ligne, hors temps
+        passé chez le consommateur.
+        """
+        clock = time.perf_counter
+        line = self.line
+        for text in iter_lines(self.source):
+            start = clock()
+            newline = text.endswith("\n")
+            tokens = self.tokenize_line(text[:-1] if newline else text, line)
+            self.elapsed += clock() - start
+            yield tokens
+            line += newline
+
+        self.line = line
+        yield [Token(TokenType.EOF, "", line)]
+
+    def tokenize_line(self, text: str, line: int) -> list[Token]:
+        """Découpe une ligne avec TOKEN_PATTERN, ou caractère par caractère à défaut."""
+        if text.isascii():
+            found = TOKEN_PATTERN.findall(text)
+            try:
+                types = [TOKEN_TYPES.get(t) or FIRST_CHARACTER_TYPES[t[0]] for t in found]
+            except KeyError:
+                # Caractère invalide : l'analyse caractère par caractère produit l'erreur exacte
+                pass
+            else:
+                return list(map(Token, types, found, repeat(line)))
+
+        scanner = Lexer(text)
+        scanner.line = line
+        return scanner.scan_tokens()[:-1]
+
+    def tokenize_buffer(self) -> TokenBuffer:
+        """Transforme un source de type str en TokenBuffer compact.
+
+        Les tokens sont repérés par leurs positions dans le source au lieu
+        d'être copiés : pour un gros source, le tampon est bien plus petit
+        que la liste de Token produite par tokenize.
+        """
+        source = self.source
+        buffer = TokenBuffer(source)
+        line = self.line
+        start = 0
+
+        while True:
+            end = source.find("\n", start)
+            stop = len(source) if end == -1 else end
+            self.buffer_line(buffer, start, stop, line)
+            if end == -1:
+                break
+            start = end + 1
+            line += 1
+
+        self.line = line
+        buffer.append(TokenType.EOF, len(source), len(source), line)
+        return buffer
+
+    def buffer_line(self, buffer: TokenBuffer, start: int, stop: int, line: int) -> None:
+        """Ajoute au tampon les tokens de source[start:stop], comme tokenize_line."""
+        text = self.source[start:stop]
+        if text.isascii():
+            matches = list(TOKEN_PATTERN.finditer(text))
+            try:
+                types = [
+                    TOKEN_TYPES.get(lexeme) or FIRST_CHARACTER_TYPES[lexeme[0]]
+                    for lexeme in map(re.Match.group, matches)
+                ]
+            except KeyError:
+                pass
+            else:
+                for token_type, match in zip(types, matches):
+                    buffer.append(token_type, start + match.start(), start + match.end(), line)
+                return
+
+        # Chaque token du scanner est retrouvé dans la ligne pour connaître sa position
+        position = 0
+        for token in self.tokenize_line(text, line):
+            position = text.index(token.lexeme, position)
+            end = position + len(token.lexeme)
+            buffer.append(token.type, start + position, start + end, line)
+            position = end
+
+    def scan_tokens(self) -> list[Token]:
+        """Analyse un source de type str caractère par caractère avec scan_token."""
         while not self.is_at_end():
             self.start = self.current
             self.scan_token()
@@ -1,35 +1,141 @@
+import argparse
+import json
 import sys
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
 
-from toy.interpreter import Interpreter
-from toy.lexer import Lexer
+from toy.ast_nodes import Statement
+from toy.cache import CACHE_DIRECTORY, ASTCache
+from toy.interpreter import Interpreter, StackInterpreter
+from toy.lexer import Lexer, Source
+from toy.optimizer import Optimizer
 from toy.parser import Parser
+from toy.profiler import Profiler
+from toy.resolver import Resolver
+from toy.sampler import DEFAULT_INTERVAL, SamplingProfiler
+from toy.vm import VM
 
 
+# Chaque moteur ne tient ses compteurs (voir toy.metrics) qu'avec counting=True
+ENGINES = {
+    "closure": Interpreter,
+    "tree": lambda counting=False: Interpreter(compiled=False, counting=counting),
+    "stack": StackInterpreter,
+    "vm": VM,
+}
+
+# Moteurs qui savent attribuer le temps aux fonctions et aux lignes (--profile, --sample)
+PROFILED_ENGINES = {
+    "closure": lambda profiler, counting=False: Interpreter(instrumentation=profiler, counting=counting),
+    "tree": lambda profiler, counting=False: Interpreter(compiled=False, instrumentation=profiler, counting=counting),
+}
+
 interpreter = Interpreter()
+optimize = False
+pipeline = False
+cache: ASTCache | None = ASTCache()
 
 
 def run_file(path: str) -> None:
-    """Lit et exécute un fichier source."""
+    """Lit et exécute un fichier source, lu ligne par ligne."""
+    if cache is not None and not pipeline:
+        run_cached(Path(path))
+        return
+
     with open(path, "r") as f:
-        source = f.read()
-    run(source)
+        run(f, optimize, pipeline, warn=True)
 
 
-def run(source: str) -> None:
-    """Exécute le code source fourni."""
-    try:
-        lexer = Lexer(source)
-        tokens = lexer.tokenize()
+def run_cached(path: Path) -> None:
+    """Exécute un fichier en réutilisant l'AST de __toycache__ si le source n'a pas changé.
 
-        parser = Parser(tokens)
-        ast = parser.parse()
+    Le fichier n'est jamais lu en entier en mémoire : son empreinte est
+    calculée par blocs, et en cas d'absence il est analysé ligne par ligne.
+    """
+    try:
+        with open(path, "rb") as f:
+            ast = cache.load(path, f, optimize)
+            if ast is None:
+                f.seek(0)
+                ast = parse(f, optimize)
+                f.seek(0)
+                cache.store(path, f, ast, optimize)
 
+        warn_undefined(ast)
         interpreter.interpret(ast)
 
     except (SyntaxError, RuntimeError) as e:
         print(f"Error: {e}")
 
 
+def run(source: Source, optimize: bool = False, pipeline: bool = False, warn: bool = False) -> None:
+    """Exécute le code source fourni (chaîne ou fichier ouvert).
+
+    Avec pipeline, chaque déclaration de premier niveau est exécutée dès
+    qu'elle est analysée : la sortie commence avant la fin de l'analyse,
+    et seul l'AST de l'instruction en cours est gardé en mémoire.
+    Avec warn, les variables probablement indéfinies sont signalées avant
+    l'exécution (hors pipeline, qui ne voit jamais le programme entier).
+    """
+    try:
+        if pipeline:
+            metrics = interpreter.metrics
+            start, executed = time.perf_counter(), metrics.execute_time
+            lexer = Lexer(source)
+            statements = Parser(lexer.iter_tokens()).iter_declarations()
+            if optimize:
+                statements = optimize_each(statements)
+            try:
+                interpreter.interpret_stream(statements)
+            finally:
+                # L'analyse est le temps écoulé hors de l'exécution des instructions
+                elapsed = time.perf_counter() - start - (metrics.execute_time - executed)
+                metrics.record_front_end(lexer.elapsed, elapsed)
+        else:
+            ast = parse(source, optimize)
+            if warn:
+                warn_undefined(ast)
+            interpreter.interpret(ast)
+
+    except (SyntaxError, RuntimeError) as e:
+        print(f"Error: {e}")
+
+
+def warn_undefined(statements: list[Statement]) -> None:
+    """Signale sur stderr les variables probablement indéfinies, sans arrêter l'exécution."""
+    for token, message in Resolver().resolve(statements).undefined:
+        print(f"Warning: line {token.line}: {message}", file=sys.stderr)
+
+
+def parse(source: Source, optimize: bool = False) -> list[Statement]:
+    """Analyse un programme complet, puis l'optimise si demandé.
+
+    Les durées d'analyse lexicale et syntaxique (optimisation comprise) sont
+    ajoutées aux metrics de l'interpréteur courant.
+    """
+    start = time.perf_counter()
+    lexer = Lexer(source)
+    try:
+        ast = Parser(lexer.iter_tokens()).parse()
+        if optimize:
+            ast = Optimizer().optimize(ast)
+        return ast
+    finally:
+        interpreter.metrics.record_front_end(lexer.elapsed, time.perf_counter() - start)
+
+
+def optimize_each(statements: Iterable[Statement]) -> Iterator[Statement]:
+    """Optimise chaque instruction séparément, pour le mode pipeline.
+
+    Sans le reste du programme, une variable ne peut être propagée que dans
+    l'instruction qui la déclare : une variable globale déclarée par une
+    instruction n'y est jamais lue ensuite, le résultat reste donc exact.
+    """
+    for statement in statements:
+        yield from Optimizer().optimize([statement])
+
+
 def repl() -> None:
     """Lance une boucle de lecture-évaluation-impression (REPL)."""
     print("Toy Language REPL")
@@ -46,8 +152,113 @@ def repl() -> None:
             break
 
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        run_file(sys.argv[1])
+def main(argv: list[str] | None = None) -> None:
+    """Point d'entrée en ligne de commande."""
+    global interpreter, optimize, pipeline, cache
+
+    arg_parser = argparse.ArgumentParser(prog="toy")
+    arg_parser.add_argument("path", nargs="?", help="fichier source à exécuter")
+    arg_parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="closure",
+        help="moteur d'exécution (closure: AST compilé en closures, tree: parcours de l'AST, stack: parcours sans récursion Python, vm: bytecode)",
+    )
+    arg_parser.add_argument(
+        "-O",
+        dest="optimize",
+        action="store_true",
+        help="simplifie l'AST avant l'exécution (fichiers uniquement)",
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help=f"n'utilise pas le cache d'AST {CACHE_DIRECTORY} à côté du fichier",
+    )
+    arg_parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="exécute chaque déclaration dès qu'elle est analysée, sans garder l'AST du programme",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="affiche le temps passé par fonction et par ligne à la fin de l'exécution",
+    )
+    arg_parser.add_argument(
+        "--profile-json",
+        metavar="FICHIER",
+        help="écrit les mesures de --profile en JSON dans ce fichier",
+    )
+    arg_parser.add_argument(
+        "--sample",
+        metavar="FICHIER",
+        help="échantillonne la pile d'appels Toy et l'écrit dans ce fichier (JSON speedscope si .json, sinon collapsed stacks)",
+    )
+    arg_parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        metavar="SECONDES",
+        help=f"intervalle entre deux échantillons (défaut : {DEFAULT_INTERVAL})",
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        metavar="FICHIER",
+        help="écrit les compteurs d'exécution dans ce fichier en fin d'exécution, au format texte de Prometheus",
+    )
+    args = arg_parser.parse_args(argv)
+
+    profiler = None
+    if args.profile or args.profile_json or args.sample:
+        option = "--sample" if args.sample else "--profile"
+        if args.engine not in PROFILED_ENGINES:
+            arg_parser.error(f"{option} needs one of the engines: {', '.join(PROFILED_ENGINES)}")
+        if not args.path:
+            arg_parser.error(f"{option} needs a source file")
+        if args.sample and (args.profile or args.profile_json):
+            arg_parser.error("--sample cannot be combined with --profile")
+        profiler = SamplingProfiler(args.sample_interval) if args.sample else Profiler()
+        interpreter = PROFILED_ENGINES[args.engine](profiler, counting=bool(args.metrics))
     else:
+        interpreter = ENGINES[args.engine](counting=bool(args.metrics))
+    optimize = args.optimize
+    pipeline = args.pipeline
+    cache = ASTCache() if args.cache else None
+
+    try:
+        run_main(args, profiler)
+    finally:
+        if args.metrics:
+            interpreter.metrics.write(args.metrics)
+
+
+def run_main(args: argparse.Namespace, profiler: Profiler | SamplingProfiler | None) -> None:
+    """Exécute le fichier demandé, ou la REPL, puis écrit les résultats du profileur."""
+    if not args.path:
         repl()
+        return
+
+    if args.sample:
+        profiler.start()
+        try:
+            run_file(args.path)
+        finally:
+            profiler.stop()
+        profiler.write(args.sample, Path(args.path).name)
+        return
+
+    run_file(args.path)
+
+    if args.profile:
+        with open(args.path, "r") as f:
+            source_lines = f.read().splitlines()
+        print(profiler.report(source_lines), file=sys.stderr)
+    if args.profile_json:
+        with open(args.profile_json, "w") as f:
+            json.dump(profiler.to_json(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
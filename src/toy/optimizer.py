@@ -0,0 +1,220 @@
+from collections import Counter
+from collections.abc import Iterable
+
+from toy.ast_nodes import *
+from toy.interpreter import BINARY_OPERATORS, UNARY_OPERATORS
+
+
+# Erreurs d'un calcul constant : l'expression est laissée telle quelle pour
+# que l'erreur survienne à l'exécution, au même moment que sans optimisation.
+FOLDING_ERRORS = (ArithmeticError, TypeError)
+
+
+class Optimizer:
+    """Simplifie l'AST produit par Parser.parse(), sans changer le résultat.
+
+    Les opérations sur des littéraux sont calculées une fois pour toutes, les
+    variables jamais réassignées dont la valeur est constante sont remplacées
+    par cette valeur, et les branches d'un if à condition constante sont
+    retirées. L'AST d'origine n'est pas modifié.
+
+    Une variable n'est propagée que si son nom n'est déclaré qu'une seule fois
+    dans le programme et n'est jamais assigné : une lecture qui la trouve dans
+    la portée lexicale, après sa déclaration, lit donc toujours cette valeur.
+    """
+
+    def __init__(self, known_globals: Iterable[str] = ()) -> None:
+        self.known_globals = set(known_globals)
+        self.declarations: Counter[str] = Counter()
+        self.assigned: set[str] = set()
+        self.scopes: list[dict[str, Literal | None]] = []
+
+    def optimize(self, statements: list[Statement]) -> list[Statement]:
+        """Retourne une version simplifiée du programme."""
+        self.count_names(statements)
+        self.scopes = [{}]
+        return self.optimize_statements(statements)
+
+    def count_names(self, statements: list[Statement]) -> None:
+        """Compte les déclarations et relève les assignations de chaque nom."""
+        for statement in statements:
+            for node in iter_nodes(statement):
+                match node:
+                    case VarStatement(name):
+                        self.declarations[name.lexeme] += 1
+                    case FunctionDeclarationStatement(name, parameters):
+                        self.declarations[name.lexeme] += 1
+                        self.declarations.update(param.lexeme for param in parameters)
+                    case VariableAssignment(name):
+                        self.assigned.add(name.lexeme)
+
+    ##########################################################################
+    # Statements
+    ##########################################################################
+
+    def optimize_statements(self, statements: list[Statement]) -> list[Statement]:
+        """Optimise une suite d'instructions en retirant celles devenues inutiles."""
+        optimized = []
+        for statement in statements:
+            statement = self.optimize_statement(statement)
+            if statement is not None:
+                optimized.append(statement)
+        return optimized
+
+    def optimize_statement(self, stmt: Statement) -> Statement | None:
+        """Optimise une instruction ; None si elle peut être retirée."""
+        match stmt:
+            case ExpressionStatement(expression):
+                return ExpressionStatement(self.optimize_expression(expression), line=stmt.line)
+
+            case VarStatement(name, initializer):
+                if initializer is not None:
+                    initializer = self.optimize_expression(initializer)
+
+                value = initializer if initializer is not None else Literal(None)
+                if not isinstance(value, Literal) or not self.is_constant(name.lexeme):
+                    value = None
+                self.scopes[-1][name.lexeme] = value
+
+                return VarStatement(name, initializer, line=stmt.line)
+
+            case FunctionDeclarationStatement(name, parameters, body):
+                self.scopes[-1][name.lexeme] = None
+                self.scopes.append({param.lexeme: None for param in parameters})
+                body = self.optimize_statements(body)
+                self.scopes.pop()
+
+                return FunctionDeclarationStatement(name, parameters, body, line=stmt.line)
+
+            case PrintStatement(expression):
+                return PrintStatement(self.optimize_expression(expression), line=stmt.line)
+
+            case IfStatement(condition, then_branch, else_branch):
+                condition = self.optimize_expression(condition)
+
+                if isinstance(condition, Literal):
+                    taken = then_branch if condition.value else else_branch
+                    return self.optimize_statement(taken) if taken is not None else None
+
+                then_branch = self.optimize_branch(then_branch)
+                if else_branch is not None:
+                    else_branch = self.optimize_branch(else_branch)
+
+                return IfStatement(condition, then_branch, else_branch, line=stmt.line)
+
+            case WhileStatement(condition, body):
+                return WhileStatement(self.optimize_expression(condition), self.optimize_branch(body), line=stmt.line)
+
+            case ForStatement(initializer, condition, increment, body):
+                self.scopes.append({})
+                if initializer is not None:
+                    initializer = self.optimize_statement(initializer)
+                if condition is not None:
+                    condition = self.optimize_expression(condition)
+                if increment is not None:
+                    increment = self.optimize_expression(increment)
+                body = self.optimize_branch(body)
+                self.scopes.pop()
+
+                return ForStatement(initializer, condition, increment, body, line=stmt.line)
+
+            case BlockStatement(statements):
+                self.scopes.append({})
+                statements = self.optimize_statements(statements)
+                self.scopes.pop()
+
+                return BlockStatement(statements, line=stmt.line)
+
+            case ReturnStatement(keyword, value):
+                if value is not None:
+                    value = self.optimize_expression(value)
+
+                return ReturnStatement(keyword, value, line=stmt.line)
+
+            case _:
+                return stmt
+
+    def optimize_branch(self, stmt: Statement) -> Statement:
+        """Optimise le corps d'un if ou d'un while, qui doit rester une instruction."""
+        optimized = self.optimize_statement(stmt)
+        return optimized if optimized is not None else BlockStatement([])
+
+    ##########################################################################
+    # Expressions
+    ##########################################################################
+
+    def optimize_expression(self, expr: Expression) -> Expression:
+        """Optimise une expression, en la réduisant à un littéral si possible."""
+        match expr:
+            case Binary(left, operator, right):
+                left = self.optimize_expression(left)
+                right = self.optimize_expression(right)
+                function = BINARY_OPERATORS.get(operator.type)
+
+                if function is not None and isinstance(left, Literal) and isinstance(right, Literal):
+                    try:
+                        return Literal(function(left.value, right.value))
+                    except FOLDING_ERRORS:
+                        pass
+
+                return Binary(left, operator, right)
+
+            case Unary(operator, right):
+                right = self.optimize_expression(right)
+                function = UNARY_OPERATORS.get(operator.type)
+
+                if function is not None and isinstance(right, Literal):
+                    try:
+                        return Literal(function(right.value))
+                    except FOLDING_ERRORS:
+                        pass
+
+                return Unary(operator, right)
+
+            case Variable(name):
+                for scope in reversed(self.scopes):
+                    if name.lexeme in scope:
+                        value = scope[name.lexeme]
+                        return Literal(value.value) if value is not None else expr
+                return expr
+
+            case VariableAssignment(name, value):
+                return VariableAssignment(name, self.optimize_expression(value))
+
+            case FunctionCall(callee, arguments):
+                return FunctionCall(
+                    self.optimize_expression(callee),
+                    [self.optimize_expression(argument) for argument in arguments],
+                )
+
+            case MatchExpression(subject, cases):
+                subject = self.optimize_expression(subject)
+                cases = [
+                    MatchCase(self.optimize_expression(case.pattern), self.optimize_expression(case.body))
+                    for case in cases
+                ]
+
+                # Sujet et motifs constants : le cas retenu est connu d'avance
+                if isinstance(subject, Literal):
+                    for case in cases:
+                        if not isinstance(case.pattern, Literal):
+                            break
+                        if subject.value == case.pattern.value:
+                            return case.body
+
+                return MatchExpression(subject, cases)
+
+            case _:
+                return expr
+
+    ##########################################################################
+    # Utils
+    ##########################################################################
+
+    def is_constant(self, name: str) -> bool:
+        """Indique si la valeur d'une variable de ce nom ne peut pas changer."""
+        return (
+            self.declarations[name] == 1
+            and name not in self.assigned
+            and name not in self.known_globals
+        )
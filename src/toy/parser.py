@@ -1,22 +1,54 @@
 
 
+from collections import deque
+from collections.abc import Iterable, Iterator
 from toy.ast_nodes import *
-from typing import Callable
 from toy.tokens import Token, TokenType
 
 
+# Priorité des opérateurs binaires, tous associatifs à gauche : plus elle est
+# élevée, plus l'opérateur lie fortement ses opérandes.
+BINARY_PRECEDENCE = {
+    TokenType.EQUAL_EQUAL: 1,
+    TokenType.BANG_EQUAL: 1,
+    TokenType.GREATER: 2,
+    TokenType.GREATER_EQUAL: 2,
+    TokenType.LESS: 2,
+    TokenType.LESS_EQUAL: 2,
+    TokenType.PLUS: 3,
+    TokenType.MINUS: 3,
+    TokenType.STAR: 4,
+    TokenType.SLASH: 4,
+}
+LOWEST_PRECEDENCE = 1
+
+UNARY_OPERATORS = frozenset({TokenType.BANG, TokenType.MINUS})
+
+
 class Parser:
-    """Analyseur syntaxique qui transforme les tokens en AST."""
-    def __init__(self, tokens: list[Token]) -> None:
-        self.tokens = tokens
+    """Analyseur syntaxique qui transforme les tokens en AST.
+
+    Les tokens sont lus au fur et à mesure depuis un itérable (une liste ou
+    Lexer.iter_tokens()) : seuls le token précédent, le token courant et un
+    token d'avance sont conservés.
+    """
+    def __init__(self, tokens: Iterable[Token]) -> None:
+        self.tokens = iter(tokens)
+        self.lookahead: deque[Token] = deque()
+        # Nombre de tokens consommés
         self.current = 0
+        self.previous_token: Token | None = None
+        self.current_token: Token | None = None
+        self.current_token = self.pull()
 
     def parse(self) -> list[ASTNode]:
         """Point d'entrée pour analyser les tokens et produire une liste d'instructions."""
-        statements = []
+        return list(self.iter_declarations())
+
+    def iter_declarations(self) -> Iterator[Statement]:
+        """Produit les déclarations de premier niveau une à une, au fil de l'analyse."""
         while not self.is_at_end():
-            statements.append(self.parse_declaration())
-        return statements
+            yield self.parse_declaration()
 
     def parse_declaration(self) -> Statement:
         """Analyse une déclaration (variable ou instruction)."""
@@ -42,7 +74,7 @@ class Parser:
 
         self.consume(TokenType.SEMICOLON, "Expect ';' after variable declaration.")
 
-        return VarStatement(name, initializer)
+        return VarStatement(name, initializer, line=name.line)
 
     def parse_function_declaration(self) -> Statement:
         name = self.consume(TokenType.IDENTIFIER, "Expect function name.")
@@ -66,7 +98,7 @@ class Parser:
             body.append(self.parse_declaration())
 
         self.consume(TokenType.RBRACE, "Expect '}' after function body.")
-        return FunctionDeclarationStatement(name, parameters, body)
+        return FunctionDeclarationStatement(name, parameters, body, line=name.line)
 
     def parse_statement(self) -> Statement:
         """Analyse une instruction (autre que déclaration)."""
@@ -88,12 +120,14 @@ class Parser:
 
     def parse_print_statement(self) -> Statement:
         """Analyse une instruction d'affichage."""
+        line = self.previous().line
         expr = self.parse_expression()
         self.consume(TokenType.SEMICOLON, "Expect ';' after expression.")
-        return PrintStatement(expr)
+        return PrintStatement(expr, line=line)
 
     def parse_if_statement(self) -> Statement:
         """Analyse une instruction conditionnelle."""
+        line = self.previous().line
         self.consume(TokenType.LPAREN, "Expect '(' after 'if'")
         condition = self.parse_expression()
         self.consume(TokenType.RPAREN, "Expect ')' after 'if'")
@@ -102,19 +136,21 @@ class Parser:
         if self.match(TokenType.ELSE):
             else_branch = self.parse_statement()
 
-        return IfStatement(condition, then_branch, else_branch)
+        return IfStatement(condition, then_branch, else_branch, line=line)
 
     def parse_while_statement(self) -> Statement:
         """Analyse une instruction conditionnelle."""
+        line = self.previous().line
         self.consume(TokenType.LPAREN, "Expect '(' after 'while'")
         condition = self.parse_expression()
         self.consume(TokenType.RPAREN, "Expect ')' after 'while'")
 
         body = self.parse_statement()
-        return WhileStatement(condition, body)
+        return WhileStatement(condition, body, line=line)
 
     def parse_for_statement(self) -> Statement:
-        """Analyse une instruction conditionnelle."""
+        """Analyse une boucle for."""
+        line = self.previous().line
         self.consume(TokenType.LPAREN, "Expect '(' after 'for'.")
 
         initializer = None
@@ -137,18 +173,7 @@ class Parser:
 
         body = self.parse_statement()
 
-        if increment is not None:
-            body = BlockStatement([body, ExpressionStatement(increment)])
-
-        if condition is None:
-            condition = Literal(True)
-
-        body = WhileStatement(condition, body)
-
-        if initializer is not None:
-            body = BlockStatement([initializer, body])
-
-        return body
+        return ForStatement(initializer, condition, increment, body, line=line)
 
     def parse_return_statement(self) -> Statement:
         keyword = self.previous()
@@ -158,21 +183,23 @@ class Parser:
             value = self.parse_expression()
 
         self.consume(TokenType.SEMICOLON, "Expect ';' after return value.")
-        return ReturnStatement(keyword, value)
+        return ReturnStatement(keyword, value, line=keyword.line)
 
     def parse_block_statement(self) -> BlockStatement:
         """Analyse une instruction de bloc."""
+        line = self.previous().line
         statements = []
         while not self.check(TokenType.RBRACE) and not self.is_at_end():
             statements.append(self.parse_declaration())
         self.consume(TokenType.RBRACE, "Expect '}' after block.")
-        return BlockStatement(statements)
+        return BlockStatement(statements, line=line)
 
     def parse_expression_statement(self) -> Statement:
         """Analyse une instruction d'expression."""
+        line = self.peek().line
         expr = self.parse_expression()
         self.consume(TokenType.SEMICOLON, "Expect ';' after expression.")
-        return ExpressionStatement(expr)
+        return ExpressionStatement(expr, line=line)
 
     ##########################################################################
     # Parsing expressions
@@ -183,11 +210,11 @@ class Parser:
         return self.parse_assignment()
 
     def parse_assignment(self) -> Expression:
-        """Analyse une assignation."""
-        expr = self.parse_equality()
+        """Analyse une assignation, associative à droite et de plus faible priorité."""
+        expr = self.parse_binary(LOWEST_PRECEDENCE)
 
-        if self.match(TokenType.EQUAL):
-            equals = self.previous()
+        if self.current_token.type == TokenType.EQUAL:
+            equals = self.advance()
             value = self.parse_assignment()
 
             if isinstance(expr, Variable):
@@ -198,63 +225,74 @@ class Parser:
 
         return expr
 
-    def parse_equality(self) -> Expression:
-        """Analyse une égalité."""
-        return self.binary_left(
-            self.parse_comparison,
-            [
-                TokenType.EQUAL_EQUAL,
-                TokenType.BANG_EQUAL,
-            ],
-        )
+    def parse_binary(self, min_precedence: int) -> Expression:
+        """Analyse les opérations binaires par précédence (table BINARY_PRECEDENCE).
 
-    def parse_comparison(self) -> Expression:
-        """Analyse une comparaison."""
-        return self.binary_left(
-            self.parse_term,
-            [
-                TokenType.GREATER,
-                TokenType.GREATER_EQUAL,
-                TokenType.LESS,
-                TokenType.LESS_EQUAL,
-            ],
-        )
+        Une suite d'opérateurs de même priorité est consommée par la boucle,
+        associative à gauche : la récursion ne descend que lorsqu'un
+        opérateur plus prioritaire suit, donc au plus une fois par niveau.
+        """
+        left = self.parse_unary()
 
-    def parse_term(self) -> Expression:
-        """Analyse un terme (addition/soustraction)."""
-        return self.binary_left(self.parse_factor, [TokenType.PLUS, TokenType.MINUS])
+        while (precedence := BINARY_PRECEDENCE.get(self.current_token.type, 0)) >= min_precedence:
+            operator = self.advance()
+            right = self.parse_binary(precedence + 1)
+            left = Binary(left, operator, right)
 
-    def parse_factor(self) -> Expression:
-        """Analyse un facteur (multiplication/division)."""
-        return self.binary_left(self.parse_unary, [TokenType.STAR, TokenType.SLASH])
+        return left
 
     def parse_unary(self) -> Expression:
-        """Analyse une opération unaire."""
-        if self.match(TokenType.BANG, TokenType.MINUS):
-            operator = self.previous()
-            right = self.parse_unary()
-            return Unary(operator, right)
+        """Analyse les opérateurs unaires préfixes, appliqués du plus proche au plus lointain."""
+        operators = []
+        while self.current_token.type in UNARY_OPERATORS:
+            operators.append(self.advance())
+
+        expr = self.parse_call()
+        for operator in reversed(operators):
+            expr = Unary(operator, expr)
+        return expr
 
-        return self.parse_primary()
+    def parse_call(self) -> Expression:
+        """Analyse un appel de fonction (ex: f(a, b))."""
+        expr = self.parse_primary()
+
+        while self.current_token.type == TokenType.LPAREN:
+            self.advance()
+            arguments = []
+            if not self.check(TokenType.RPAREN):
+                arguments.append(self.parse_expression())
+                while self.match(TokenType.COMMA):
+                    arguments.append(self.parse_expression())
+            self.consume(TokenType.RPAREN, "Expect ')' after arguments.")
+            expr = FunctionCall(expr, arguments)
+
+        return expr
 
     def parse_primary(self) -> Expression:
         """Analyse une expression primaire (littéral, variable, parenthèses)."""
-        if self.match(TokenType.NUMBER):
-            return Literal(float(self.previous().lexeme))
+        token = self.current_token
+
+        match token.type:
+            case TokenType.NUMBER:
+                self.advance()
+                return Literal(float(token.lexeme))
 
-        if self.match(TokenType.IDENTIFIER):
-            return Variable(self.previous())
+            case TokenType.IDENTIFIER:
+                self.advance()
+                return Variable(token)
 
-        if self.match(TokenType.LPAREN):
-            expr = self.parse_expression()
-            self.consume(TokenType.RPAREN, "Expected ')' after expression.")
-            return expr
+            case TokenType.LPAREN:
+                self.advance()
+                expr = self.parse_expression()
+                self.consume(TokenType.RPAREN, "Expected ')' after expression.")
+                return expr
 
-        if self.match(TokenType.MATCH):
-            return self.parse_match_expression()
+            case TokenType.MATCH:
+                self.advance()
+                return self.parse_match_expression()
 
         raise SyntaxError(
-            f"Unexpected token. token: {self.peek().lexeme}, line: {self.peek().line}"
+            f"Unexpected token. token: {token.lexeme}, line: {token.line}"
         )
 
     def parse_match_expression(self) -> Expression:
@@ -281,28 +319,24 @@ class Parser:
     # Utils
     ##########################################################################
 
-    def binary_left(
-        self,
-        operand_fn: Callable[[], Expression],
-        operators: list[TokenType],
-    ) -> Expression:
-        """Helper pour analyser les opérations binaires associatives à gauche."""
-        left = operand_fn()
-
-        while self.match(*operators):
-            operator = self.previous()
-            right = operand_fn()
-            left = Binary(left, operator, right)
+    def pull(self) -> Token:
+        """Lit le token suivant du flux, ou un EOF si le flux est épuisé."""
+        if self.lookahead:
+            return self.lookahead.popleft()
 
-        return left
+        token = next(self.tokens, None)
+        if token is None:
+            line = self.current_token.line if self.current_token is not None else 1
+            return Token(TokenType.EOF, "", line)
+        return token
 
     def is_at_end(self) -> bool:
         """Vérifie si on a atteint la fin des tokens."""
-        return self.peek().type == TokenType.EOF
+        return self.current_token.type == TokenType.EOF
 
     def peek(self) -> Token:
         """Retourne le token courant sans avancer."""
-        return self.tokens[self.current]
+        return self.current_token
 
     def match(self, *types: TokenType) -> bool:
         """Vérifie si le token courant correspond à un type donné et avance."""
@@ -314,20 +348,22 @@ class Parser:
 
     def previous(self) -> Token:
         """Retourne le token précédent."""
-        return self.tokens[self.current - 1]
+        return self.previous_token
 
     def check(self, token_type: TokenType) -> bool:
         """Vérifie le type du token courant sans avancer."""
 
         if self.is_at_end():
             return False
-        return self.peek().type == token_type
+        return self.current_token.type == token_type
 
     def advance(self) -> Token:
         """Avance au token suivant."""
         if not self.is_at_end():
+            self.previous_token = self.current_token
+            self.current_token = self.pull()
             self.current += 1
-        return self.previous()
+        return self.previous_token
 
     def consume(self, token_type: TokenType, error_message: str) -> Token:
         """Consomme le token attendu ou lève une erreur."""
@@ -335,18 +371,11 @@ class Parser:
             return self.advance()
         raise SyntaxError(f"{error_message} at line {self.peek().line}")
 
-    @property
-    def current_token(self) -> Token:
-        return self.tokens[self.current]
-
-    @property
-    def previous_token(self) -> Token | None:
-        if self.current <= 0:
-            return None
-        return self.tokens[self.current - 1]
-
     @property
     def next_token(self) -> Token | None:
-        if self.current >= len(self.tokens) - 1:
+        """Token suivant le token courant, lu à l'avance depuis le flux."""
+        if self.is_at_end():
             return None
-        return self.tokens[self.current + 1]
+        if not self.lookahead:
+            self.lookahead.append(self.pull())
+        return self.lookahead[0]
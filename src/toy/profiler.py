@@ -0,0 +1,154 @@
+import time
+from typing import Any, Callable
+
+from toy.ast_nodes import BlockStatement, FunctionDeclarationStatement, Statement
+from toy.hooks import Instrumentation
+from toy.interpreter import Completion
+
+
+class ProfileEntry:
+    """Mesures d'une fonction Toy ou d'une ligne du source."""
+    __slots__ = ("name", "line", "calls", "inclusive", "exclusive", "active")
+
+    def __init__(self, name: str, line: int) -> None:
+        self.name = name
+        self.line = line
+        self.calls = 0
+        # Temps total, appels récursifs comptés une seule fois
+        self.inclusive = 0.0
+        # Temps total moins celui des fonctions (ou des lignes) imbriquées
+        self.exclusive = 0.0
+        # Nombre d'exécutions en cours, pour ne compter l'inclusif qu'au niveau le plus externe
+        self.active = 0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "line": self.line,
+            "calls": self.calls,
+            "inclusive": self.inclusive,
+            "exclusive": self.exclusive,
+        }
+
+
+class Profiler(Instrumentation):
+    """Attribue le temps d'exécution aux fonctions Toy et aux lignes du source.
+
+    Les fonctions et les lignes ont chacune leur pile de mesures en cours :
+    le temps exclusif d'une fonction exclut celui des fonctions qu'elle
+    appelle, celui d'une ligne exclut celui des instructions imbriquées,
+    y compris dans les fonctions appelées. Un appel terminal est exécuté
+    après le retour de l'appelant et n'est donc pas compté dans son temps.
+
+    Le profileur est l'instrumentation de l'interpréteur (voir toy.hooks),
+    branchée à sa construction ; sans lui, l'exécution ne fait aucune mesure.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.functions: dict[tuple[str, int], ProfileEntry] = {}
+        self.lines: dict[int, ProfileEntry] = {}
+        # Mesures en cours : [début, temps des mesures imbriquées]
+        self.function_stack: list[list[float]] = []
+        self.line_stack: list[list[float]] = []
+
+    def function_entry(self, declaration: FunctionDeclarationStatement) -> ProfileEntry:
+        """Entrée d'une déclaration de fonction, créée au premier appel."""
+        key = (declaration.name.lexeme, declaration.line)
+        entry = self.functions.get(key)
+        if entry is None:
+            entry = self.functions[key] = ProfileEntry(*key)
+        return entry
+
+    def line_entry(self, line: int) -> ProfileEntry:
+        """Entrée d'une ligne du source, partagée par toutes ses instructions."""
+        entry = self.lines.get(line)
+        if entry is None:
+            entry = self.lines[line] = ProfileEntry(f"line {line}", line)
+        return entry
+
+    def measure(self, stack: list[list[float]], entry: ProfileEntry, function: Callable, argument: Any) -> Any:
+        """Appelle function(argument) en attribuant le temps écoulé à entry."""
+        clock = self.clock
+        entry.calls += 1
+        entry.active += 1
+        frame = [clock(), 0.0]
+        stack.append(frame)
+        try:
+            return function(argument)
+        finally:
+            elapsed = clock() - frame[0]
+            stack.pop()
+            entry.active -= 1
+            if not entry.active:
+                entry.inclusive += elapsed
+            entry.exclusive += elapsed - frame[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+    def instrument_statement(self, stmt: Statement, run: Callable[[Any], Completion | None]) -> Callable[[Any], Completion | None]:
+        """Enveloppe l'exécution d'une instruction pour la mesurer sur sa ligne.
+
+        Un bloc n'est pas mesuré : ses instructions le sont, chacune sur sa ligne.
+        """
+        if isinstance(stmt, BlockStatement):
+            return run
+
+        entry = self.line_entry(stmt.line)
+        measure, stack = self.measure, self.line_stack
+
+        def measured_statement(argument):
+            return measure(stack, entry, run, argument)
+
+        return measured_statement
+
+    def instrument_execute(self, interpreter, execute: Callable[[Statement], Completion | None]) -> Callable[[Statement], Completion | None]:
+        """Enveloppe Interpreter.execute du parcours d'AST : chaque instruction est mesurée sur sa ligne."""
+        measure, stack, line_entry = self.measure, self.line_stack, self.line_entry
+
+        def measured_execute(stmt):
+            if isinstance(stmt, BlockStatement):
+                return execute(stmt)
+            return measure(stack, line_entry(stmt.line), execute, stmt)
+
+        return measured_execute
+
+    def instrument_function(self, declaration: FunctionDeclarationStatement, body: Callable[[Any], Completion | None]) -> Callable[[Any], Completion | None]:
+        """Enveloppe le corps d'une fonction pour mesurer chacun de ses appels."""
+        entry = self.function_entry(declaration)
+        measure, stack = self.measure, self.function_stack
+
+        def measured_function(argument):
+            return measure(stack, entry, body, argument)
+
+        return measured_function
+
+    def report(self, source_lines: list[str] | None = None, limit: int | None = None) -> str:
+        """Rapport texte : fonctions puis lignes, par temps exclusif décroissant."""
+        header = f"{'calls':>10} {'inclusive':>10} {'exclusive':>10}  location"
+        report = ["Functions:", header]
+        for entry in self.sorted_entries(self.functions)[:limit]:
+            report.append(f"{self.format_times(entry)}  {entry.name} (line {entry.line})")
+
+        report += ["", "Lines:", header]
+        for entry in self.sorted_entries(self.lines)[:limit]:
+            location = entry.name
+            if source_lines and 0 < entry.line <= len(source_lines):
+                location += f": {source_lines[entry.line - 1].strip()}"
+            report.append(f"{self.format_times(entry)}  {location}")
+        return "\n".join(report)
+
+    def to_json(self) -> dict[str, Any]:
+        """Mesures sérialisables en JSON, triées comme le rapport."""
+        return {
+            "functions": [entry.to_json() for entry in self.sorted_entries(self.functions)],
+            "lines": [entry.to_json() for entry in self.sorted_entries(self.lines)],
+        }
+
+    @staticmethod
+    def sorted_entries(entries: dict[Any, ProfileEntry]) -> list[ProfileEntry]:
+        return sorted(entries.values(), key=lambda entry: entry.exclusive, reverse=True)
+
+    @staticmethod
+    def format_times(entry: ProfileEntry) -> str:
+        return f"{entry.calls:>10} {entry.inclusive:>10.4f} {entry.exclusive:>10.4f}"
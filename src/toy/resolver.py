@@ -0,0 +1,322 @@
+from toy.ast_nodes import *
+from toy.tokens import Token
+
+
+class Scope:
+    """Portée locale en cours de résolution."""
+
+    def __init__(self, function: FunctionDeclarationStatement | None, params: int = 0) -> None:
+        self.function = function
+        self.params = params
+        self.slots: dict[str, int] = {}
+        self.pending: list[FunctionDeclarationStatement] = []
+        # Fonction en attente dont le corps est en cours de résolution
+        self.resolving: FunctionDeclarationStatement | None = None
+        # Variables utilisées par une fonction en attente sans autre liaison :
+        # (nom de la fonction, nom de la variable, slot)
+        self.forward_reads: set[tuple[str, str, int]] = set()
+        # Appels d'une fonction de la portée par son propre code : (Token appelé, slots déclarés)
+        self.calls: list[tuple[Token, int]] = []
+
+
+class Resolution:
+    """Résultat du Resolver, indexé par identité des nœuds de l'AST."""
+
+    def __init__(self) -> None:
+        # Variable / VariableAssignment -> (profondeur, slot, lecture à vérifier)
+        self.locals: dict[int, tuple[int, int, bool]] = {}
+        # VarStatement / FunctionDeclarationStatement locale -> slot
+        self.declarations: dict[int, int] = {}
+        # BlockStatement / ForStatement / FunctionDeclarationStatement -> nombre de slots
+        self.scope_sizes: dict[int, int] = {}
+        # Fonctions déclarant des fonctions imbriquées : leur frame peut survivre à l'appel
+        self.escaping: set[int] = set()
+        # Déclaration locale (ou Token de paramètre) en double -> erreur levée à son exécution
+        self.errors: dict[int, str] = {}
+        # Diagnostics non bloquants, par ligne : (Token, message)
+        self.undefined: list[tuple[Token, str]] = []
+        # Variable capturée -> adresses à essayer tant qu'elle n'est pas déclarée
+        # (profondeur, slot, paramètre), puis la globale si aucune ne convient
+        self.fallbacks: dict[int, tuple[tuple[int, int, bool], ...]] = {}
+
+    def address(self, node: ASTNode) -> tuple[int, int, bool] | None:
+        """Adresse d'une variable locale, ou None pour une variable globale."""
+        return self.locals.get(id(node))
+
+    def fallback(self, node: ASTNode) -> tuple[tuple[int, int, bool], ...] | None:
+        """Liaisons englobantes d'une variable capturée non encore déclarée.
+
+        None signifie qu'une adresse encore vide désigne une variable indéfinie
+        (paramètre sans argument) ; une suite vide renvoie à la globale.
+        """
+        return self.fallbacks.get(id(node))
+
+    def slot(self, node: ASTNode) -> int | None:
+        """Slot d'une déclaration locale, ou None pour une déclaration globale."""
+        return self.declarations.get(id(node))
+
+    def scope_size(self, node: ASTNode) -> int:
+        """Nombre de slots à allouer pour la portée ouverte par le nœud."""
+        return self.scope_sizes[id(node)]
+
+    def frame_escapes(self, function: FunctionDeclarationStatement) -> bool:
+        """Indique si une closure peut garder une référence à la frame de la fonction."""
+        return id(function) in self.escaping
+
+    def error(self, node: ASTNode | Token) -> str | None:
+        """Erreur à lever quand la déclaration s'exécute, ou None."""
+        return self.errors.get(id(node))
+
+
+class Resolver:
+    """Attribue à chaque variable locale une adresse fixe (profondeur, slot).
+
+    Chaque bloc et chaque appel de fonction correspond à un SlotEnvironment ;
+    la profondeur compte les environnements à remonter. Les variables non
+    locales sont globales et restent recherchées par nom. Le corps d'une
+    fonction est résolu à la fermeture de la portée qui la déclare, afin de
+    voir les variables déclarées après elle, comme à l'exécution.
+
+    Le Resolver ne lève aucune erreur : comme avec les autres moteurs, une
+    variable indéfinie n'est signalée que lorsqu'elle est lue ou assignée, et
+    une déclaration en double lorsqu'elle s'exécute (voir Resolution.error).
+    Une fonction jamais appelée ne fait donc jamais échouer le programme.
+
+    Les erreurs probables sont seulement notées dans Resolution.undefined :
+    variable globale déclarée nulle part, et variable locale lue par une
+    fonction appelée avant la déclaration, sans liaison englobante.
+    """
+
+    def __init__(self) -> None:
+        self.scopes: list[Scope] = []
+        self.function: FunctionDeclarationStatement | None = None
+        self.pending: list[FunctionDeclarationStatement] = []
+        self.globals: set[str] = set()
+        # Erreurs probables si la variable n'est pas globale : (nom, Token signalé, message)
+        self.unresolved: list[tuple[str, Token, str]] = []
+        self.resolution = Resolution()
+
+    def resolve(self, statements: list[Statement]) -> Resolution:
+        """Résout un programme et note les variables probablement indéfinies."""
+        for statement in statements:
+            self.resolve_statement(statement)
+        self.resolve_pending(self.pending)
+
+        self.resolution.undefined = sorted(
+            ((token, message) for name, token, message in self.unresolved if name not in self.globals),
+            key=lambda item: item[0].line,
+        )
+        return self.resolution
+
+    ##########################################################################
+    # Statements
+    ##########################################################################
+
+    def resolve_statement(self, stmt: Statement) -> None:
+        """Résout une instruction."""
+        match stmt:
+            case ExpressionStatement(expression):
+                self.resolve_expression(expression)
+
+            case VarStatement(name, initializer):
+                if initializer is not None:
+                    self.resolve_expression(initializer)
+                self.declare(stmt, name)
+
+            case FunctionDeclarationStatement(name) as st:
+                self.declare(st, name)
+                if self.function is not None:
+                    self.resolution.escaping.add(id(self.function))
+                if self.scopes:
+                    self.scopes[-1].pending.append(st)
+                else:
+                    self.pending.append(st)
+
+            case PrintStatement(expression):
+                self.resolve_expression(expression)
+
+            case IfStatement(condition, then_branch, else_branch):
+                self.resolve_expression(condition)
+                self.resolve_statement(then_branch)
+                if else_branch is not None:
+                    self.resolve_statement(else_branch)
+
+            case WhileStatement(condition, body):
+                self.resolve_expression(condition)
+                self.resolve_statement(body)
+
+            case ForStatement(initializer, condition, increment, body):
+                self.begin_scope()
+                if initializer is not None:
+                    self.resolve_statement(initializer)
+                if condition is not None:
+                    self.resolve_expression(condition)
+                if increment is not None:
+                    self.resolve_expression(increment)
+                self.resolve_statement(body)
+                self.end_scope(stmt)
+
+            case BlockStatement(statements) if not stmt.needs_scope:
+                for statement in statements:
+                    self.resolve_statement(statement)
+
+            case BlockStatement(statements):
+                self.begin_scope()
+                for statement in statements:
+                    self.resolve_statement(statement)
+                self.end_scope(stmt)
+
+            case ReturnStatement(_, value):
+                if value is not None:
+                    self.resolve_expression(value)
+
+            case _:
+                raise ValueError(f"Unknown statement: {stmt}")
+
+    def resolve_function(self, function: FunctionDeclarationStatement) -> None:
+        """Résout le corps d'une fonction dans une portée contenant ses paramètres."""
+        enclosing = self.function
+        self.function = function
+        self.scopes.append(Scope(function, len(function.parameters)))
+
+        for param in function.parameters:
+            self.declare(None, param)
+        for statement in function.body:
+            self.resolve_statement(statement)
+
+        self.end_scope(function)
+        self.function = enclosing
+
+    def resolve_pending(self, functions: list[FunctionDeclarationStatement]) -> None:
+        """Résout les corps de fonctions différés jusqu'à la fin de leur portée."""
+        for function in functions:
+            self.resolve_function(function)
+
+    ##########################################################################
+    # Expressions
+    ##########################################################################
+
+    def resolve_expression(self, expr: Expression) -> None:
+        """Résout une expression."""
+        match expr:
+            case Literal():
+                pass
+
+            case Binary(left, _, right):
+                self.resolve_expression(left)
+                self.resolve_expression(right)
+
+            case Unary(_, right):
+                self.resolve_expression(right)
+
+            case Variable(name):
+                self.resolve_local(expr, name)
+
+            case VariableAssignment(name, value):
+                self.resolve_expression(value)
+                self.resolve_local(expr, name)
+
+            case FunctionCall(callee, arguments):
+                self.resolve_expression(callee)
+                if isinstance(callee, Variable):
+                    self.record_call(callee.name)
+                for argument in arguments:
+                    self.resolve_expression(argument)
+
+            case MatchExpression(subject, cases):
+                self.resolve_expression(subject)
+                for match_case in cases:
+                    self.resolve_expression(match_case.pattern)
+                    self.resolve_expression(match_case.body)
+
+            case _:
+                raise ValueError(f"Unknown expression: {expr}")
+
+    ##########################################################################
+    # Utils
+    ##########################################################################
+
+    def begin_scope(self) -> None:
+        """Ouvre une portée locale."""
+        self.scopes.append(Scope(self.function))
+
+    def end_scope(self, owner: ASTNode) -> None:
+        """Résout les fonctions en attente puis ferme la portée."""
+        scope = self.scopes[-1]
+        for function in scope.pending:
+            scope.resolving = function
+            self.resolve_function(function)
+        self.check_forward_reads(scope)
+        self.resolution.scope_sizes[id(owner)] = len(scope.slots)
+        self.scopes.pop()
+
+    def check_forward_reads(self, scope: Scope) -> None:
+        """Note les appels faits avant la déclaration d'une variable que la fonction utilise."""
+        for call, declared in scope.calls:
+            for function, name, slot in scope.forward_reads:
+                if function == call.lexeme and declared <= slot:
+                    message = f"Variable '{name}' is used by '{function}' before its declaration."
+                    self.unresolved.append((name, call, message))
+
+    def record_call(self, name: Token) -> None:
+        """Note l'appel d'une fonction locale par le code de la fonction qui la déclare."""
+        for scope in reversed(self.scopes):
+            if name.lexeme in scope.slots:
+                if scope.function is self.function:
+                    scope.calls.append((name, len(scope.slots)))
+                return
+
+    def declare(self, node: ASTNode | None, name: Token) -> None:
+        """Déclare une variable dans la portée courante (un paramètre si node est None)."""
+        if not self.scopes:
+            self.globals.add(name.lexeme)
+            return
+
+        scope = self.scopes[-1]
+        if name.lexeme in scope.slots:
+            self.resolution.errors[id(node if node is not None else name)] = f"Variable '{name.lexeme}' already defined."
+            return
+
+        slot = len(scope.slots)
+        scope.slots[name.lexeme] = slot
+        if node is not None:
+            self.resolution.declarations[id(node)] = slot
+
+    def resolve_local(self, node: Expression, name: Token) -> None:
+        """Calcule l'adresse d'une variable, laissée globale si elle n'est pas locale.
+
+        Le corps d'une fonction voit les variables déclarées après elle dans
+        sa portée : tant qu'elles ne le sont pas, le moteur arborescent lit la
+        liaison englobante. Ces lectures gardent donc la suite des liaisons
+        englobantes (Resolution.fallback), jusqu'au premier paramètre.
+        """
+        fallbacks = None
+        for depth, scope in enumerate(reversed(self.scopes)):
+            slot = scope.slots.get(name.lexeme)
+            if slot is None:
+                continue
+
+            param = slot < scope.params
+            if fallbacks is not None:
+                fallbacks.append((depth, slot, param))
+                if param:
+                    break
+                continue
+
+            # Un paramètre peut manquer à l'appel, et une variable capturée peut
+            # être lue avant sa déclaration : ces lectures sont vérifiées.
+            checked = scope.function is not self.function or param
+            self.resolution.locals[id(node)] = (depth, slot, checked)
+            if not checked or param:
+                return
+            fallbacks = []
+            first, first_slot = scope, slot
+
+        if fallbacks is None:
+            message = f"Undefined variable '{name.lexeme}'." if isinstance(node, VariableAssignment) else f"Variable '{name.lexeme}' is not defined."
+            self.unresolved.append((name.lexeme, name, message))
+            return
+
+        self.resolution.fallbacks[id(node)] = tuple(fallbacks)
+        if not fallbacks and first.resolving is not None:
+            first.forward_reads.add((first.resolving.name.lexeme, name.lexeme, first_slot))
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from typing import Any, Callable
+
+from toy.ast_nodes import BlockStatement, FunctionDeclarationStatement, Statement
+from toy.hooks import Instrumentation
+from toy.interpreter import Completion
+
+
+# Secondes entre deux échantillons ; en pratique au moins l'intervalle de
+# bascule entre threads de Python (sys.getswitchinterval(), 5 ms par défaut)
+DEFAULT_INTERVAL = 0.005
+
+# Nom du cadre de premier niveau, hors de toute fonction
+PROGRAM_FRAME = "<program>"
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class SamplingProfiler(Instrumentation):
+    """Profileur par échantillonnage de la pile d'appels Toy.
+
+    Branché sur l'interpréteur comme un Profiler, il ne mesure rien pendant
+    l'exécution : chaque appel de fonction empile un cadre [nom, ligne] et
+    chaque instruction met à jour la ligne du cadre courant. Un thread relève
+    cette pile à intervalle régulier tant que l'échantillonnage est actif
+    (start/stop) ; les échantillons identiques consécutifs sont fusionnés.
+
+    Les résultats s'exportent au format « collapsed stacks » de Brendan Gregg
+    (flamegraph.pl, inferno) ou en JSON pour speedscope.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.interval = interval
+        self.clock = clock
+        self.stack: list[list[Any]] = [[PROGRAM_FRAME, 0]]
+        # Cadres rencontrés, (nom, ligne) -> indice
+        self.frames: dict[tuple[str, int], int] = {}
+        # Échantillons : piles d'indices de cadres, nombre de relevés et durée couverte
+        self.samples: list[tuple[int, ...]] = []
+        self.counts: list[int] = []
+        self.weights: list[float] = []
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.last_sample = 0.0
+
+    ##########################################################################
+    # Suivi de la pile d'appels Toy
+    ##########################################################################
+
+    def instrument_statement(self, stmt: Statement, run: Callable[[Any], Completion | None]) -> Callable[[Any], Completion | None]:
+        """Enveloppe une instruction pour qu'elle devienne la ligne courante de son cadre."""
+        if isinstance(stmt, BlockStatement):
+            return run
+
+        line, stack = stmt.line, self.stack
+
+        def sampled_statement(argument):
+            frame = stack[-1]
+            previous = frame[1]
+            frame[1] = line
+            try:
+                return run(argument)
+            finally:
+                frame[1] = previous
+
+        return sampled_statement
+
+    def instrument_execute(self, interpreter, execute: Callable[[Statement], Completion | None]) -> Callable[[Statement], Completion | None]:
+        """Enveloppe Interpreter.execute du parcours d'AST, comme instrument_statement."""
+        stack = self.stack
+
+        def sampled_execute(stmt):
+            frame = stack[-1]
+            previous = frame[1]
+            frame[1] = stmt.line or previous
+            try:
+                return execute(stmt)
+            finally:
+                frame[1] = previous
+
+        return sampled_execute
+
+    def instrument_function(self, declaration: FunctionDeclarationStatement, body: Callable[[Any], Completion | None]) -> Callable[[Any], Completion | None]:
+        """Enveloppe le corps d'une fonction pour empiler son cadre pendant l'appel."""
+        name, line, stack = declaration.name.lexeme, declaration.line, self.stack
+
+        def sampled_function(argument):
+            stack.append([name, line])
+            try:
+                return body(argument)
+            finally:
+                stack.pop()
+
+        return sampled_function
+
+    ##########################################################################
+    # Échantillonnage
+    ##########################################################################
+
+    def start(self) -> None:
+        """Lance le thread d'échantillonnage."""
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.last_sample = self.clock()
+        self.thread = threading.Thread(target=self.run, name="toy-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Arrête le thread d'échantillonnage ; les échantillons sont conservés."""
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+    def clear(self) -> None:
+        """Oublie les échantillons relevés jusqu'ici."""
+        self.frames = {}
+        self.samples, self.counts, self.weights = [], [], []
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Relève la pile d'appels Toy courante."""
+        now = self.clock()
+        weight, self.last_sample = now - self.last_sample, now
+
+        frames = self.frames
+        stack = []
+        # La pile peut changer pendant le relevé : l'échantillon reste une pile plausible
+        for name, line in list(self.stack):
+            key = (name, line)
+            index = frames.get(key)
+            if index is None:
+                index = frames[key] = len(frames)
+            stack.append(index)
+        stack = tuple(stack)
+
+        if self.samples and self.samples[-1] == stack:
+            self.counts[-1] += 1
+            self.weights[-1] += weight
+        else:
+            self.samples.append(stack)
+            self.counts.append(1)
+            self.weights.append(weight)
+
+    ##########################################################################
+    # Export
+    ##########################################################################
+
+    def frame_names(self) -> list[str]:
+        return [f"{name}:{line}" for name, line in self.frames]
+
+    def collapsed(self) -> str:
+        """Piles au format collapsed : « cadre;cadre;... nombre », une par ligne."""
+        names = self.frame_names()
+        totals: dict[tuple[int, ...], int] = {}
+        for stack, count in zip(self.samples, self.counts):
+            totals[stack] = totals.get(stack, 0) + count
+        return "".join(f"{';'.join(names[index] for index in stack)} {count}\n" for stack, count in totals.items())
+
+    def speedscope(self, name: str = "toy") -> dict[str, Any]:
+        """Profil échantillonné au format JSON de speedscope, poids en secondes."""
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "toy",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": function, "line": line} for function, line in self.frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(self.weights),
+                    "samples": [list(stack) for stack in self.samples],
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+    def write(self, path: str, name: str = "toy") -> None:
+        """Écrit les échantillons en JSON speedscope (fichier .json) ou en collapsed stacks."""
+        with open(path, "w") as f:
+            if str(path).endswith(".json"):
+                json.dump(self.speedscope(name), f)
+            else:
+                f.write(self.collapsed())
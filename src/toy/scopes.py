@@ -0,0 +1,24 @@
+from toy.ast_nodes import *
+
+
+DECLARATIONS = (VarStatement, FunctionDeclarationStatement)
+
+
+def elide_scopes(statements: list[Statement]) -> int:
+    """Marque les blocs qui ne déclarent rien comme n'ayant pas besoin de portée.
+
+    Un tel bloc ne peut ni définir ni masquer une variable : l'exécuter dans
+    la portée englobante résout chaque nom de la même façon, sans allouer
+    d'environnement ni allonger la chaîne des portées. Les blocs imbriqués
+    sont examinés séparément. Retourne le nombre de portées retirées.
+    """
+    elided = 0
+
+    for statement in statements:
+        for node in iter_nodes(statement):
+            if isinstance(node, BlockStatement) and node.needs_scope:
+                if not any(isinstance(child, DECLARATIONS) for child in node.statements):
+                    node.needs_scope = False
+                    elided += 1
+
+    return elided
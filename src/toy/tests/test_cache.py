@@ -0,0 +1,126 @@
+import os
+
+from toy import main
+from toy.cache import CACHE_DIRECTORY, ASTCache
+from toy.lexer import Lexer
+from toy.optimizer import Optimizer
+from toy.parser import Parser
+
+
+SOURCE = b"fn add(a, b) { return a + b; }\nfor (var i = 0; i < 3; i = i + 1) print add(i, 2 * 3);\n"
+
+
+def parse(source: bytes) -> list:
+    return Parser(Lexer(source.decode()).tokenize()).parse()
+
+
+def write_script(directory, name: str = "script.toy", source: bytes = SOURCE):
+    path = directory / name
+    path.write_bytes(source)
+    return path
+
+
+def test_load_returns_stored_ast(tmp_path):
+    path = write_script(tmp_path)
+    cache = ASTCache()
+    assert cache.load(path, SOURCE) is None
+
+    cache.store(path, SOURCE, parse(SOURCE))
+    assert cache.load(path, SOURCE) == parse(SOURCE)
+    assert (tmp_path / CACHE_DIRECTORY).is_dir()
+
+
+def test_optimized_variant_is_separate(tmp_path):
+    path = write_script(tmp_path)
+    cache = ASTCache()
+    optimized = Optimizer().optimize(parse(SOURCE))
+    cache.store(path, SOURCE, optimized, optimized=True)
+
+    assert cache.load(path, SOURCE) is None
+    assert cache.load(path, SOURCE, optimized=True) == optimized
+
+
+def test_changed_source_or_format_is_a_miss(tmp_path):
+    path = write_script(tmp_path)
+    ASTCache().store(path, SOURCE, parse(SOURCE))
+
+    assert ASTCache().load(path, SOURCE + b"print 1;") is None
+
+    other_format = ASTCache()
+    other_format.signature += b"changed"
+    assert other_format.load(path, SOURCE) is None
+
+
+def test_corrupted_entry_is_removed(tmp_path):
+    path = write_script(tmp_path)
+    cache = ASTCache()
+    cache.store(path, SOURCE, parse(SOURCE))
+    entry = cache.entry_path(path, optimized=False)
+    entry.write_bytes(entry.read_bytes()[:-10])
+
+    assert cache.load(path, SOURCE) is None
+    assert not entry.exists()
+
+
+def test_evicts_least_recently_used_and_orphaned_entries(tmp_path):
+    cache = ASTCache()
+    paths = [write_script(tmp_path, f"s{n}.toy") for n in range(3)]
+    for n, path in enumerate(paths):
+        cache.store(path, SOURCE, parse(SOURCE))
+        entry = cache.entry_path(path, optimized=False)
+        os.utime(entry, (n, n))
+    size = cache.entry_path(paths[0], optimized=False).stat().st_size
+
+    # s0 est relu : s1 devient la plus ancienne entrée
+    assert cache.load(paths[0], SOURCE) is not None
+    paths[2].unlink()
+    cache.max_bytes = 2 * size
+    cache.store(paths[0], SOURCE, parse(SOURCE))
+
+    remaining = sorted(p.name for p in (tmp_path / CACHE_DIRECTORY).iterdir())
+    assert remaining == ["s0.toy.ast.toyc", "s1.toy.ast.toyc"]
+
+    cache.max_bytes = size
+    cache.store(paths[0], SOURCE, parse(SOURCE))
+    assert sorted(p.name for p in (tmp_path / CACHE_DIRECTORY).iterdir()) == ["s0.toy.ast.toyc"]
+
+
+def test_run_file_reuses_cached_ast(tmp_path, capsys, monkeypatch):
+    path = write_script(tmp_path)
+    monkeypatch.setattr(main, "cache", ASTCache())
+    monkeypatch.setattr(main, "interpreter", main.Interpreter())
+    main.run_file(str(path))
+    expected = capsys.readouterr().out
+
+    def fail(self):
+        raise AssertionError("source parsed again")
+
+    monkeypatch.setattr(Parser, "parse", fail)
+    monkeypatch.setattr(main, "interpreter", main.Interpreter())
+    main.run_file(str(path))
+    assert capsys.readouterr().out == expected == "6.0\n7.0\n8.0\n"
+
+
+def test_file_key_is_read_in_chunks(tmp_path, monkeypatch):
+    path = write_script(tmp_path)
+    cache = ASTCache()
+    monkeypatch.setattr("toy.cache.CHUNK_SIZE", 7)
+
+    with open(path, "rb") as f:
+        assert cache.key(f) == cache.key(SOURCE)
+
+
+def test_run_file_streams_the_source(tmp_path, capsys, monkeypatch):
+    path = write_script(tmp_path)
+    monkeypatch.setattr(main, "cache", ASTCache())
+    monkeypatch.setattr(main, "interpreter", main.Interpreter())
+
+    def fail(self):
+        raise AssertionError("whole source read in memory")
+
+    monkeypatch.setattr(type(path), "read_bytes", fail)
+    main.run_file(str(path))
+    monkeypatch.setattr(main, "interpreter", main.Interpreter())
+    main.run_file(str(path))
+    assert capsys.readouterr().out == "6.0\n7.0\n8.0\n" * 2
+    assert ASTCache().load(path, SOURCE) is not None
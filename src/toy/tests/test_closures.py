@@ -0,0 +1,198 @@
+import pytest
+from toy.closures import CompiledFunction
+from toy.interpreter import CountedLoop, Interpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+def parse(source: str) -> list:
+    tokens = Lexer(source).tokenize()
+    return Parser(tokens).parse()
+
+
+def interpret(source: str, compiled: bool = True) -> Interpreter:
+    interpreter = Interpreter(compiled=compiled)
+    interpreter.interpret(parse(source))
+    return interpreter
+
+
+PROGRAMS = [
+    "print 3 + 2 * 4; print 3 + 2 > 4; print -2 + 3; print !(1 == 1);",
+    "var a = 1; { var a = 2; print a; } print a;",
+    "var a = 1; { print a; var a = a + 1; print a; }",
+    "var i = 0; while (i < 3) { print i; i = i + 1; }",
+    "if (1 > 2) print 1; else print 2; if (2 > 1) print 3;",
+    "var x = 2; print match x { case 1 => 10, case 2 => 20 };",
+    "var a = 1; print a = a + 5; print a;",
+    "for (var i = 0; i < 3; i = i + 1) { var j = i * 2; print j; }",
+    "var n = 3; for (var i = n; i >= 0; i = i - 1.5) print i;",
+    "var i = 0; for (; i < 2;) { print i; i = i + 1; } for (i = 5; i < 7; i = i + 1) print i;",
+    "fn f() { for (var i = 0; i < 10; i = i + 1) if (i == 3) return i; } print f();",
+]
+
+
+@pytest.mark.parametrize("source", PROGRAMS)
+def test_compiled_matches_tree_walker(source, capsys):
+    interpret(source, compiled=False)
+    expected = capsys.readouterr().out
+
+    interpret(source)
+    assert capsys.readouterr().out == expected
+
+
+def test_compiled_does_not_dispatch_through_execute(monkeypatch, capsys):
+    def fail(*args):
+        raise AssertionError("tree walker used")
+
+    monkeypatch.setattr(Interpreter, "execute", fail)
+    monkeypatch.setattr(Interpreter, "evaluate", fail)
+
+    interpret("var i = 0; while (i < 3) { i = i + 1; } print i;")
+    assert capsys.readouterr().out == "3.0\n"
+
+
+def test_counted_loop_is_recognized():
+    counted, general = parse("""
+    for (var i = 0; i < 10; i = i + 2) print i;
+    for (var i = 0; i < 10; i = i * 2) print i;
+    """)
+    loop = CountedLoop.recognize(counted)
+
+    assert loop.name == "i"
+    assert loop.step == 2.0
+    assert loop.compare(1.0, 10.0)
+    assert CountedLoop.recognize(general) is None
+
+
+def test_counted_loop_sees_body_assignments(capsys):
+    interpret("for (var i = 0; i < 10; i = i + 1) { print i; i = i + 4; }")
+    assert capsys.readouterr().out == "0.0\n5.0\n"
+
+
+def test_compiled_functions_and_closures(capsys):
+    source = """
+    fn fib(n) {
+        if (n < 2) return n;
+        return fib(n - 1) + fib(n - 2);
+    }
+    print fib(10);
+
+    fn counter() {
+        var count = 0;
+        fn increment() {
+            count = count + 1;
+            return count;
+        }
+        return increment;
+    }
+    var next = counter();
+    next();
+    print next();
+    """
+    interpreter = interpret(source)
+    assert capsys.readouterr().out == "55.0\n2.0\n"
+    assert isinstance(interpreter.environment.get("fib"), CompiledFunction)
+
+
+def test_compiled_global_environment_is_shared():
+    interpreter = interpret("var a = 1; var b = 2; { var c = 3; b = 10; }")
+
+    assert interpreter.environment.get("a") == 1.0
+    assert interpreter.environment.get("b") == 10.0
+    with pytest.raises(RuntimeError):
+        interpreter.environment.get("c")
+
+
+def test_compiled_errors():
+    with pytest.raises(RuntimeError, match="Variable 'y' is not defined."):
+        interpret("print y;")
+    with pytest.raises(RuntimeError, match="Undefined variable 'y'."):
+        interpret("y = 1;")
+    with pytest.raises(RuntimeError, match="already defined"):
+        interpret("var a = 1; var a = 2;")
+    with pytest.raises(RuntimeError, match="No match for value"):
+        interpret("match 5 { case 1 => 10 };")
+    with pytest.raises(ValueError, match="Unknown function call"):
+        interpret("var a = 1; a();")
+
+
+def test_frames_are_recycled_between_calls(capsys):
+    interpreter = interpret("""
+    fn add(a, b) { var c = a + b; return c; }
+    print add(1, 2);
+    print add(3, 4);
+    """)
+    assert capsys.readouterr().out == "3.0\n7.0\n"
+
+    add = interpreter.environment.get("add")
+    assert len(add.free_frames) == 1
+    frame = add.free_frames[0]
+    add.call([5.0, 6.0])
+    assert add.free_frames == [frame]
+
+
+def test_recycled_frames_reset_missing_parameters():
+    interpreter = interpret("fn first(a, b) { return a; } first(1, 2);")
+    first = interpreter.environment.get("first")
+    assert first.call([7.0]) == 7.0
+
+    interpreter.interpret(parse("fn second(a, b) { return b; } second(1, 2);"))
+    second = interpreter.environment.get("second")
+    with pytest.raises(RuntimeError, match="Variable 'b' is not defined."):
+        second.call([1.0])
+
+
+def test_frames_captured_by_closures_are_not_recycled(capsys):
+    interpreter = interpret("""
+    fn make(n) {
+        fn get() { return n; }
+        return get;
+    }
+    var a = make(1);
+    var b = make(2);
+    print a();
+    print b();
+    """)
+    assert capsys.readouterr().out == "1.0\n2.0\n"
+    assert interpreter.environment.get("make").free_frames is None
+
+
+def test_recursion_uses_distinct_frames(capsys):
+    interpret("""
+    fn fib(n) {
+        if (n < 2) return n;
+        return fib(n - 1) + fib(n - 2);
+    }
+    print fib(15);
+    """)
+    assert capsys.readouterr().out == "610.0\n"
+
+
+TAIL_RECURSION = """
+fn sum(n, acc) {
+    if (n == 0) return acc;
+    return sum(n - 1, acc + n);
+}
+fn is_even(n) { if (n == 0) return 1; return is_odd(n - 1); }
+fn is_odd(n) { if (n == 0) return 0; return is_even(n - 1); }
+print sum(DEPTH, 0);
+print is_even(DEPTH + 1);
+"""
+
+
+@pytest.mark.parametrize("compiled, depth", [(True, 100000), (False, 20000)])
+def test_tail_calls_use_constant_stack(compiled, depth, capsys):
+    interpret(TAIL_RECURSION.replace("DEPTH", str(depth)), compiled=compiled)
+    assert capsys.readouterr().out == f"{depth * (depth + 1) / 2}\n0.0\n"
+
+
+def test_tail_calls_reuse_frame():
+    interpreter = interpret(TAIL_RECURSION.replace("DEPTH", "50"))
+    assert len(interpreter.environment.get("sum").free_frames) == 1
+
+
+def test_tail_call_errors_are_reported():
+    with pytest.raises(ValueError, match="Unknown function call"):
+        interpret("var a = 1; fn f() { return a(); } f();")
+    with pytest.raises(ValueError, match="Unknown function call"):
+        interpret("var a = 1; fn f() { return a(); } f();", compiled=False)
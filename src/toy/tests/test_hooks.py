@@ -0,0 +1,109 @@
+import pytest
+from toy.closures import CompiledFunction
+from toy.hooks import Hooks
+from toy.interpreter import Interpreter, ToyFunction
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+SOURCE = """fn add(a, b) {
+    return a + b;
+}
+var total = 0;
+total = add(total, 2);
+print total;
+"""
+
+
+def parse(source: str) -> list:
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def run(compiled: bool, hooks: Hooks, source: str = SOURCE) -> Interpreter:
+    interpreter = Interpreter(compiled=compiled, instrumentation=hooks)
+    interpreter.interpret(parse(source))
+    return interpreter
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_statement_events_follow_source_lines(compiled, capsys):
+    hooks = Hooks()
+    lines = []
+    hooks.add("statement", lambda stmt, env: lines.append(stmt.line))
+
+    run(compiled, hooks)
+
+    assert lines == [1, 4, 5, 2, 6]
+    assert capsys.readouterr().out == "2.0\n"
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_call_and_return_events(compiled, capsys):
+    hooks = Hooks()
+    events = []
+    hooks.add("call", lambda declaration, arguments: events.append(("call", declaration.name.lexeme, list(arguments))))
+    hooks.add("return", lambda declaration, value: events.append(("return", declaration.name.lexeme, value)))
+
+    run(compiled, hooks)
+
+    assert events == [("call", "add", [0, 2]), ("return", "add", 2)]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_return_event_follows_tail_call(compiled, capsys):
+    hooks = Hooks()
+    events = []
+    hooks.add("call", lambda declaration, arguments: events.append(("call", declaration.name.lexeme)))
+    hooks.add("return", lambda declaration, value: events.append(("return", declaration.name.lexeme, value)))
+
+    run(compiled, hooks, """
+    fn g(x) { return x * 2; }
+    fn f(x) { return g(x + 1); }
+    print f(1);
+    """)
+
+    assert events == [("call", "f"), ("call", "g"), ("return", "g", 4), ("return", "f", 4)]
+    assert capsys.readouterr().out == "4.0\n"
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_assign_events_for_definitions_and_assignments(compiled, capsys):
+    hooks = Hooks()
+    assigned = []
+    hooks.add("assign", lambda name, value: assigned.append((name, value)))
+
+    run(compiled, hooks)
+
+    assert assigned == [("total", 0), ("total", 2)]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_callbacks_can_be_removed(compiled, capsys):
+    hooks = Hooks()
+    calls = []
+    callback = hooks.add("call", lambda declaration, arguments: calls.append(declaration.name.lexeme))
+    hooks.remove("call", callback)
+
+    run(compiled, hooks)
+
+    assert calls == []
+
+
+def test_unknown_event_is_rejected():
+    with pytest.raises(ValueError, match="Unknown hook event: line"):
+        Hooks().add("line", print)
+
+
+def test_no_instrumentation_leaves_tree_interpreter_unchanged():
+    interpreter = Interpreter(compiled=False)
+
+    assert interpreter.execute.__func__ is Interpreter.execute
+    assert interpreter.evaluate.__func__ is Interpreter.evaluate
+    assert interpreter.function_type is ToyFunction
+
+
+def test_no_instrumentation_compiles_plain_functions(capsys):
+    interpreter = Interpreter()
+    interpreter.interpret(parse(SOURCE))
+
+    assert type(interpreter.environment.values["add"]) is CompiledFunction
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+from toy import main
+from toy.interpreter import Interrupted
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+FOREVER = [
+    "while (1) { }",
+    "for (;;) { }",
+    "for (var i = 0; i < 1; i = i * 1) { }",
+    "fn f() { return f(); } f();",
+]
+
+
+def parse(source: str) -> list:
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+@pytest.mark.parametrize("source", FOREVER)
+def test_interrupt_stops_program(engine, source):
+    interpreter = main.ENGINES[engine]()
+    timer = threading.Timer(0.05, interpreter.interrupt)
+    timer.start()
+    with pytest.raises(Interrupted, match="Execution interrupted."):
+        interpreter.interpret(parse(source))
+    timer.join()
+
+    # La demande est consommée : l'exécution suivante n'est pas interrompue
+    assert interpreter.interrupt_reason is None
+    interpreter.interpret(parse("var x = 1; while (x < 10) x = x + 1;"))
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_interrupt_reason_is_reported(engine, capsys):
+    main.interpreter = main.ENGINES[engine]()
+    main.interpreter.interrupt("Stopped.")
+    main.run("while (1) { }")
+    assert capsys.readouterr().out == "Error: Stopped.\n"
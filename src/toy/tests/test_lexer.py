@@ -0,0 +1,124 @@
+import gc
+import io
+import mmap
+
+import pytest
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.tokens import Token, TokenType
+
+
+SOURCES = [
+    "",
+    "var a = 1;\nprint a;",
+    "a==b a=>b a=b a<=b a<b a>=b a>b a!=b !a",
+    "fn add(a, b) {\n\treturn a + b;\r\n}\n\n",
+    "match x { case 1 => 2, case 3 => 4 }",
+    "for (var i = 0; i < 10; i = i + 1) print i * 2 / 3 - 4;",
+    "1.5 3.25 007 12abc a_b1 if else while true false null and or",
+    "\n\n   \n",
+]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_pattern_matches_character_scanner(source):
+    assert Lexer(source).tokenize() == Lexer(source).scan_tokens()
+
+
+@pytest.mark.parametrize("source", ["var a = 1;\n  @", "a\n\nb # c", "_x", "1.\n.5"])
+def test_pattern_reports_same_errors(source):
+    with pytest.raises(SyntaxError) as scanned:
+        Lexer(source).scan_tokens()
+    with pytest.raises(SyntaxError, match=str(scanned.value)):
+        Lexer(source).tokenize()
+
+
+def test_non_ascii_source_uses_character_scanner():
+    tokens = Lexer("var café = 1;").tokenize()
+    assert tokens[1] == Token(TokenType.IDENTIFIER, "café", 1)
+
+
+def test_tokenize_line_numbers():
+    tokens = Lexer("a\n\nb\n").tokenize()
+    assert [(token.lexeme, token.line) for token in tokens] == [("a", 1), ("b", 3), ("", 4)]
+
+
+def test_tokenize_restores_garbage_collector():
+    assert gc.isenabled()
+    with pytest.raises(SyntaxError):
+        Lexer("var a = 1;\n@").tokenize()
+    assert gc.isenabled()
+
+    gc.disable()
+    try:
+        Lexer("var a = 1;").tokenize()
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+STREAMED = "var a = 1;\nfn f(x) {\n  return x * 2;\n}\nprint f(a) == 2;\n"
+
+
+def test_iter_tokens_reads_files_and_mmap(tmp_path):
+    path = tmp_path / "program.toy"
+    path.write_text(STREAMED)
+    expected = Lexer(STREAMED).tokenize()
+
+    with open(path) as text_file:
+        assert list(Lexer(text_file).iter_tokens()) == expected
+    with open(path, "rb") as binary_file:
+        assert list(Lexer(binary_file).iter_tokens()) == expected
+        with mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert list(Lexer(mapped).iter_tokens()) == expected
+
+
+def test_iter_tokens_is_lazy():
+    tokens = Lexer(io.StringIO("var a = 1;\nprint a;\n@")).iter_tokens()
+    assert next(tokens) == Token(TokenType.VAR, "var", 1)
+    # L'erreur de la dernière ligne n'apparaît qu'en l'atteignant
+    with pytest.raises(SyntaxError, match="line: 3"):
+        list(tokens)
+
+
+def test_parser_consumes_token_stream():
+    expected = Parser(Lexer(STREAMED).tokenize()).parse()
+    assert Parser(Lexer(io.StringIO(STREAMED)).iter_tokens()).parse() == expected
+
+
+def test_parser_lookahead_window():
+    parser = Parser(Lexer("a = 1;").iter_tokens())
+    assert parser.peek().lexeme == "a"
+    assert parser.next_token.lexeme == "="
+    parser.advance()
+    assert parser.previous().lexeme == "a"
+    assert parser.peek().lexeme == "="
+    assert len(parser.lookahead) == 0
+
+
+def test_parser_adds_missing_eof():
+    tokens = Lexer("print 1;").tokenize()[:-1]
+    assert Parser(iter(tokens)).parse() == Parser(Lexer("print 1;").tokenize()).parse()
+    assert Parser([]).parse() == []
+
+
+@pytest.mark.parametrize("source", SOURCES + ["var café = 1;\nprint café;"])
+def test_token_buffer_matches_tokenize(source):
+    buffer = Lexer(source).tokenize_buffer()
+    tokens = Lexer(source).tokenize()
+
+    assert len(buffer) == len(tokens)
+    assert list(buffer) == tokens
+    assert buffer[-1] == tokens[-1]
+    assert [buffer.type_at(i) for i in range(len(buffer))] == [t.type for t in tokens]
+
+
+def test_token_buffer_reports_errors():
+    with pytest.raises(SyntaxError, match="line: 2"):
+        Lexer("var a = 1;\n  @").tokenize_buffer()
+
+
+def test_parser_runs_on_token_buffer():
+    source = "fn add(a, b) { return a + b; }\nfor (var i = 0; i < 3; i = i + 1) print add(i, 2);"
+    buffer = Lexer(source).tokenize_buffer()
+    assert Parser(buffer).parse() == Parser(Lexer(source).tokenize()).parse()
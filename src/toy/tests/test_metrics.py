@@ -0,0 +1,201 @@
+import pytest
+from toy import main
+from toy.environment import Environment
+from toy.lexer import Lexer
+from toy.metrics import Metrics
+from toy.parser import Parser
+
+
+SOURCE = """fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fn counter() {
+    var count = 0;
+    fn add(step) {
+        count = count + step;
+        return count;
+    }
+    return add;
+}
+var add = counter();
+for (var i = 0; i < 3; i = i + 1) {
+    add(i);
+}
+{
+    var x = fib(6);
+    print x;
+}
+"""
+
+# Boucles et match dont les lectures dépendent du nombre de tours et du cas choisi
+LOOPS = """fn first_over(limit, n) {
+    var i = 0;
+    while (i < n) {
+        if (i * i > limit) return i;
+        i = i + 1;
+    }
+    return n;
+}
+var total = 0;
+var n = 4;
+for (var j = 0; j < n; j = j + 1) {
+    total = total + first_over(j, n);
+}
+for (var k = 1; k * 2 < n + total; k = k + k) {
+    total = total + match k { case n => k, case 1 => total, case 2 => n + n, case k => 0 };
+}
+var w = 0;
+while (w < 3) w = w + 1;
+print total;
+"""
+
+
+def parse(source: str) -> list:
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def stats(engine: str, capsys) -> dict:
+    interpreter = main.ENGINES[engine](counting=True)
+    interpreter.interpret(parse(SOURCE))
+    assert capsys.readouterr().out == "8.0\n"
+    return interpreter.stats()
+
+
+@pytest.mark.parametrize("engine", ["closure", "tree", "stack"])
+def test_interpreters_count_statements_calls_and_depth(engine, capsys):
+    result = stats(engine, capsys)
+
+    assert result["statements"] == 69
+    assert result["calls"] == 29
+    assert result["peak_call_depth"] == 6
+    assert result["execute_time"] > 0
+
+
+def test_closure_counts_allocated_frames_and_static_depth(capsys):
+    result = stats("closure", capsys)
+
+    # fib et add réutilisent leurs frames ; seules celles de counter sont capturées
+    assert result["environments"] == 10
+    assert result["lookups"] == 105
+    assert result["lookup_depth"] == 6
+
+
+def test_closure_counts_reads_like_the_tree_engine(capsys):
+    results = []
+    for engine in ("closure", "tree"):
+        interpreter = main.ENGINES[engine](counting=True)
+        interpreter.interpret(parse(LOOPS))
+        results.append(interpreter.stats())
+    closure, tree = results
+
+    assert capsys.readouterr().out == "26.0\n26.0\n"
+    assert closure["statements"] == tree["statements"] == 51
+    assert closure["lookups"] == tree["lookups"] == 135
+
+
+@pytest.mark.parametrize("engine", ["tree", "stack"])
+def test_tree_engines_count_environments_walked(engine, capsys):
+    result = stats(engine, capsys)
+
+    assert result["environments"] == 34
+    assert result["lookup_depth"] == 64
+    # Le moteur à pile relit le compteur du for à chaque tour
+    assert result["lookups"] == (105 if engine == "tree" else 112)
+
+
+def test_vm_counts_calls_only(capsys):
+    result = stats("vm", capsys)
+
+    assert result["calls"] == result["environments"] == 29
+    assert result["peak_call_depth"] == 6
+    assert result["statements"] == result["lookups"] == 0
+
+
+@pytest.mark.parametrize("engine", ["closure", "tree", "stack"])
+def test_call_depth_is_restored_after_an_error(engine):
+    interpreter = main.ENGINES[engine](counting=True)
+    with pytest.raises(RuntimeError):
+        interpreter.interpret(parse("fn f(n) { if (n == 0) print match n { case 1 => 1 }; return f(n - 1) + 1; } f(3);"))
+
+    assert interpreter.metrics.call_depth == 0
+    assert interpreter.stats()["peak_call_depth"] == 4
+
+
+def test_sites_of_released_code_are_folded_into_counters():
+    interpreter = main.ENGINES["closure"](counting=True)
+    interpreter.interpret(parse("fn f(n) { return n + 1; }"))
+    live = len(interpreter.metrics.sites)
+
+    for _ in range(50):
+        interpreter.interpret(parse("f(1); { f(2); }"))
+
+    # Seuls les sites de f, encore appelable, restent suivis : les autres
+    # sont repliés dès la libération de leur code, sans attendre le ramasse-miettes
+    assert len(interpreter.metrics.sites) == live
+    assert interpreter.metrics.statements == 1 + 50 * 2
+    result = interpreter.stats()
+    assert result["statements"] == 1 + 50 * 4
+    assert result["lookups"] == 50 * 4
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_counters_are_off_by_default(engine, capsys):
+    interpreter = main.ENGINES[engine]()
+    interpreter.interpret(parse(SOURCE))
+    assert capsys.readouterr().out == "8.0\n"
+
+    result = interpreter.stats()
+    assert all(result[name] == 0 for name in ("statements", "calls", "environments", "lookups", "peak_call_depth"))
+    assert result["execute_time"] > 0
+    assert not interpreter.metrics.sites
+
+
+def test_lookup_returns_value_and_depth():
+    outer = Environment()
+    outer.define("a", 1)
+    inner = Environment(Environment(outer))
+
+    assert inner.lookup("a") == (1, 2)
+    with pytest.raises(RuntimeError, match="Variable 'b' is not defined."):
+        inner.lookup("b")
+
+
+def test_prometheus_text_format():
+    metrics = Metrics()
+    metrics.calls = 3
+    metrics.peak_call_depth = 2
+    metrics.record_front_end(0.25, 1.0)
+
+    text = metrics.prometheus()
+
+    assert "# TYPE toy_calls_total counter\ntoy_calls_total 3\n" in text
+    assert "# TYPE toy_peak_call_depth gauge\ntoy_peak_call_depth 2\n" in text
+    assert 'toy_phase_seconds_total{phase="lex"} 0.25\n' in text
+    assert 'toy_phase_seconds_total{phase="parse"} 0.75\n' in text
+    assert text.endswith('toy_phase_seconds_total{phase="execute"} 0.0\n')
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_run_records_front_end_phases(pipeline, capsys):
+    main.interpreter = main.ENGINES["closure"](counting=True)
+    main.run(SOURCE, pipeline=pipeline)
+
+    result = main.interpreter.stats()
+    assert capsys.readouterr().out == "8.0\n"
+    assert result["lex_time"] > 0
+    assert result["parse_time"] > 0
+    assert result["statements"] == 69
+
+
+def test_main_writes_metrics_at_exit(tmp_path, capsys):
+    script = tmp_path / "program.toy"
+    script.write_text(SOURCE)
+    output = tmp_path / "metrics.prom"
+
+    main.main([str(script), "--no-cache", "--metrics", str(output)])
+
+    text = output.read_text()
+    assert "toy_statements_total 69\n" in text
+    assert "toy_calls_total 29\n" in text
+    assert 'toy_phase_seconds_total{phase="lex"}' in text
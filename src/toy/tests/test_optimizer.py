@@ -0,0 +1,84 @@
+import pytest
+from toy.ast_nodes import *
+from toy.interpreter import Interpreter, StackInterpreter
+from toy.lexer import Lexer
+from toy.optimizer import Optimizer
+from toy.parser import Parser
+from toy.vm import VM
+
+
+def parse(source: str) -> list:
+    tokens = Lexer(source).tokenize()
+    return Parser(tokens).parse()
+
+
+def optimize(source: str) -> list:
+    return Optimizer().optimize(parse(source))
+
+
+def test_folds_literal_operations():
+    ast = optimize("print 2 * 60 * 60; print -(1); print !(1 == 2); print 1 + 2 > 2;")
+    assert [stmt.expression for stmt in ast] == [
+        Literal(7200.0), Literal(-1.0), Literal(True), Literal(True),
+    ]
+
+
+def test_leaves_failing_operations_for_runtime():
+    ast = optimize("print 1 / 0;")
+    assert isinstance(ast[0].expression, Binary)
+
+
+def test_propagates_constant_variables():
+    ast = optimize("var a = 2; var b = a * 3; fn f(x) { return x + b; }")
+    assert ast[1].initializer == Literal(6.0)
+    assert ast[2].body[0].value.right == Literal(6.0)
+
+
+def test_does_not_propagate_reassigned_or_shadowed_variables():
+    ast = optimize("var a = 1; a = 2; print a; var b = 1; { var b = 2; print b; }")
+    assert isinstance(ast[2].expression, Variable)
+    assert isinstance(ast[4].statements[1].expression, Variable)
+
+
+def test_does_not_propagate_before_declaration():
+    ast = optimize("fn f() { return a; } var a = 1;")
+    assert isinstance(ast[0].body[0].value, Variable)
+
+
+def test_drops_constant_if_branches():
+    ast = optimize("if (1 > 2) print 1; else print 2; if (0) print 3; print 4;")
+    assert ast == [PrintStatement(Literal(2.0)), PrintStatement(Literal(4.0))]
+
+
+def test_input_ast_is_unchanged():
+    ast = parse("var a = 2 * 3; print a;")
+    Optimizer().optimize(ast)
+    assert isinstance(ast[0].initializer, Binary)
+
+
+PROGRAMS = [
+    "var h = 2 * 60 * 60; var i = 0; while (i < h / 3600) { print i * h; i = i + 1; }",
+    "var a = 1; { var a = 2; print a; } print a;",
+    "var a = 1; a = a + 1; print a;",
+    "fn f() { return g; } var g = 5; print f();",
+    "{ fn f() { return x; } var x = 1; print f(); }",
+    "if (1 == 1) { var a = 1; print a; } else print 2; if (0) { var b = 1; } print -(1);",
+    "var k = 2; print match k { case 1 => 10, case 2 => 20 };",
+    "print 1 / 0;",
+    "print missing; var missing = 1;",
+]
+
+
+@pytest.mark.parametrize("engine", [
+    Interpreter, lambda: Interpreter(compiled=False), StackInterpreter, VM,
+])
+@pytest.mark.parametrize("source", PROGRAMS)
+def test_optimized_program_has_same_output(engine, source, capsys):
+    def run(ast):
+        try:
+            engine().interpret(ast)
+        except Exception as e:
+            print(type(e).__name__, e)
+        return capsys.readouterr().out
+
+    assert run(Optimizer().optimize(parse(source))) == run(parse(source))
@@ -0,0 +1,48 @@
+import pytest
+from toy import main
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+PROGRAMS = [
+    "var a = 1; { var a = 2; print a; } print a;",
+    "fn f() { return g(); } fn g() { return 5; } print f();",
+    "var h = 2 * 60; for (var i = 0; i < 3; i = i + 1) print i * h;",
+    "fn count(n) { if (n == 0) return 0; return count(n - 1); } print count(50);",
+    "var k = 2; print match k { case 1 => 10, case 2 => 20 };",
+    "print 1; if (1 == 1) return 2; print 3;",
+    "print missing; print 1;",
+]
+
+
+def run(engine: str, source: str, capsys, **options) -> str:
+    main.interpreter = main.ENGINES[engine]()
+    main.run(source, **options)
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+@pytest.mark.parametrize("source", PROGRAMS)
+def test_pipeline_has_same_output(engine, source, capsys):
+    expected = run(engine, source, capsys)
+    assert run(engine, source, capsys, pipeline=True) == expected
+    assert run(engine, source, capsys, pipeline=True, optimize=True) == expected
+
+
+def test_iter_declarations_is_lazy():
+    declarations = Parser(Lexer("print 1; print (;").iter_tokens()).iter_declarations()
+    assert next(declarations) is not None
+    with pytest.raises(SyntaxError):
+        next(declarations)
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_pipeline_runs_statements_before_later_syntax_errors(engine, capsys):
+    source = "print 1; print (;"
+    assert run(engine, source, capsys).startswith("Error")
+    assert run(engine, source, capsys, pipeline=True).startswith("1.0\nError")
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_pipeline_stops_parsing_at_top_level_return(engine, capsys):
+    assert run(engine, "print 1; return 0; print (;", capsys, pipeline=True) == "1.0\n"
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+from toy import main
+from toy.interpreter import Interpreter
+from toy.lexer import Lexer
+from toy.optimizer import Optimizer
+from toy.parser import Parser
+from toy.profiler import Profiler
+
+
+SOURCE = """fn fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+var total = 0;
+for (var i = 0; i < 10; i = i + 1) {
+    total = total + fib(5);
+}
+print total;
+"""
+
+
+def parse(source: str) -> list:
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+class Clock:
+    """Horloge qui avance d'une unité à chaque lecture."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+def profile(compiled: bool, source: str = SOURCE) -> Profiler:
+    profiler = Profiler(Clock())
+    Interpreter(compiled=compiled, instrumentation=profiler).interpret(parse(source))
+    return profiler
+
+
+def test_statements_record_their_line():
+    fib, var, loop, show = parse(SOURCE)
+    assert [fib.line, var.line, loop.line, show.line] == [1, 5, 6, 9]
+    assert [statement.line for statement in fib.body] == [2, 3]
+    assert loop.body.statements[0].line == 7
+
+
+def test_optimizer_keeps_lines():
+    optimized = Optimizer().optimize(parse(SOURCE))
+    assert [statement.line for statement in optimized] == [1, 5, 6, 9]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_counts_calls_and_line_executions(compiled, capsys):
+    profiler = profile(compiled)
+    assert capsys.readouterr().out == "50.0\n"
+
+    (fib,) = profiler.functions.values()
+    assert (fib.name, fib.line, fib.calls) == ("fib", 1, 150)
+    # Ligne 2 : 150 if, plus le return des 80 appels où n < 2
+    assert profiler.lines[2].calls == 230
+    assert profiler.lines[3].calls == 70
+    assert profiler.lines[7].calls == 10
+    assert profiler.lines[9].calls == 1
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_inclusive_and_exclusive_times(compiled, capsys):
+    profiler = profile(compiled)
+    lines = profiler.lines
+
+    # Le temps d'une ligne contient celui des instructions imbriquées, y compris dans fib
+    assert lines[6].inclusive > lines[7].inclusive > profiler.functions["fib", 1].inclusive
+    for entry in [*lines.values(), *profiler.functions.values()]:
+        assert 0 < entry.exclusive <= entry.inclusive or entry.active
+    # Chaque unité de temps est attribuée une seule fois à une ligne
+    assert sum(entry.exclusive for entry in lines.values()) == sum(
+        lines[line].inclusive for line in (1, 5, 6, 9)
+    )
+
+
+def test_recursive_calls_count_inclusive_time_once():
+    profiler = profile(True, "fn count(n) { if (n == 0) return 0; return 1 + count(n - 1); } print count(50);")
+    (count,) = profiler.functions.values()
+
+    assert count.calls == 51
+    assert count.inclusive == pytest.approx(profiler.lines[1].inclusive, rel=0.1)
+    assert count.inclusive == count.exclusive
+
+
+def test_no_profiler_leaves_interpreter_unchanged():
+    interpreter = Interpreter(compiled=False)
+    assert interpreter.instrumentation is None
+    assert interpreter.execute.__func__ is Interpreter.execute
+
+
+def test_main_profile_report_and_json(tmp_path, capsys):
+    script = tmp_path / "fib.toy"
+    script.write_text(SOURCE)
+    output = tmp_path / "profile.json"
+
+    main.main([str(script), "--no-cache", "--profile", "--profile-json", str(output)])
+    captured = capsys.readouterr()
+    assert captured.out == "50.0\n"
+    assert "fib (line 1)" in captured.err
+    assert "line 7: total = total + fib(5);" in captured.err
+
+    data = json.loads(output.read_text())
+    assert data["functions"][0]["name"] == "fib"
+    assert data["functions"][0]["calls"] == 150
+    assert {entry["line"] for entry in data["lines"]} == {1, 2, 3, 5, 6, 7, 9}
+
+
+def test_main_profile_needs_supported_engine(tmp_path):
+    script = tmp_path / "fib.toy"
+    script.write_text(SOURCE)
+    with pytest.raises(SystemExit):
+        main.main([str(script), "--engine", "vm", "--profile"])
@@ -0,0 +1,229 @@
+import pytest
+from toy import main
+from toy.environment import Environment, SlotEnvironment
+from toy.interpreter import Interpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.resolver import Resolver
+
+
+def parse(source: str) -> list:
+    tokens = Lexer(source).tokenize()
+    return Parser(tokens).parse()
+
+
+def interpret(source: str) -> Interpreter:
+    interpreter = Interpreter()
+    interpreter.interpret(parse(source))
+    return interpreter
+
+
+def test_resolver_addresses():
+    ast = parse("""
+    var g = 0;
+    {
+        var a = 1;
+        {
+            var b = a;
+            g = b;
+        }
+    }
+    """)
+    resolution = Resolver().resolve(ast)
+
+    outer = ast[1]
+    inner = outer.statements[1]
+    read_a = inner.statements[0].initializer
+    assign_g = inner.statements[1].expression
+    read_b = assign_g.value
+
+    assert resolution.address(read_a) == (1, 0, False)
+    assert resolution.address(read_b) == (0, 0, False)
+    assert resolution.address(assign_g) is None
+    assert resolution.scope_size(outer) == 1
+    assert resolution.slot(ast[0]) is None
+
+
+def test_resolver_function_addresses():
+    ast = parse("""
+    fn outer(x) {
+        var y = 2;
+        fn inner() { return x + y; }
+        return inner;
+    }
+    """)
+    resolution = Resolver().resolve(ast)
+
+    outer = ast[0]
+    inner = outer.body[1]
+    sum_expr = inner.body[0].value
+
+    assert resolution.scope_size(outer) == 3
+    assert resolution.slot(inner) == 2
+    # Lectures à travers une fonction : vérifiées à l'exécution
+    assert resolution.address(sum_expr.left) == (1, 0, True)
+    assert resolution.address(sum_expr.right) == (1, 1, True)
+
+
+def test_undefined_variable_reported_at_execution(capsys):
+    with pytest.raises(RuntimeError, match="Variable 'missing' is not defined."):
+        interpret("print 1; print missing;")
+    assert capsys.readouterr().out == "1.0\n"
+
+
+def test_undefined_assignment_reported_at_execution(capsys):
+    with pytest.raises(RuntimeError, match="Undefined variable 'missing'."):
+        interpret("print 1; { missing = 2; }")
+    assert capsys.readouterr().out == "1.0\n"
+
+
+def test_duplicate_local_reported_at_execution(capsys):
+    with pytest.raises(RuntimeError, match="Variable 'a' already defined."):
+        interpret("print 1; { var a = 1; print a; var a = 2; }")
+    assert capsys.readouterr().out == "1.0\n1.0\n"
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_errors_in_functions_never_called_are_not_reported(engine, capsys):
+    interpreter = main.ENGINES[engine]()
+    interpreter.interpret(parse("""
+    fn unused(a, a) {
+        var b = 1;
+        var b = 2;
+        missing = undefined;
+    }
+    print 1;
+    """))
+    assert capsys.readouterr().out == "1.0\n"
+
+    with pytest.raises(RuntimeError, match="Variable 'a' already defined."):
+        interpreter.interpret(parse("unused(1, 2);"))
+
+
+def test_function_may_reference_later_global(capsys):
+    interpret("""
+    fn show() { print later; }
+    var later = 5;
+    show();
+    """)
+    assert capsys.readouterr().out == "5.0\n"
+
+
+def test_function_sees_enclosing_local_declared_after_it(capsys):
+    interpret("""
+    fn outer() {
+        fn inner() { return y; }
+        var y = 2;
+        return inner();
+    }
+    print outer();
+    """)
+    assert capsys.readouterr().out == "2.0\n"
+
+
+def test_known_globals_come_from_interpreter_environment(capsys):
+    interpreter = Interpreter()
+    interpreter.interpret(parse("var x = 1;"))
+    interpreter.interpret(parse("print x + 1;"))
+    assert capsys.readouterr().out == "2.0\n"
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_missing_argument_is_undefined(engine, capsys):
+    # Le paramètre masque la variable englobante du même nom, même sans argument
+    interpreter = main.ENGINES[engine]()
+    with pytest.raises(RuntimeError, match="Variable 'b' is not defined."):
+        interpreter.interpret(parse("var b = 7; fn f(a, b) { return b; } print f(1);"))
+
+    interpreter.interpret(parse("fn g(a, b) { b = a + 1; return b; } print g(1); print b;"))
+    assert capsys.readouterr().out == "2.0\n7.0\n"
+
+
+@pytest.mark.parametrize("engine", main.ENGINES)
+def test_local_read_before_declaration_sees_enclosing_binding(engine, capsys):
+    # Tant que x n'est pas déclarée dans le bloc, f lit la globale
+    interpreter = main.ENGINES[engine]()
+    interpreter.interpret(parse("""
+    var x = 1;
+    {
+        fn f() { return x; }
+        fn g() { x = x + 1; }
+        print f();
+        g();
+        var x = 5;
+        print f();
+        g();
+        print x;
+    }
+    print x;
+    """))
+    assert capsys.readouterr().out == "1.0\n5.0\n6.0\n2.0\n"
+
+
+def test_undefined_variables_are_noted_without_failing():
+    resolution = Resolver().resolve(parse("""
+    fn show() { print later + missing; }
+    var later = 1;
+    unknown = 2;
+    {
+        fn early() { return local; }
+        fn late() { return local; }
+        print early();
+        var local = 3;
+        print late();
+    }
+    """))
+    assert [(token.line, message) for token, message in resolution.undefined] == [
+        (2, "Variable 'missing' is not defined."),
+        (4, "Undefined variable 'unknown'."),
+        (8, "Variable 'local' is used by 'early' before its declaration."),
+    ]
+
+
+def test_forward_reads_with_a_binding_are_not_noted():
+    resolution = Resolver().resolve(parse("""
+    var x = 1;
+    { fn f() { return x; } print f(); var x = 5; }
+    fn parity(n) {
+        fn even(n) { if (n == 0) return 1; return odd(n - 1); }
+        fn odd(n) { if (n == 0) return 0; return even(n - 1); }
+        return even(n);
+    }
+    """))
+    assert resolution.undefined == []
+
+
+def test_main_warns_about_undefined_variables(tmp_path, capsys):
+    script = tmp_path / "script.toy"
+    script.write_text("print 1;\nfn f() { return missing; }\nprint 2;\n")
+
+    main.run_file(str(script))
+
+    captured = capsys.readouterr()
+    assert captured.out == "1.0\n2.0\n"
+    assert captured.err == "Warning: line 2: Variable 'missing' is not defined.\n"
+
+
+def test_deep_nesting_uses_fixed_addresses(capsys):
+    interpret("""
+    {
+        var total = 0;
+        {{{{{
+            var i = 0;
+            while (i < 3) { total = total + i; i = i + 1; }
+        }}}}}
+        print total;
+    }
+    """)
+    assert capsys.readouterr().out == "3.0\n"
+
+
+def test_slot_environment_addressing():
+    root = Environment()
+    outer = SlotEnvironment(root, 2)
+    inner = SlotEnvironment(outer, 1)
+
+    inner.assign_at(1, 1, "value")
+    assert outer.slots[1] == "value"
+    assert inner.get_at(1, 1) == "value"
+    assert inner.ancestor(2) is root
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+from toy import main
+from toy.interpreter import Interpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.sampler import PROGRAM_FRAME, SamplingProfiler
+
+
+SOURCE = """fn inner(n) {
+    return n + 1;
+}
+fn outer(n) {
+    var a = n * 2;
+    return inner(a) + 1;
+}
+print outer(1);
+print inner(2);
+"""
+
+
+def parse(source: str) -> list:
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+class SampleOnCall(SamplingProfiler):
+    """Relève un échantillon au début de chaque appel, pour des piles déterministes."""
+
+    def instrument_function(self, declaration, body):
+        def sample_then_run(argument):
+            self.sample()
+            return body(argument)
+
+        return super().instrument_function(declaration, sample_then_run)
+
+
+def names(sampler: SamplingProfiler) -> list[list[str]]:
+    frame_names = sampler.frame_names()
+    return [[frame_names[index] for index in stack] for stack in sampler.samples]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_samples_follow_toy_call_stack(compiled, capsys):
+    sampler = SampleOnCall()
+    Interpreter(compiled=compiled, instrumentation=sampler).interpret(parse(SOURCE))
+
+    assert capsys.readouterr().out == "4.0\n3.0\n"
+    assert names(sampler) == [
+        [f"{PROGRAM_FRAME}:8", "outer:4"],
+        [f"{PROGRAM_FRAME}:8", "outer:6", "inner:1"],
+        [f"{PROGRAM_FRAME}:9", "inner:1"],
+    ]
+    assert sampler.stack == [[PROGRAM_FRAME, 0]]
+
+
+def test_instrumentation_applies_to_later_compilations(capsys):
+    sampler = SampleOnCall()
+    interpreter = Interpreter()
+    interpreter.interpret(parse("fn before() { return 1; }"))
+
+    interpreter.instrumentation = sampler
+    interpreter.interpret(parse("fn during() { return before(); }\nprint during();"))
+    interpreter.instrumentation = None
+    interpreter.interpret(parse("fn after() { return 1; }\nprint after() + during();"))
+
+    assert capsys.readouterr().out == "1.0\n2.0\n"
+    # before et after ne sont pas enveloppées ; during reste suivie après l'arrêt
+    assert names(sampler) == [[f"{PROGRAM_FRAME}:2", "during:1"], [f"{PROGRAM_FRAME}:0", "during:1"]]
+
+
+def test_collapsed_merges_identical_stacks():
+    sampler = SampleOnCall()
+    Interpreter(instrumentation=sampler).interpret(
+        parse("fn f() { return 1; }\nvar i = 0;\nwhile (i < 3) i = i + f();")
+    )
+
+    assert sampler.collapsed() == f"{PROGRAM_FRAME}:3;f:1 3\n"
+    assert sampler.counts == [3]
+
+
+def test_speedscope_profile():
+    sampler = SampleOnCall()
+    Interpreter(instrumentation=sampler).interpret(parse(SOURCE))
+    profile = sampler.speedscope("test.toy")
+
+    frames = profile["shared"]["frames"]
+    (sampled,) = profile["profiles"]
+    assert sampled["type"] == "sampled"
+    assert len(sampled["samples"]) == len(sampled["weights"]) == 3
+    assert [frames[index]["name"] for index in sampled["samples"][1]] == [PROGRAM_FRAME, "outer", "inner"]
+    assert sampled["endValue"] == pytest.approx(sum(sampled["weights"]))
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_error_unwinds_stack(compiled):
+    sampler = SamplingProfiler()
+    interpreter = Interpreter(compiled=compiled, instrumentation=sampler)
+    with pytest.raises(RuntimeError):
+        interpreter.interpret(parse("fn f() {\n return match 1 { case 2 => 3 };\n}\nf();"))
+    # La ligne courante du programme est rétablie elle aussi
+    assert sampler.stack == [[PROGRAM_FRAME, 0]]
+
+
+def test_thread_samples_running_program(capsys):
+    sampler = SamplingProfiler(interval=0.001)
+    interpreter = Interpreter(instrumentation=sampler)
+    sampler.start()
+    interpreter.interpret(parse("fn f(n) { var t = 0; while (t < n) t = t + 1; return t; }\nprint f(100000);"))
+    sampler.stop()
+
+    assert sampler.thread is None
+    assert sum(sampler.counts) > 0
+    assert all(stack[0].startswith(f"{PROGRAM_FRAME}:") for stack in names(sampler))
+    assert any(stack[:2] == [f"{PROGRAM_FRAME}:2", "f:1"] for stack in names(sampler))
+
+
+@pytest.mark.parametrize("suffix", ["collapsed", "json"])
+def test_main_sample_writes_file(suffix, tmp_path, capsys):
+    script = tmp_path / "loop.toy"
+    script.write_text("fn f(n) { var t = 0; while (t < n) t = t + 1; return t; }\nprint f(50000);\n")
+    output = tmp_path / f"samples.{suffix}"
+
+    main.main([str(script), "--no-cache", "--sample", str(output), "--sample-interval", "0.001"])
+    assert capsys.readouterr().out == "50000.0\n"
+
+    if suffix == "json":
+        profile = json.loads(output.read_text())
+        assert profile["profiles"][0]["type"] == "sampled"
+    else:
+        assert output.read_text().startswith(f"{PROGRAM_FRAME}:2")
@@ -0,0 +1,62 @@
+import pytest
+from toy.interpreter import Interpreter, StackInterpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.scopes import elide_scopes
+
+
+def parse(source: str) -> list:
+    tokens = Lexer(source).tokenize()
+    return Parser(tokens).parse()
+
+
+def test_elide_scopes_marks_blocks_without_declarations():
+    ast = parse("""
+    var i = 0;
+    while (i < 3) { i = i + 1; }
+    { var a = 1; if (a == 1) { print a; } }
+    fn f() { { fn g() {} } }
+    """)
+    loop, block, function = ast[1], ast[2], ast[3]
+
+    assert elide_scopes(ast) == 2
+    assert not loop.body.needs_scope
+    assert block.needs_scope
+    assert not block.statements[1].then_branch.needs_scope
+    assert function.body[0].needs_scope
+    # Une seconde passe ne retire plus rien
+    assert elide_scopes(ast) == 0
+
+
+def test_interpreter_counts_elided_scopes():
+    interpreter = Interpreter(compiled=False)
+    interpreter.interpret(parse("var i = 0; while (i < 3) { i = i + 1; } { print i; }"))
+    assert interpreter.elided_scopes == 2
+
+
+SHADOWING = """
+var a = 0;
+fn show() { print a; }
+{
+    var a = 1;
+    {
+        print a;
+        a = a + 1;
+        {
+            var a = 10;
+            { print a; }
+        }
+        show();
+    }
+    print a;
+}
+print a;
+"""
+
+
+@pytest.mark.parametrize("engine", [
+    Interpreter, lambda: Interpreter(compiled=False), StackInterpreter,
+])
+def test_shadowing_is_unchanged(engine, capsys):
+    engine().interpret(parse(SHADOWING))
+    assert capsys.readouterr().out == "1.0\n10.0\n0.0\n2.0\n0.0\n"
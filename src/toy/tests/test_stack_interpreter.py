@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+from toy.interpreter import Interpreter, StackInterpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+
+
+def parse(source: str) -> list:
+    tokens = Lexer(source).tokenize()
+    return Parser(tokens).parse()
+
+
+def interpret(source: str) -> StackInterpreter:
+    interpreter = StackInterpreter()
+    interpreter.interpret(parse(source))
+    return interpreter
+
+
+PROGRAMS = [
+    "print 3 + 2 * 4; print 3 + 2 > 4; print -2 + 3; print !(1 == 1);",
+    "var a = 1; { var a = 2; print a; } print a;",
+    "var i = 0; while (i < 3) { print i; i = i + 1; }",
+    "if (1 > 2) print 1; else print 2; if (2 > 1) print 3;",
+    "var x = 2; print match x { case 1 => 10, case 2 => 20 };",
+    "var a = 1; print a = a + 5; print a;",
+    "fn f(a, b) { { while (a < b) { if (a == 3) return a; a = a + 1; } } } print f(0, 10); print f(5, 1);",
+    "fn make(n) { fn get() { return n; } return get; } var g = make(4); print g();",
+    "fn two() { return 2; } return two(); print 3;",
+]
+
+
+@pytest.mark.parametrize("source", PROGRAMS)
+def test_stack_interpreter_matches_tree_walker(source, capsys):
+    Interpreter(compiled=False).interpret(parse(source))
+    expected = capsys.readouterr().out
+
+    interpret(source)
+    assert capsys.readouterr().out == expected
+
+
+def test_deep_recursion_does_not_use_python_stack(capsys):
+    depth = 100000
+    assert depth > sys.getrecursionlimit()
+
+    interpret(f"""
+    fn count(n) {{
+        if (n == 0) return 0;
+        return 1 + count(n - 1);
+    }}
+    print count({depth});
+    """)
+    assert capsys.readouterr().out == f"{float(depth)}\n"
+
+
+def test_long_expression_chain(capsys):
+    interpret("var a = 1; print " + " + ".join(["a"] * 100000) + ";")
+    assert capsys.readouterr().out == "100000.0\n"
+
+
+def test_environment_restored_after_return_and_errors():
+    interpreter = interpret("var a = 1; fn f() { { var a = 2; return a; } } f();")
+    global_env = interpreter.environment
+
+    with pytest.raises(RuntimeError, match="Variable 'missing' is not defined."):
+        interpreter.interpret(parse("{ var b = 1; { print missing; } }"))
+    assert interpreter.environment is global_env
+    assert interpreter.environment.get("a") == 1.0
+
+
+def test_functions_callable_from_outside():
+    interpreter = interpret("fn add(a, b) { return a + b; }")
+    assert interpreter.environment.get("add").call([1.0, 2.0]) == 3.0
+
+
+def test_stack_interpreter_errors():
+    with pytest.raises(RuntimeError, match="No match for value"):
+        interpret("match 5 { case 1 => 10 };")
+    with pytest.raises(ValueError, match="Unknown function call"):
+        interpret("var a = 1; a();")
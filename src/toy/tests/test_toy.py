@@ -1,6 +1,6 @@
 import pytest
 from toy.ast_nodes import *
-from toy.interpreter import Interpreter
+from toy.interpreter import Interpreter, StackInterpreter
 from toy.lexer import Lexer
 from toy.parser import Parser
 from toy.tokens import TokenType, Token
@@ -258,4 +258,113 @@ def test_while_statement(capsys):
     """
     interpret(source)
     captured = capsys.readouterr()
-    assert captured.out == "0.0\n1.0\n2.0\n3.0\n4.0\n"
\ No newline at end of file
+    assert captured.out == "0.0\n1.0\n2.0\n3.0\n4.0\n"
+
+def test_parse_for_statement():
+    ast = parse("for (var i = 0; i < 3; i = i + 1) print i;")
+    i = Token(TokenType.IDENTIFIER, "i", 1)
+
+    assert ast == [
+        ForStatement(
+            initializer=VarStatement(i, Literal(0.0)),
+            condition=Binary(Variable(i), Token(TokenType.LESS, "<", 1), Literal(3.0)),
+            increment=VariableAssignment(
+                i, Binary(Variable(i), Token(TokenType.PLUS, "+", 1), Literal(1.0))
+            ),
+            body=PrintStatement(Variable(i)),
+        )
+    ]
+
+
+def test_for_statement(capsys):
+    source = """
+    var total = 0;
+    for (var i = 0; i < 5; i = i + 1) {
+        var double = i * 2;
+        total = total + double;
+    }
+    for (; total > 15;) total = total - 4;
+    print total;
+    """
+    interpreter = interpret(source)
+    captured = capsys.readouterr()
+    assert captured.out == "12.0\n"
+
+    # La variable de boucle reste dans la portée du for
+    with pytest.raises(RuntimeError):
+        interpreter.environment.get("i")
+
+
+def test_function_return_value(capsys):
+    source = """
+    fn fib(n) {
+        if (n < 2) return n;
+        return fib(n - 1) + fib(n - 2);
+    }
+    print fib(10);
+    """
+    interpreter = Interpreter(compiled=False)
+    interpreter.interpret(parse(source))
+    captured = capsys.readouterr()
+    assert captured.out == "55.0\n"
+
+
+def test_return_unwinds_nested_blocks_and_loops(capsys):
+    source = """
+    var outer = 1;
+    fn find(limit) {
+        var i = 0;
+        while (i < 10) {
+            {
+                var outer = 2;
+                if (i == limit) {
+                    return i;
+                }
+            }
+            i = i + 1;
+        }
+    }
+    print find(3);
+    print find(20);
+    print outer;
+    """
+    interpreter = Interpreter(compiled=False)
+    interpreter.interpret(parse(source))
+    captured = capsys.readouterr()
+    assert captured.out == "3.0\nNone\n1.0\n"
+    # L'environnement courant est restauré après la sortie anticipée
+    assert interpreter.environment.get("outer") == 1.0
+
+
+def test_parse_associativity_and_prefix_operators():
+    minus = Token(TokenType.MINUS, "-", 1)
+    ast = parse("a = b = 1 - 2 - -!f(3);")
+    a, b, f = (Token(TokenType.IDENTIFIER, name, 1) for name in "abf")
+
+    assert ast == [
+        ExpressionStatement(
+            VariableAssignment(a, VariableAssignment(b, Binary(
+                Binary(Literal(1.0), minus, Literal(2.0)),
+                minus,
+                Unary(minus, Unary(Token(TokenType.BANG, "!", 1), FunctionCall(Variable(f), [Literal(3.0)]))),
+            )))
+        )
+    ]
+
+
+@pytest.mark.parametrize("operator", ["+", "*", "==", "<"])
+def test_parse_long_operator_chains(operator):
+    size = 20000
+    ast = parse(f" {operator} ".join(["1"] * size) + ";")
+    expr = ast[0].expression
+    depth = 0
+    while isinstance(expr, Binary):
+        assert expr.right == Literal(1.0)
+        expr = expr.left
+        depth += 1
+    assert depth == size - 1
+
+
+def test_parse_long_mixed_precedence_chain():
+    ast = parse(" + ".join(["2 * 3 - -1"] * 10000) + ";")
+    assert StackInterpreter().evaluate(ast[0].expression) == 70000.0
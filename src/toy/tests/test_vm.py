@@ -0,0 +1,352 @@
+import pytest
+from toy.bytecode import FunctionProto, OpCode
+from toy.compiler import Compiler
+from toy.interpreter import Interpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.vm import VM
+
+
+def parse(source: str) -> list:
+    tokens = Lexer(source).tokenize()
+    return Parser(tokens).parse()
+
+
+def run_vm(source: str) -> VM:
+    vm = VM()
+    vm.interpret(parse(source))
+    return vm
+
+
+def output_of(source: str, capsys) -> str:
+    run_vm(source)
+    return capsys.readouterr().out
+
+
+def test_vm_while_statement(capsys):
+    source = """
+    var i = 0;
+    while (i < 5) {
+        print i;
+        i = i + 1;
+    }
+    """
+    assert output_of(source, capsys) == "0.0\n1.0\n2.0\n3.0\n4.0\n"
+
+
+def test_vm_for_statement(capsys):
+    source = """
+    var total = 0;
+    for (var i = 0; i < 5; i = i + 1) {
+        var double = i * 2;
+        total = total + double;
+    }
+    print total;
+    """
+    assert output_of(source, capsys) == "20.0\n"
+
+
+def test_vm_block_environment_scope():
+    source = """
+    var a = 1;
+    var b = 2;
+    {
+        var a = 2;
+        var c = 3;
+        b = 10;
+    }
+    """
+    vm = run_vm(source)
+    assert vm.globals["a"] == 1.0
+    assert vm.globals["b"] == 10.0
+    assert "c" not in vm.globals
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        ("print 3 + 2 * 4;", "11.0"),
+        ("print 3 + 2 > 4;", "True"),
+        ("print 3 + 2 == 4;", "False"),
+        ("print -2 + 3;", "1.0"),
+        ("print !(1 < 2);", "False"),
+        ("print 10 / 4 - 1;", "1.5"),
+        ("var a = 1; print a = a + 1;", "2.0"),
+        ("print match 1 + 1 { case 2 => 2 * 2, case 3 => 0 };", "4.0"),
+    ],
+)
+def test_vm_expressions(source, expected, capsys):
+    assert output_of(source, capsys) == expected + "\n"
+
+
+def test_vm_shadowing_reads_outer_before_declaration(capsys):
+    source = """
+    var a = 1;
+    {
+        print a;
+        var a = a + 1;
+        print a;
+    }
+    print a;
+    """
+    assert output_of(source, capsys) == "1.0\n2.0\n1.0\n"
+
+
+def test_vm_if_without_else(capsys):
+    source = """
+    if (1 > 2) print 1;
+    if (2 > 1) print 2;
+    """
+    assert output_of(source, capsys) == "2.0\n"
+
+
+def test_vm_recursive_function(capsys):
+    source = """
+    fn fib(n) {
+        if (n < 2) return n;
+        return fib(n - 1) + fib(n - 2);
+    }
+    print fib(15);
+    """
+    assert output_of(source, capsys) == "610.0\n"
+
+
+def test_vm_deep_recursion_does_not_use_python_stack(capsys):
+    source = """
+    fn depth(n) {
+        if (n == 0) return 0;
+        return 1 + depth(n - 1);
+    }
+    print depth(20000);
+    """
+    assert output_of(source, capsys) == "20000.0\n"
+
+
+def test_vm_closures_share_captured_variable(capsys):
+    source = """
+    fn counter() {
+        var count = 0;
+        fn increment() {
+            count = count + 1;
+            return count;
+        }
+        return increment;
+    }
+    var a = counter();
+    var b = counter();
+    a();
+    a();
+    print a();
+    print b();
+    """
+    assert output_of(source, capsys) == "3.0\n1.0\n"
+
+
+def test_vm_local_recursive_function(capsys):
+    source = """
+    {
+        fn countdown(n) {
+            if (n > 0) {
+                print n;
+                countdown(n - 1);
+            }
+        }
+        countdown(3);
+    }
+    """
+    assert output_of(source, capsys) == "3.0\n2.0\n1.0\n"
+
+
+# Le corps d'une fonction locale voit les variables déclarées après elle dans sa portée
+FORWARD_PROGRAMS = [
+    """
+    fn outer() {
+        fn inner() { return y; }
+        var y = 5;
+        return inner();
+    }
+    print outer();
+    """,
+    """
+    fn parity(n) {
+        fn even(n) { if (n == 0) return 1; return odd(n - 1); }
+        fn odd(n) { if (n == 0) return 0; return even(n - 1); }
+        return even(n);
+    }
+    print parity(7);
+    print parity(10);
+    """,
+    """
+    var y = 1;
+    {
+        print y;
+        fn get() { return y; }
+        fn set(value) { y = value; }
+        { var other = 3; print other; }
+        var y = 2;
+        set(get() + 10);
+        print y;
+    }
+    print y;
+    """,
+    """
+    var x = 1;
+    {
+        fn f() { return x; }
+        print f();
+        var x = 5;
+        print f();
+    }
+    """,
+    """
+    var x = 1;
+    {
+        var x = 2;
+        {
+            fn get() { fn inner() { return x; } return inner(); }
+            fn set(value) { x = value; }
+            set(get() + 10);
+            print get();
+            var x = 3;
+            print get();
+        }
+        print x;
+    }
+    print x;
+    """,
+]
+
+
+@pytest.mark.parametrize("source", FORWARD_PROGRAMS)
+def test_vm_later_local_declarations_match_tree_interpreter(source, capsys):
+    Interpreter(compiled=False).interpret(parse(source))
+    expected = capsys.readouterr().out
+
+    assert output_of(source, capsys) == expected
+
+
+def test_vm_closure_captures_loop_variable_per_iteration(capsys):
+    source = """
+    var first = 0;
+    var i = 0;
+    while (i < 3) {
+        var j = i;
+        fn get() { return j; }
+        if (i == 0) first = get;
+        i = i + 1;
+    }
+    print first();
+    """
+    assert output_of(source, capsys) == "0.0\n"
+
+
+def test_vm_function_without_return_yields_null(capsys):
+    source = """
+    fn nothing() { var x = 1; }
+    print nothing();
+    """
+    assert output_of(source, capsys) == "None\n"
+
+
+def test_vm_globals_persist_between_runs(capsys):
+    vm = VM()
+    vm.interpret(parse("var x = 10; fn double(n) { return n * 2; }"))
+    vm.interpret(parse("print double(x);"))
+    assert capsys.readouterr().out == "20.0\n"
+
+
+def test_vm_undefined_variable():
+    with pytest.raises(RuntimeError, match="Variable 'y' is not defined."):
+        run_vm("print y;")
+
+
+def test_vm_missing_argument_is_undefined():
+    with pytest.raises(RuntimeError, match="Variable 'b' is not defined."):
+        run_vm("fn add(a, b) { return a + b; } add(1);")
+
+
+def test_vm_assign_undefined_variable():
+    with pytest.raises(RuntimeError, match="Undefined variable 'y'."):
+        run_vm("y = 1;")
+
+
+def test_vm_redefinition_errors(capsys):
+    with pytest.raises(RuntimeError, match="Variable 'a' already defined."):
+        run_vm("var a = 1; var a = 2;")
+
+    with pytest.raises(RuntimeError, match="Variable 'b' already defined."):
+        run_vm("{ print 1; var b = 1; var b = 2; }")
+    # L'erreur est levée à l'exécution, après les instructions précédentes
+    assert capsys.readouterr().out == "1.0\n"
+
+
+def test_vm_no_match_error():
+    with pytest.raises(RuntimeError, match="No match for value"):
+        run_vm("match 5 { case 1 => 10 };")
+
+
+def test_vm_call_non_function():
+    with pytest.raises(ValueError, match="Unknown function call"):
+        run_vm("var a = 1; a();")
+
+
+def test_compiler_uses_constant_operand_instructions():
+    proto = Compiler().compile(parse("var i = 0; i = i + 1;"))
+    assert list(proto.chunk.code) == [
+        OpCode.CONSTANT, 0,
+        OpCode.DEFINE_GLOBAL, 1,
+        OpCode.GET_GLOBAL, 1,
+        OpCode.ADD_CONST, 2,
+        OpCode.STORE_GLOBAL, 1,
+        OpCode.CONSTANT, 3,
+        OpCode.RETURN,
+    ]
+    assert proto.chunk.constants == [0.0, "i", 1.0, None]
+
+
+SUPERINSTRUCTION_PROGRAMS = [
+    # JUMP_IF_NOT_LESS_CONST dans if, while et for
+    "var i = 0; while (i < 3) { if (i < 1) print i; i = i + 1; } for (var j = 0; j < 2; j = j + 1) print j;",
+    # MATCH_CONST : motifs littéraux, y compris un cas jamais atteint
+    "fn f(n) { return match n { case 0 => 10, case 1 => 11, case 2 => n * 2 }; } print f(0) + f(1) + f(2);",
+    # ADD_LOCAL_CONST sur une locale, un paramètre garde l'instruction générique
+    "fn sum(n) { var t = 0; var i = 0; while (i < n) { t = t + i; i = i + 1; } n = n + 1; return t + n; } print sum(4);",
+    # ADD_CELL_CONST sur une locale capturée
+    "fn counter() { var c = 0; fn next() { return c; } c = c + 2; c = c + 3; return next(); } print counter();",
+    # GET_GLOBAL_FUNCTION
+    "fn twice(x) { return x * 2; } print twice(twice(3));",
+]
+
+
+@pytest.mark.parametrize("source", SUPERINSTRUCTION_PROGRAMS)
+def test_vm_superinstructions_match_tree_interpreter(source, capsys):
+    Interpreter(compiled=False).interpret(parse(source))
+    expected = capsys.readouterr().out
+
+    assert output_of(source, capsys) == expected
+
+
+def test_compiler_fuses_frequent_sequences():
+    proto = Compiler().compile(parse("fn f(n) { var i = 0; if (i < 2) i = i + 1; return f(i); }"))
+    function = next(value for value in proto.chunk.constants if isinstance(value, FunctionProto))
+    assert list(function.chunk.code) == [
+        OpCode.CONSTANT, 0,
+        OpCode.DEFINE_LOCAL, 1,
+        OpCode.GET_LOCAL, 1,
+        OpCode.JUMP_IF_NOT_LESS_CONST, 12, 1,
+        OpCode.ADD_LOCAL_CONST, 1, 2,
+        OpCode.GET_GLOBAL_FUNCTION, 4, 3,
+        OpCode.GET_LOCAL, 1,
+        OpCode.CALL, 1,
+        OpCode.RETURN,
+        OpCode.CONSTANT, 5,
+        OpCode.RETURN,
+    ]
+    assert function.chunk.constants[:3] == [0.0, 2.0, 1.0]
+
+
+def test_vm_global_function_call_errors():
+    with pytest.raises(RuntimeError, match="Variable 'g' is not defined."):
+        run_vm("g(1);")
+    with pytest.raises(ValueError, match="Unknown function call"):
+        run_vm("var g = 1; g(1);")
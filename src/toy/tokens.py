@@ -1,3 +1,5 @@
+from array import array
+from collections.abc import Iterator
 from dataclasses import dataclass
 from enum import auto, StrEnum
 
@@ -47,9 +49,13 @@ class TokenType(StrEnum):
 
     EOF = auto()
 
-@dataclass
+@dataclass(slots=True)
 class Token:
-    """Représente un token avec son type, son lexème et sa ligne."""
+    """Représente un token avec son type, son lexème et sa ligne.
+
+    Sans __dict__ : un token est créé plus vite et occupe moins de mémoire,
+    ce qui compte pour les centaines de milliers créés par le Lexer.
+    """
     type: TokenType
     lexeme: str
     line: int
@@ -71,3 +77,49 @@ KEYWORDS = {
     "match": TokenType.MATCH,
     "case": TokenType.CASE,
 }
+
+
+# Code sur un octet de chaque type de token, pour TokenBuffer
+TOKEN_TYPE_CODES = {token_type: code for code, token_type in enumerate(TokenType)}
+TOKEN_TYPES_BY_CODE = list(TokenType)
+
+
+class TokenBuffer:
+    """Tokens stockés en tableaux parallèles plutôt qu'en objets Token.
+
+    Chaque token occupe un code de type sur un octet, ses positions de début
+    et de fin dans le source et son numéro de ligne : le lexème n'est pas
+    copié. Les Token ne sont créés qu'à la lecture, un par accès.
+    """
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.types = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+
+    def append(self, token_type: TokenType, start: int, end: int, line: int) -> None:
+        """Ajoute le token source[start:end] de la ligne donnée."""
+        self.types.append(TOKEN_TYPE_CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def type_at(self, index: int) -> TokenType:
+        """Type du token d'indice donné, sans créer de Token."""
+        return TOKEN_TYPES_BY_CODE[self.types[index]]
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        return Token(
+            TOKEN_TYPES_BY_CODE[self.types[index]],
+            self.source[self.starts[index] : self.ends[index]],
+            self.lines[index],
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        source = self.source
+        for code, start, end, line in zip(self.types, self.starts, self.ends, self.lines):
+            yield Token(TOKEN_TYPES_BY_CODE[code], source[start:end], line)
@@ -0,0 +1,410 @@
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from toy.ast_nodes import Statement
+from toy.bytecode import Chunk, FunctionProto, OpCode
+from toy.compiler import Compiler
+from toy.environment import UNSET
+from toy.interpreter import Interruptible
+from toy.metrics import Metrics
+
+
+class Cell:
+    """Boîte partagée entre une frame et les closures qui capturent la variable."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+class VMFunction:
+    """Fonction Toy à l'exécution : prototype compilé et cellules capturées."""
+    __slots__ = ("proto", "cells")
+
+    def __init__(self, proto: FunctionProto, cells: tuple[Cell, ...]) -> None:
+        self.proto = proto
+        self.cells = cells
+
+    def __repr__(self) -> str:
+        return f"<fn {self.proto.name}>"
+
+
+class VM(Interruptible):
+    """Machine virtuelle à pile qui exécute le bytecode produit par le Compiler.
+
+    L'arrêt demandé par interrupt est vérifié à chaque saut et appel.
+    Parmi les compteurs de metrics, tenus seulement avec counting=True, seuls
+    les appels, les frames et la profondeur d'appel ont un sens pour le bytecode.
+
+    Performances : l'objectif d'un gain d'un ordre de grandeur sur le
+    parcours d'arbre n'est pas atteint. Sur benchmarks/programs, malgré les
+    superinstructions et l'ordre de dispatch, la machine est de 2 à 8 fois
+    plus rapide que Interpreter(compiled=False) (closures 2x, arithmetic et
+    match_dispatch 4x, fib 7x, nested_loops 8x). Le coût par instruction
+    d'une boucle de dispatch en Python reste le plafond ; le moteur par
+    closures (Interpreter()) est aussi rapide ou plus rapide sur ces programmes.
+    """
+
+    def __init__(self, counting: bool = False) -> None:
+        self.globals: dict[str, Any] = {}
+        self.interrupt_reason = None
+        self.counting = counting
+        self.metrics = Metrics()
+
+    def stats(self) -> dict[str, Any]:
+        """Compteurs d'exécution et durées des phases depuis la création de la machine."""
+        return self.metrics.stats()
+
+    def interpret(self, statements: list[Statement], start_index: int = 0) -> None:
+        """Compile puis exécute une liste d'instructions."""
+        start = time.perf_counter()
+        try:
+            proto = Compiler().compile(statements[start_index:])
+            self.run(proto)
+        finally:
+            self.metrics.execute_time += time.perf_counter() - start
+
+    def interpret_stream(self, statements: Iterable[Statement]) -> None:
+        """Compile et exécute chaque instruction dès qu'elle est produite, puis l'oublie."""
+        for statement in statements:
+            start = time.perf_counter()
+            try:
+                if self.run(Compiler().compile([statement])):
+                    break
+            finally:
+                self.metrics.execute_time += time.perf_counter() - start
+
+    def run(self, script: FunctionProto) -> bool:
+        """Boucle principale de la machine virtuelle.
+
+        Retourne True si le script s'est arrêté sur un return de premier niveau.
+        """
+        (
+            CONSTANT, POP, DUP,
+            GET_LOCAL, GET_PARAM, SET_LOCAL, DEFINE_LOCAL, DECLARE_LOCAL,
+            GET_CELL, SET_CELL, DEFINE_CELL, DECLARE_CELL, INIT_CELL,
+            GET_UPVALUE, SET_UPVALUE, GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL,
+            STORE_LOCAL, STORE_CELL, STORE_UPVALUE, STORE_GLOBAL,
+            ADD, SUBTRACT, MULTIPLY, DIVIDE,
+            EQUAL, NOT_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+            ADD_CONST, SUBTRACT_CONST, MULTIPLY_CONST, DIVIDE_CONST,
+            EQUAL_CONST, NOT_EQUAL_CONST, GREATER_CONST, GREATER_EQUAL_CONST,
+            LESS_CONST, LESS_EQUAL_CONST,
+            NEGATE, NOT, JUMP, JUMP_IF_FALSE,
+            CHECK_CALLABLE, CALL, CLOSURE, RETURN,
+            PRINT, NO_MATCH, ERROR,
+            JUMP_IF_NOT_LESS_CONST, MATCH_CONST, ADD_LOCAL_CONST, ADD_CELL_CONST,
+            GET_GLOBAL_FUNCTION,
+        ) = [int(op) for op in OpCode]
+
+        globals_ = self.globals
+        metrics = self.metrics
+        counting = self.counting
+        stack: list[Any] = []
+        push = stack.append
+        pop = stack.pop
+        frames: list[tuple] = []
+
+        chunk = script.chunk
+        code = chunk.code
+        constants = chunk.constants
+        slots: list[Any] = [UNSET] * script.slot_count
+        cells: tuple[Cell, ...] = ()
+        ip = 0
+
+        # Les instructions les plus fréquentes sont testées en premier
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                push(slots[code[ip]])
+                ip += 1
+            elif op == GET_GLOBAL:
+                try:
+                    push(globals_[constants[code[ip]]])
+                except KeyError:
+                    raise RuntimeError(f"Variable '{constants[code[ip]]}' is not defined.") from None
+                ip += 1
+            elif op == GET_PARAM:
+                value = slots[code[ip]]
+                if value is UNSET:
+                    raise RuntimeError(f"Variable '{chunk.names[ip - 1]}' is not defined.")
+                push(value)
+                ip += 1
+            elif op == GET_GLOBAL_FUNCTION:
+                try:
+                    function = globals_[constants[code[ip]]]
+                except KeyError:
+                    raise RuntimeError(f"Variable '{constants[code[ip]]}' is not defined.") from None
+                if not isinstance(function, VMFunction):
+                    raise ValueError(constants[code[ip + 1]])
+                push(function)
+                ip += 2
+            elif op == JUMP_IF_NOT_LESS_CONST:
+                if pop() < constants[code[ip + 1]]:
+                    ip += 2
+                else:
+                    ip = code[ip]
+            elif op == MATCH_CONST:
+                # Le sujet reste sur la pile pour le cas suivant, sauf s'il correspond
+                if stack[-1] == constants[code[ip + 1]]:
+                    pop()
+                    ip += 2
+                else:
+                    ip = code[ip]
+            elif op == ADD:
+                right = pop()
+                stack[-1] = stack[-1] + right
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == JUMP_IF_FALSE:
+                if pop():
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == JUMP:
+                if self.interrupt_reason is not None:
+                    self.check_interrupt()
+                ip = code[ip]
+            elif op == CALL:
+                if self.interrupt_reason is not None:
+                    self.check_interrupt()
+                argc = code[ip]
+                ip += 1
+                base = len(stack) - argc
+                function = stack[base - 1]
+                args = stack[base:]
+                del stack[base - 1:]
+
+                proto = function.proto
+                if argc != proto.slot_count:
+                    if argc > proto.arity:
+                        del args[proto.arity:]
+                    args.extend([UNSET] * (proto.slot_count - len(args)))
+                for slot in proto.cell_params:
+                    args[slot] = Cell(args[slot])
+
+                frames.append((chunk, code, constants, ip, slots, cells))
+                if counting:
+                    metrics.calls += 1
+                    metrics.environments += 1
+                    if len(frames) > metrics.peak_call_depth:
+                        metrics.peak_call_depth = len(frames)
+                chunk = proto.chunk
+                code = chunk.code
+                constants = chunk.constants
+                ip = 0
+                slots = args
+                cells = function.cells
+            elif op == CHECK_CALLABLE:
+                if not isinstance(stack[-1], VMFunction):
+                    raise ValueError(constants[code[ip]])
+                ip += 1
+            elif op == RETURN:
+                if not frames:
+                    # Le RETURN implicite de fin de script est sa dernière instruction
+                    return ip < len(code)
+                # La valeur de retour reste au sommet de la pile pour l'appelant
+                chunk, code, constants, ip, slots, cells = frames.pop()
+            elif op == ADD_LOCAL_CONST:
+                slot = code[ip]
+                slots[slot] = slots[slot] + constants[code[ip + 1]]
+                ip += 2
+            elif op == STORE_LOCAL:
+                slots[code[ip]] = pop()
+                ip += 1
+            elif op == STORE_GLOBAL:
+                name = constants[code[ip]]
+                if name not in globals_:
+                    raise RuntimeError(f"Undefined variable '{name}'.")
+                globals_[name] = pop()
+                ip += 1
+            elif op == SUBTRACT_CONST:
+                stack[-1] = stack[-1] - constants[code[ip]]
+                ip += 1
+            elif op == SUBTRACT:
+                right = pop()
+                stack[-1] = stack[-1] - right
+            elif op == ADD_CONST:
+                stack[-1] = stack[-1] + constants[code[ip]]
+                ip += 1
+            elif op == MULTIPLY:
+                right = pop()
+                stack[-1] = stack[-1] * right
+            elif op == MULTIPLY_CONST:
+                stack[-1] = stack[-1] * constants[code[ip]]
+                ip += 1
+            elif op == GET_UPVALUE:
+                value = cells[code[ip]].value
+                if value is UNSET:
+                    value = self.read_fallback(chunk, ip - 1, cells)
+                push(value)
+                ip += 1
+            elif op == LESS_CONST:
+                stack[-1] = stack[-1] < constants[code[ip]]
+                ip += 1
+            elif op == DIVIDE_CONST:
+                stack[-1] = stack[-1] / constants[code[ip]]
+                ip += 1
+            elif op == DEFINE_LOCAL:
+                slots[code[ip]] = pop()
+                ip += 1
+            elif op == LESS:
+                right = pop()
+                stack[-1] = stack[-1] < right
+            elif op == POP:
+                pop()
+            elif op == EQUAL_CONST:
+                stack[-1] = stack[-1] == constants[code[ip]]
+                ip += 1
+            elif op == LESS_EQUAL_CONST:
+                stack[-1] = stack[-1] <= constants[code[ip]]
+                ip += 1
+            elif op == GREATER_CONST:
+                stack[-1] = stack[-1] > constants[code[ip]]
+                ip += 1
+            elif op == GREATER_EQUAL_CONST:
+                stack[-1] = stack[-1] >= constants[code[ip]]
+                ip += 1
+            elif op == NOT_EQUAL_CONST:
+                stack[-1] = stack[-1] != constants[code[ip]]
+                ip += 1
+            elif op == DIVIDE:
+                right = pop()
+                stack[-1] = stack[-1] / right
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] != right
+            elif op == GREATER:
+                right = pop()
+                stack[-1] = stack[-1] > right
+            elif op == GREATER_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] >= right
+            elif op == LESS_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] <= right
+            elif op == GET_CELL:
+                value = slots[code[ip]].value
+                if value is UNSET:
+                    raise RuntimeError(f"Variable '{chunk.names[ip - 1]}' is not defined.")
+                push(value)
+                ip += 1
+            elif op == STORE_CELL:
+                slots[code[ip]].value = pop()
+                ip += 1
+            elif op == STORE_UPVALUE:
+                cell = cells[code[ip]]
+                if cell.value is UNSET:
+                    self.write_fallback(chunk, ip - 1, cells, pop())
+                else:
+                    cell.value = pop()
+                ip += 1
+            elif op == SET_LOCAL:
+                slots[code[ip]] = stack[-1]
+                ip += 1
+            elif op == SET_CELL:
+                slots[code[ip]].value = stack[-1]
+                ip += 1
+            elif op == SET_UPVALUE:
+                cell = cells[code[ip]]
+                if cell.value is UNSET:
+                    self.write_fallback(chunk, ip - 1, cells, stack[-1])
+                else:
+                    cell.value = stack[-1]
+                ip += 1
+            elif op == SET_GLOBAL:
+                name = constants[code[ip]]
+                if name not in globals_:
+                    raise RuntimeError(f"Undefined variable '{name}'.")
+                globals_[name] = stack[-1]
+                ip += 1
+            elif op == DEFINE_CELL:
+                slots[code[ip]] = Cell(pop())
+                ip += 1
+            elif op == DEFINE_GLOBAL:
+                name = constants[code[ip]]
+                if name in globals_:
+                    raise RuntimeError(f"Variable '{name}' already defined.")
+                globals_[name] = pop()
+                ip += 1
+            elif op == NEGATE:
+                stack[-1] = -stack[-1]
+            elif op == NOT:
+                stack[-1] = not stack[-1]
+            elif op == DUP:
+                push(stack[-1])
+            elif op == PRINT:
+                print(pop())
+            elif op == CLOSURE:
+                proto = constants[code[ip]]
+                ip += 1
+                captured = tuple(
+                    slots[index] if is_local else cells[index]
+                    for is_local, index in proto.captures
+                )
+                push(VMFunction(proto, captured))
+            elif op == DECLARE_LOCAL:
+                slots[code[ip]] = UNSET
+                ip += 1
+            elif op == DECLARE_CELL:
+                slots[code[ip]] = Cell(UNSET)
+                ip += 1
+            elif op == ADD_CELL_CONST:
+                cell = slots[code[ip]]
+                cell.value = cell.value + constants[code[ip + 1]]
+                ip += 2
+            elif op == INIT_CELL:
+                slots[code[ip]].value = pop()
+                ip += 1
+            elif op == NO_MATCH:
+                raise RuntimeError(f"No match for value: {pop()}")
+            elif op == ERROR:
+                raise RuntimeError(constants[code[ip]])
+            else:
+                raise ValueError(f"Unknown opcode: {op}")
+
+    def read_fallback(self, chunk: Chunk, position: int, cells: tuple[Cell, ...]) -> Any:
+        """Lit la liaison visible à la place d'une variable capturée encore vide.
+
+        Une variable réservée mais pas encore déclarée laisse voir la liaison
+        englobante, puis la globale ; un paramètre sans argument n'est pas défini.
+        """
+        name = chunk.names[position]
+        fallbacks = chunk.fallbacks.get(position)
+        if fallbacks is not None:
+            for index, is_param in fallbacks:
+                value = cells[index].value
+                if value is not UNSET:
+                    return value
+                if is_param:
+                    break
+            else:
+                if name in self.globals:
+                    return self.globals[name]
+        raise RuntimeError(f"Variable '{name}' is not defined.")
+
+    def write_fallback(self, chunk: Chunk, position: int, cells: tuple[Cell, ...], value: Any) -> None:
+        """Assigne la liaison visible à la place d'une variable capturée encore vide."""
+        fallbacks = chunk.fallbacks.get(position)
+        if fallbacks is None:
+            # Paramètre sans argument : l'assignation le définit
+            cells[chunk.code[position + 1]].value = value
+            return
+
+        for index, is_param in fallbacks:
+            cell = cells[index]
+            if is_param or cell.value is not UNSET:
+                cell.value = value
+                return
+
+        name = chunk.names[position]
+        if name not in self.globals:
+            raise RuntimeError(f"Undefined variable '{name}'.")
+        self.globals[name] = value
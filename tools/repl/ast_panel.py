@@ -1,19 +1,30 @@
 """Custom widgets for the Inspect tool."""
 
-from rich.tree import Tree
-from textual.widgets import Static
+from textual.widgets import Tree
 
 from toy.ast_nodes import ASTNode
 from toy import ast_nodes as ast_module
 from colors import NODE_TYPE_COLOR, NODE_LABEL_COLOR
 
 
-class ASTPanel(Static):
-    """Widget to display AST tree structure."""
+# Children of a node: each entry is an optional section label and its nodes
+Children = list[tuple[str | None, list[ASTNode]]]
+
+
+class ASTPanel(Tree):
+    """Widget to display AST tree structure.
+
+    New statements are appended to the tree as collapsed branches, and a
+    branch only builds its children the first time it is expanded. The tree
+    widget draws only the rows scrolled into view, so the cost of an update
+    depends on the new statements, not on the size of the session.
+    """
 
     def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        super().__init__("Program", **kwargs)
         self.ast = None
+        # Number of statements already added to the tree
+        self.shown = 0
 
     def update_ast(self, ast: list[ASTNode]):
         """Update the displayed AST.
@@ -21,17 +32,40 @@ class ASTPanel(Static):
         Args:
             ast: Root AST node from the parser
         """
+        # The session only appends; if the list was replaced, start over
+        if self.ast is not ast or len(ast) < self.shown:
+            self.clear()
+            self.shown = 0
+
         self.ast = ast
         if not self.ast:
-            self.update("No AST to display")
+            self.root.set_label("No AST to display")
             return
 
-        tree = Tree("Program")
+        self.root.set_label("Program")
+        for node in self.ast[self.shown:]:
+            self._add_branch(self.root, node)
+        self.shown = len(self.ast)
+        self.root.expand()
 
-        for node in self.ast:
-            self._add_node(tree, node)
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Build the children of a branch the first time it is opened."""
+        branch = event.node
+        if branch.children or branch.data is None:
+            return
+
+        match branch.data:
+            case ASTNode() as node:
+                sections = self._children(node)
+            case nodes:
+                sections = [(None, nodes)]
 
-        self.update(tree)
+        for section, nodes in sections:
+            if section is None:
+                for child in nodes:
+                    self._add_branch(branch, child)
+            else:
+                branch.add(f"[{NODE_LABEL_COLOR}]{section}[/{NODE_LABEL_COLOR}]", data=nodes)
 
     def _format_label(self, node_type: str, detail: str = "") -> str:
         label = f"[{NODE_TYPE_COLOR}]{node_type}[/{NODE_TYPE_COLOR}]"
@@ -39,94 +73,93 @@ class ASTPanel(Static):
             label += f" {detail}"
         return label
 
-    def _add_node(self, parent_tree: Tree, node: ASTNode):
-        node_name = node.__class__.__name__
-        branch = parent_tree.add(self._format_label(node_name))
+    def _add_branch(self, parent, node: ASTNode):
+        """Add a collapsed branch for node; its children are built on expansion."""
+        label = self._format_label(node.__class__.__name__, self._detail(node))
+        if self._children(node):
+            parent.add(label, data=node)
+        else:
+            parent.add_leaf(label)
+
+    def _is_type(self, node: ASTNode, class_name: str) -> bool:
+        # Check if node matches a type (returns False if type doesn't exist)
+        cls = getattr(ast_module, class_name, None)
+        return cls is not None and isinstance(node, cls)
 
-        # Helper to check if node matches a type (returns False if type doesn't exist)
-        def is_type(class_name: str) -> bool:
-            cls = getattr(ast_module, class_name, None)
-            return cls is not None and isinstance(node, cls)
+    def _detail(self, node: ASTNode) -> str:
+        is_type = lambda class_name: self._is_type(node, class_name)
+
+        match node:
+            case _ if is_type("Binary") or is_type("Unary"):
+                return f"({node.operator.lexeme})"
+
+            case _ if is_type("Literal"):
+                return repr(node.value)
+
+            case _ if is_type("Variable") or is_type("VariableAssignment") or is_type("VarStatement"):
+                return f"'{node.name.lexeme}'"
+
+            case _ if is_type("FunctionDeclarationStatement"):
+                params_str = ", ".join(p.lexeme for p in node.parameters)
+                return f"'{node.name.lexeme}({params_str})'"
+
+            case _:
+                return ""
+
+    def _children(self, node: ASTNode) -> Children:
+        is_type = lambda class_name: self._is_type(node, class_name)
 
         match node:
             # Expressions
             case _ if is_type("Binary"):
-                branch.label = self._format_label(
-                    node_name, f"({node.operator.lexeme})"
-                )
-                self._add_node(branch, node.left)
-                self._add_node(branch, node.right)
+                return [(None, [node.left, node.right])]
 
             case _ if is_type("Unary"):
-                branch.label = self._format_label(
-                    node_name, f"({node.operator.lexeme})"
-                )
-                self._add_node(branch, node.right)
-
-            case _ if is_type("Literal"):
-                branch.label = self._format_label(node_name, repr(node.value))
-
-            case _ if is_type("Variable"):
-                branch.label = self._format_label(node_name, f"'{node.name.lexeme}'")
+                return [(None, [node.right])]
 
             case _ if is_type("VariableAssignment"):
-                branch.label = self._format_label(node_name, f"'{node.name.lexeme}'")
-                self._add_node(branch, node.value)
+                return [(None, [node.value])]
 
             case _ if is_type("FunctionCall"):
-                self._add_node(branch, node.callee)
-                for arg in node.arguments:
-                    self._add_node(branch, arg)
+                return [(None, [node.callee, *node.arguments])]
 
             # Statements
-            case _ if is_type("ExpressionStatement"):
-                self._add_node(branch, node.expression)
+            case _ if is_type("ExpressionStatement") or is_type("PrintStatement"):
+                return [(None, [node.expression])]
 
             case _ if is_type("VarStatement"):
-                branch.label = self._format_label(node_name, f"'{node.name.lexeme}'")
-                if node.initializer:
-                    self._add_node(branch, node.initializer)
-
-            case _ if is_type("PrintStatement"):
-                self._add_node(branch, node.expression)
+                return [(None, [node.initializer])] if node.initializer else []
 
             case _ if is_type("IfStatement"):
-                cond_tree = branch.add(
-                    f"[{NODE_LABEL_COLOR}]condition[/{NODE_LABEL_COLOR}]"
-                )
-                self._add_node(cond_tree, node.condition)
-                then_tree = branch.add(f"[{NODE_LABEL_COLOR}]then[/{NODE_LABEL_COLOR}]")
-                self._add_node(then_tree, node.then_branch)
+                children = [("condition", [node.condition]), ("then", [node.then_branch])]
                 if node.else_branch:
-                    else_tree = branch.add(
-                        f"[{NODE_LABEL_COLOR}]else[/{NODE_LABEL_COLOR}]"
-                    )
-                    self._add_node(else_tree, node.else_branch)
+                    children.append(("else", [node.else_branch]))
+                return children
 
             case _ if is_type("WhileStatement"):
-                cond_tree = branch.add(
-                    f"[{NODE_LABEL_COLOR}]condition[/{NODE_LABEL_COLOR}]"
-                )
-                self._add_node(cond_tree, node.condition)
-                body_tree = branch.add(f"[{NODE_LABEL_COLOR}]body[/{NODE_LABEL_COLOR}]")
-                self._add_node(body_tree, node.body)
+                return [("condition", [node.condition]), ("body", [node.body])]
+
+            case _ if is_type("ForStatement"):
+                return [
+                    (label, [child])
+                    for label, child in (
+                        ("init", node.initializer),
+                        ("condition", node.condition),
+                        ("increment", node.increment),
+                        ("body", node.body),
+                    )
+                    if child
+                ]
 
             case _ if is_type("BlockStatement"):
-                for stmt in node.statements:
-                    self._add_node(branch, stmt)
+                return [(None, node.statements)]
 
             case _ if is_type("FunctionDeclarationStatement"):
-                params_str = ", ".join(p.lexeme for p in node.parameters)
-                branch.label = self._format_label(
-                    node_name, f"'{node.name.lexeme}({params_str})'"
-                )
-                for stmt in node.body:
-                    self._add_node(branch, stmt)
+                return [(None, node.body)]
 
             case _ if is_type("ReturnStatement"):
-                if node.value:
-                    self._add_node(branch, node.value)
+                return [(None, [node.value])] if node.value else []
 
             case _:
                 # Unknown/unimplemented node - keep default label
-                pass
+                return []
@@ -1,45 +1,78 @@
-from rich.tree import Tree
-from textual.widgets import Static
+import bisect
+
+from textual.widgets import Tree
+from textual.widgets.tree import TreeNode
 
 from toy.environment import Environment
 
 
-class EnvPanel(Static):
+class EnvPanel(Tree):
+    """Global variables, updated in place.
+
+    Each binding keeps its row: after an evaluation only new variables are
+    inserted and only rows whose value changed are relabelled. The tree
+    widget draws only the rows scrolled into view.
+    """
 
     def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        super().__init__("[cyan]Variables[/cyan]", **kwargs)
         self.environment = None
+        # Displayed bindings: name -> (value, row), rows kept in name order
+        self.rows: dict[str, tuple[object, TreeNode]] = {}
+        self.names: list[str] = []
 
     def update_environment(self, environment: Environment | None):
+        if environment is not self.environment:
+            self.clear()
+            self.rows = {}
+            self.names = []
         self.environment = environment
+
         if not self.environment:
-            self.update("No environment")
+            self.root.set_label("No environment")
             return
 
-        # Create simple tree showing only global scope
-        tree = Tree("[cyan]Variables[/cyan]")
+        self.root.set_label("[cyan]Variables[/cyan]")
+        self._update_variables(self.environment)
+        if not self.rows and not self.root.children:
+            self.root.add_leaf("[dim]<empty>[/dim]")
+        self.root.expand()
 
-        if not self.environment.values:
-            tree.add("[dim]<empty>[/dim]")
-        else:
-            self._add_environment_variables(tree, self.environment)
+    def _update_variables(self, env: Environment):
+        values = env.values
+        if values and not self.rows:
+            # Drop the <empty> placeholder
+            self.root.remove_children()
 
-        self.update(tree)
+        for name in [name for name in self.names if name not in values]:
+            self.rows.pop(name)[1].remove()
+            self.names.remove(name)
 
-    def _add_environment_variables(self, parent_tree: Tree, env: Environment):
-        for name, value in sorted(env.values.items()):
-            is_function = self._is_function(value)
-            value_repr = self._format_value(value)
+        for name, value in values.items():
+            shown = self.rows.get(name)
+            if shown is not None and shown[0] is value:
+                continue
 
-            if is_function:
-                parent_tree.add(
-                    f"[blue]fn[/blue] [cyan]{name}[/cyan] = [yellow]{value_repr}[/yellow]"
-                )
+            label = self._format_binding(name, value)
+            if shown is not None:
+                shown[1].set_label(label)
+                self.rows[name] = (value, shown[1])
+                continue
+
+            index = bisect.bisect(self.names, name)
+            if index < len(self.names):
+                row = self.root.add_leaf(label, before=self.rows[self.names[index]][1])
             else:
-                # Variable: green name
-                parent_tree.add(
-                    f"[green]{name}[/green] = [yellow]{value_repr}[/yellow]"
-                )
+                row = self.root.add_leaf(label)
+            self.names.insert(index, name)
+            self.rows[name] = (value, row)
+
+    def _format_binding(self, name: str, value) -> str:
+        value_repr = self._format_value(value)
+        if self._is_function(value):
+            return f"[blue]fn[/blue] [cyan]{name}[/cyan] = [yellow]{value_repr}[/yellow]"
+        # Variable: green name
+        return f"[green]{name}[/green] = [yellow]{value_repr}[/yellow]"
 
     def _is_function(self, value) -> bool:
         try:
@@ -0,0 +1,94 @@
+"""Background evaluation of REPL input with streamed output and cancellation."""
+
+import io
+import threading
+from contextlib import redirect_stdout
+from typing import Callable
+
+from toy.ast_nodes import Statement
+from toy.interpreter import Interpreter
+
+
+# Seconds before a running evaluation is interrupted
+DEFAULT_TIME_LIMIT = 10.0
+
+
+class OutputStream(io.TextIOBase):
+    """Thread-safe text buffer: the program writes to it, the UI drains it.
+
+    The UI polls on a timer, so a program printing in a tight loop costs one
+    UI update per tick rather than one per line.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buffer = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            self.buffer += text
+        return len(text)
+
+    def drain(self, final: bool = False) -> str:
+        """Remove and return the complete lines written so far, or everything if final."""
+        with self.lock:
+            if final:
+                text, self.buffer = self.buffer, ""
+            else:
+                text, newline, self.buffer = self.buffer.rpartition("\n")
+                text += newline
+        return text
+
+
+class Evaluation:
+    """Runs statements with an interpreter, meant to be called off the UI thread.
+
+    Printed output accumulates in `output` while the program runs, for the
+    UI to drain, and `on_finished` receives the error message, or None on
+    success. `cancel` and the time limit use the interpreter's cooperative
+    interrupt, so the program stops at its next loop iteration or call.
+    """
+
+    def __init__(
+        self,
+        interpreter: Interpreter,
+        statements: list[Statement],
+        on_finished: Callable[[str | None], None],
+        time_limit: float | None = DEFAULT_TIME_LIMIT,
+    ):
+        self.interpreter = interpreter
+        self.statements = statements
+        self.on_finished = on_finished
+        self.time_limit = time_limit
+        self.output = OutputStream()
+
+    def run(self) -> None:
+        """Run the statements to completion, interruption or error."""
+        timer = None
+        if self.time_limit is not None:
+            reason = f"Time limit of {self.time_limit:g}s exceeded."
+            timer = threading.Timer(self.time_limit, self.interpreter.interrupt, [reason])
+            timer.daemon = True
+
+        # A request left over from a previous evaluation must not stop this one
+        self.interpreter.interrupt_reason = None
+        error = None
+        try:
+            if timer is not None:
+                timer.start()
+            with redirect_stdout(self.output):
+                self.interpreter.interpret(self.statements)
+        except Exception as e:
+            error = str(e)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        self.on_finished(error)
+
+    def cancel(self) -> None:
+        """Ask the running program to stop."""
+        self.interpreter.interrupt()
@@ -1,7 +1,6 @@
 """Interactive REPL tool for the Toy language."""
 
 import sys
-from io import StringIO
 from pathlib import Path
 
 # Keep at the top to resolve toy imports after
@@ -10,8 +9,7 @@ toy_src = project_root / "src"
 sys.path.insert(0, str(toy_src))
 
 from toy.interpreter import Interpreter
-from toy.lexer import Lexer
-from toy.parser import Parser
+from toy.sampler import SamplingProfiler
 
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical
@@ -20,6 +18,8 @@ from textual.widgets import Header, Footer, Input, RichLog, TabbedContent, TabPa
 from token_panel import TokenPanel
 from ast_panel import ASTPanel
 from env_panel import EnvPanel
+from evaluation import Evaluation
+from session import REPLSession
 
 
 class REPLApp(App):
@@ -27,8 +27,16 @@ class REPLApp(App):
     BINDINGS = [
         ("ctrl+c", "quit", "Quit"),
         ("ctrl+d", "quit", "Quit"),
+        ("escape", "cancel_evaluation", "Cancel"),
+        ("f6", "toggle_sampling", "Sample"),
     ]
 
+    # Files written when sampling stops: collapsed stacks and speedscope JSON
+    SAMPLE_FILES = ("toy-repl.collapsed", "toy-repl.speedscope.json")
+
+    # Seconds between two transfers of the running program's output to the log
+    OUTPUT_INTERVAL = 0.05
+
     # Animation frames for the rubber duck
     DUCK_FRAMES = [
         [
@@ -49,10 +57,12 @@ class REPLApp(App):
         super().__init__()
         self.title = "Toy Language REPL"
 
+        # Attached to the interpreter only while F6 sampling is on (see action_toggle_sampling)
+        self.sampler = SamplingProfiler()
         self.interpreter = Interpreter()
-        self.source = ""
-        self.input_buffer = ""
-        self.executed_count = 0
+        self.session = REPLSession()
+        self.evaluation: Evaluation | None = None
+        self.output_timer = None
 
         # Animation state
         self.first_input = True
@@ -118,10 +128,6 @@ class REPLApp(App):
         output.clear()
         self._display_duck()
 
-    def is_complete(self, source: str) -> bool:
-        """Check if the source has balanced braces."""
-        return source.count("{") - source.count("}") == 0
-
     def on_input_submitted(self, event: Input.Submitted) -> None:
         user_input = event.value
         if not user_input.strip():
@@ -132,7 +138,6 @@ class REPLApp(App):
         output = self.query_one("#repl-output", RichLog)
         token_panel = self.query_one(TokenPanel)
         ast_panel = self.query_one(ASTPanel)
-        env_panel = self.query_one(EnvPanel)
 
         # Clear welcome message and stop animation on first input
         if self.first_input:
@@ -141,58 +146,84 @@ class REPLApp(App):
             output.clear()
             self.first_input = False
 
-        # Accumulate input in buffer
-        self.input_buffer += user_input + "\n"
+        # Only the new line is tokenized; it is parsed once its braces balance
+        try:
+            chunk = self.session.feed(user_input)
+        except SyntaxError as e:
+            output.write(f"[bold green]>>>[/bold green] {user_input}")
+            output.write(f"[bold red]Error[/bold red]: {e}")
+            return
 
-        # Check if input is complete (balanced braces)
-        if not self.is_complete(self.input_buffer):
+        if chunk is None:
             # Show continuation prompt
             output.write(f"[bold yellow]...[/bold yellow] {user_input}")
             return
 
-        # Input is complete, we can name tokenize, parse, and interpret
         output.write(f"[bold green]>>>[/bold green] {user_input}")
-        combined_source = self.source + self.input_buffer
-        try:
-            # Interpret the input
-            lexer = Lexer(combined_source)
-            tokens = lexer.tokenize()
-
-            parser = Parser(tokens)
-            ast = parser.parse()
 
-            # Update the panels
-            token_panel.update_tokens(tokens)
-            ast_panel.update_ast(ast)
-
-            # Capture interpreter output
-            old_stdout = sys.stdout
-            sys.stdout = StringIO()
-
-            try:
-                # Only execute statements we haven't executed yet
-                # It's not so much about perfs, rather avoid print already executed statements
-                start_idx = self.executed_count
-                self.interpreter.interpret(ast, start_index=start_idx)
-                self.source = combined_source
-
-                output_text = sys.stdout.getvalue()
-                if output_text:
-                    output.write(output_text.rstrip())
-                self.executed_count = len(ast)
-
-                env_panel.update_environment(self.interpreter.environment)
-            finally:
-                sys.stdout = old_stdout
-
-            # Clear buffer after successful execution
-            self.input_buffer = ""
+        # Update the panels
+        token_panel.update_tokens(self.session.tokens)
+        ast_panel.update_ast(self.session.ast)
+
+        # Run off the UI thread; its output is moved to the log on a timer
+        self.evaluation = Evaluation(
+            self.interpreter,
+            chunk.statements,
+            on_finished=lambda error: self.call_from_thread(self.finish_evaluation, error),
+        )
+        event.input.disabled = True
+        self.output_timer = self.set_interval(self.OUTPUT_INTERVAL, self.drain_output)
+        self.run_worker(self.evaluation.run, thread=True, exclusive=True)
+
+    def drain_output(self, final: bool = False) -> None:
+        text = self.evaluation.output.drain(final)
+        if text:
+            self.query_one("#repl-output", RichLog).write(text.rstrip("\n"))
+
+    def finish_evaluation(self, error: str | None) -> None:
+        self.output_timer.stop()
+        self.drain_output(final=True)
+
+        if error is not None:
+            self.query_one("#repl-output", RichLog).write(f"[bold red]Error[/bold red]: {error}")
+        self.query_one(EnvPanel).update_environment(self.interpreter.environment)
+
+        self.evaluation = None
+        repl_input = self.query_one("#repl-input", Input)
+        repl_input.disabled = False
+        repl_input.focus()
+
+    def action_cancel_evaluation(self) -> None:
+        """Stop the running evaluation at its next loop iteration or function call."""
+        if self.evaluation is not None:
+            self.evaluation.cancel()
+
+    def action_toggle_sampling(self) -> None:
+        """Start sampling the Toy call stack, or stop and write the samples to files.
+
+        The interpreter compiles each input with its current instrumentation,
+        so only inputs submitted while sampling is on keep the sampler's call
+        stack up to date; the rest of the session runs unwrapped. Functions
+        defined while sampling keep their frames, and the statements that call
+        older functions stand in for them.
+        """
+        output = self.query_one("#repl-output", RichLog)
+        if self.sampler.thread is None:
+            self.sampler.clear()
+            self.interpreter.instrumentation = self.sampler
+            self.sampler.start()
+            output.write("[dim]Sampling started for the next inputs, press F6 to stop[/dim]")
+            return
 
-        except Exception as e:
+        self.sampler.stop()
+        self.interpreter.instrumentation = None
+        try:
+            for path in self.SAMPLE_FILES:
+                self.sampler.write(path, "toy-repl")
+        except OSError as e:
             output.write(f"[bold red]Error[/bold red]: {e}")
-            # Clear buffer on error
-            self.input_buffer = ""
             return
+        output.write(f"[dim]Sampling stopped, {sum(self.sampler.counts)} samples written to {' and '.join(self.SAMPLE_FILES)}[/dim]")
 
 
 if __name__ == "__main__":
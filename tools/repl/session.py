@@ -0,0 +1,78 @@
+"""Incremental lexing and parsing state for the REPL."""
+
+from dataclasses import dataclass, field
+
+from toy.ast_nodes import Statement
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.tokens import Token, TokenType
+
+
+@dataclass
+class Chunk:
+    """A complete piece of input: its tokens and the statements parsed from them."""
+
+    tokens: list[Token] = field(default_factory=list)
+    statements: list[Statement] = field(default_factory=list)
+
+
+class REPLSession:
+    """Lexes and parses each submitted line once, appending to the session state.
+
+    Lines are tokenized as they arrive and kept until their braces balance;
+    the brace depth is tracked from the lexer's LBRACE/RBRACE tokens. The
+    complete chunk is then parsed on its own and appended to `tokens` and
+    `ast`, so the cost of a submission depends on the chunk, not on the
+    length of the session.
+    """
+
+    def __init__(self):
+        self.tokens: list[Token] = []
+        self.ast: list[Statement] = []
+        # Line number of the next submitted line
+        self.line = 1
+        self.pending = Chunk()
+        self.depth = 0
+
+    @property
+    def is_pending(self) -> bool:
+        """Whether earlier lines are waiting for their closing braces."""
+        return bool(self.pending.tokens) or self.depth > 0
+
+    def feed(self, text: str) -> Chunk | None:
+        """Add one line of input.
+
+        Returns the new chunk once its braces balance, or None while more
+        lines are needed. A SyntaxError discards the pending lines.
+        """
+        lexer = Lexer(text)
+        lexer.line = self.line
+        try:
+            tokens = lexer.tokenize()[:-1]
+        except SyntaxError:
+            self.reset()
+            raise
+        self.line += 1
+
+        self.pending.tokens.extend(tokens)
+        for token in tokens:
+            if token.type == TokenType.LBRACE:
+                self.depth += 1
+            elif token.type == TokenType.RBRACE:
+                self.depth -= 1
+
+        if self.depth > 0:
+            return None
+
+        chunk = self.pending
+        self.reset()
+        chunk.statements = Parser(chunk.tokens).parse()
+
+        self.tokens.extend(chunk.tokens)
+        self.ast.extend(chunk.statements)
+        return chunk
+
+    def reset(self) -> None:
+        """Discard the lines waiting for their closing braces."""
+        self.pending = Chunk()
+        self.depth = 0
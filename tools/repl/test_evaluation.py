@@ -0,0 +1,86 @@
+"""Tests for background REPL evaluation."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from toy.interpreter import Interpreter, StackInterpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.vm import VM
+
+from evaluation import Evaluation, OutputStream
+
+
+ENGINES = [Interpreter, lambda: Interpreter(compiled=False), StackInterpreter, VM]
+FOREVER = [
+    "while (1) { }",
+    "for (;;) { }",
+    "for (var i = 0; i < 1; i = i * 1) { }",
+    "fn f() { return f(); } f();",
+]
+
+
+def parse(source: str) -> list:
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def start(interpreter, source: str, **options) -> tuple[Evaluation, threading.Thread, list]:
+    finished = []
+    evaluation = Evaluation(interpreter, parse(source), finished.append, **options)
+    thread = threading.Thread(target=evaluation.run)
+    thread.start()
+    return evaluation, thread, finished
+
+
+def test_output_stream_drains_complete_lines():
+    stream = OutputStream()
+    stream.write("1.0\n2.")
+    assert stream.drain() == "1.0\n"
+    assert stream.drain() == ""
+    stream.write("0\n3")
+    assert stream.drain() == "2.0\n"
+    assert stream.drain(final=True) == "3"
+
+
+def test_output_is_available_while_running():
+    evaluation, thread, finished = start(Interpreter(), "print 1; while (1) { }")
+    deadline = time.monotonic() + 5
+    while not evaluation.output.drain() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    evaluation.cancel()
+    thread.join(5)
+    assert finished == ["Execution interrupted."]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source", FOREVER)
+def test_cancel_stops_running_program(engine, source):
+    interpreter = engine()
+    evaluation, thread, finished = start(interpreter, source)
+    time.sleep(0.05)
+    evaluation.cancel()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert finished == ["Execution interrupted."]
+
+    # The interpreter stays usable after being interrupted
+    evaluation, thread, finished = start(interpreter, "var x = 2; print x * 3;")
+    thread.join(5)
+    assert finished == [None]
+    assert evaluation.output.drain(final=True) == "6.0\n"
+
+
+def test_time_limit_interrupts():
+    _, thread, finished = start(Interpreter(), "while (1) { }", time_limit=0.1)
+    thread.join(5)
+    assert finished == ["Time limit of 0.1s exceeded."]
@@ -0,0 +1,135 @@
+"""Headless tests for the REPL side panels."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from textual.app import App
+
+from toy.environment import Environment
+from toy.interpreter import Interpreter
+
+from ast_panel import ASTPanel
+from env_panel import EnvPanel
+from session import REPLSession
+from token_panel import TokenPanel
+
+
+class PanelApp(App):
+    """Minimal app hosting a single panel."""
+
+    def __init__(self, panel):
+        super().__init__()
+        self.panel = panel
+
+    def compose(self):
+        yield self.panel
+
+
+def run_with(panel, scenario) -> None:
+    """Mount panel in a headless app and run the async scenario(panel, pilot)."""
+
+    async def run():
+        async with PanelApp(panel).run_test() as pilot:
+            await scenario(panel, pilot)
+
+    asyncio.run(run())
+
+
+def test_token_panel_writes_only_new_lines():
+    session = REPLSession()
+
+    async def scenario(panel, pilot):
+        session.feed("var x = 1;")
+        panel.update_tokens(session.tokens)
+        await pilot.pause()
+        first = panel.lines[0]
+        assert [line.text for line in panel.lines] == ["01 | [ var ][ identifier x ][ equal = ][ number 1 ][ semicolon ; ]"]
+
+        session.feed("print x;")
+        panel.update_tokens(session.tokens)
+        await pilot.pause()
+        assert len(panel.lines) == 2
+        assert panel.lines[0] is first
+        assert panel.lines[1].text == "02 | [ print ][ identifier x ][ semicolon ; ]"
+
+        # A new session replaces the token list: the log starts over
+        other = REPLSession()
+        other.feed("print 2;")
+        panel.update_tokens(other.tokens)
+        await pilot.pause()
+        assert [line.text for line in panel.lines] == ["01 | [ print ][ number 2 ][ semicolon ; ]"]
+
+        panel.update_tokens([])
+        await pilot.pause()
+        assert [line.text for line in panel.lines] == ["No tokens to display"]
+
+    run_with(TokenPanel(), scenario)
+
+
+def test_ast_panel_builds_branches_when_expanded():
+    session = REPLSession()
+
+    async def scenario(panel, pilot):
+        session.feed("var x = 1;")
+        session.feed("fn f(a) { return a + x; }")
+        panel.update_ast(session.ast)
+        await pilot.pause()
+
+        labels = [str(node.label) for node in panel.root.children]
+        assert labels == ["VarStatement 'x'", "FunctionDeclarationStatement 'f(a)'"]
+        function = panel.root.children[1]
+        assert not function.children
+
+        function.expand()
+        await pilot.pause()
+        assert [str(node.label) for node in function.children] == ["ReturnStatement"]
+
+        session.feed("print x;")
+        panel.update_ast(session.ast)
+        await pilot.pause()
+        assert len(panel.root.children) == 3
+        assert panel.root.children[1] is function
+
+        panel.update_ast([])
+        await pilot.pause()
+        assert not panel.root.children
+        assert str(panel.root.label) == "No AST to display"
+
+    run_with(ASTPanel(), scenario)
+
+
+def test_env_panel_updates_rows_in_place():
+    interpreter = Interpreter()
+    session = REPLSession()
+
+    def evaluate(text):
+        interpreter.interpret(session.feed(text).statements)
+
+    async def scenario(panel, pilot):
+        panel.update_environment(Environment())
+        await pilot.pause()
+        assert [str(node.label) for node in panel.root.children] == ["<empty>"]
+
+        evaluate("var y = 2; fn f(a) { return a; }")
+        panel.update_environment(interpreter.environment)
+        await pilot.pause()
+        assert [str(node.label) for node in panel.root.children] == ["fn f = fn(a)", "y = 2.0"]
+        row = panel.root.children[1]
+
+        evaluate("y = y + 1; var b = 0;")
+        panel.update_environment(interpreter.environment)
+        await pilot.pause()
+        assert [str(node.label) for node in panel.root.children] == ["b = 0.0", "fn f = fn(a)", "y = 3.0"]
+        assert panel.root.children[2] is row
+
+        panel.update_environment(None)
+        await pilot.pause()
+        assert str(panel.root.label) == "No environment"
+
+    run_with(EnvPanel(), scenario)
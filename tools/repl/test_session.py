@@ -0,0 +1,68 @@
+"""Tests for the incremental REPL session."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from toy.interpreter import Interpreter
+from toy.lexer import Lexer
+from toy.parser import Parser
+from toy.tokens import TokenType
+
+from session import REPLSession
+
+
+def test_each_line_is_parsed_once(monkeypatch):
+    session = REPLSession()
+    session.feed("var x = 1;")
+
+    lexed = []
+    original = Lexer.tokenize
+    monkeypatch.setattr(Lexer, "tokenize", lambda self: lexed.append(self.source) or original(self))
+
+    chunk = session.feed("print x + 1;")
+    assert lexed == ["print x + 1;"]
+    assert len(chunk.statements) == 1
+    assert len(session.ast) == 2
+
+
+def test_waits_for_balanced_braces_from_tokens():
+    session = REPLSession()
+    assert session.feed("fn f(a) {") is None
+    assert session.is_pending
+    assert session.feed("  if (a > 1) { return a; }") is None
+    chunk = session.feed("return 0; }")
+
+    assert not session.is_pending
+    assert [type(s).__name__ for s in chunk.statements] == ["FunctionDeclarationStatement"]
+    assert [t.line for t in chunk.tokens if t.type == TokenType.RBRACE] == [2, 3]
+
+
+def test_session_matches_whole_source():
+    lines = ["var a = 2;", "fn double(n) {", "return n * 2; }", "print double(a);"]
+    session = REPLSession()
+    for line in lines:
+        session.feed(line)
+
+    tokens = Lexer("\n".join(lines)).tokenize()[:-1]
+    assert session.tokens == tokens
+    assert session.ast == Parser(tokens).parse()
+
+
+def test_syntax_error_discards_pending_lines(capsys):
+    session = REPLSession()
+    session.feed("{")
+    with pytest.raises(SyntaxError):
+        session.feed("print (;}")
+    assert not session.is_pending
+    assert session.ast == []
+
+    interpreter = Interpreter()
+    interpreter.interpret(session.feed("print 3;").statements)
+    assert capsys.readouterr().out == "3.0\n"
@@ -1,37 +1,59 @@
 """Token display utilities and widgets."""
 
-from textual.widgets import Static
+from textual.widgets import RichLog
 from rich.text import Text
 
 from toy.tokens import Token, TokenType
 from colors import get_token_color
 
 
-class TokenPanel(Static):
-    """Widget to display tokenization results."""
+class TokenPanel(RichLog):
+    """Widget to display tokenization results.
+
+    Tokens are written one source line per log line, and only the tokens
+    added since the last update are rendered. The log only draws the lines
+    that are scrolled into view, so a long session stays cheap to display.
+    """
 
     def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+        super().__init__(wrap=False, **kwargs)
         self.tokens = []
+        # Number of tokens already written to the log, and the last of them
+        self.shown = 0
+        self.last_shown: Token | None = None
 
     def update_tokens(self, tokens: list[Token]):
+        # The session only appends. If the list was replaced or re-lexed, the token
+        # at the last shown position is a different object: start over
+        if len(tokens) < self.shown or (self.shown and tokens[self.shown - 1] is not self.last_shown):
+            self.shown = 0
+
         self.tokens = tokens
-        if not self.tokens:
-            self.update("No tokens to display")
-            return
-
-        # Render tokens as bordered chips/tags
-        result = Text()
-        line = 1
-        # Format line number with zero padding
-        result.append(f"{line:02} | ")
-        for token in self.tokens:
+        if not self.shown:
+            self.clear()
+            if not self.tokens:
+                self.write("No tokens to display")
+                return
+
+        for line in self._render_lines(self.tokens[self.shown:]):
+            self.write(line)
+        self.shown = len(self.tokens)
+        self.last_shown = self.tokens[-1] if self.tokens else None
+
+    def _render_lines(self, tokens: list[Token]):
+        """Render tokens as bordered chips/tags, one Text per source line."""
+        result = None
+        line = None
+        for token in tokens:
             if token.type == TokenType.EOF:
                 continue
 
             if token.line != line:
+                if result is not None:
+                    yield result
                 line = token.line
-                result.append(f"\n{line:02} | ")
+                # Format line number with zero padding
+                result = Text(f"{line:02} | ")
 
             color = get_token_color(token.type)
             # Create chip with brackets and colored background
@@ -44,4 +66,5 @@ class TokenPanel(Static):
             result.append(chip)
             result.append("]", style=f"dim {color}")
 
-        self.update(result)
+        if result is not None:
+            yield result